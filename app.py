@@ -2,28 +2,143 @@
 Application Flask pour l'optimisation des paris sportifs
 Version optimisée avec parallélisation, cache étendu et pré-chargement
 """
-from flask import Flask, render_template, jsonify
+from flask import Flask, Response, g, render_template, jsonify, request, stream_with_context
 from flask_cors import CORS
 import sys
 import os
+import atexit
+import math
 import time
 import threading
+import queue
+from dataclasses import asdict
+from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from pmu.scraper import PMUScraper
 from winamax.scraper import WinamaxScraper
-from models import Match
+from models import Match, MatchStore, ScraperResult
+from browser import init_pool, get_pool, get_browser_profile
+from scheduler import RefreshScheduler
+from cache_store import open_cache_store
+from history import OddsHistory
+from matching import combine_bookmakers
+from calculator import MAX_PLAYERS, calculate_batch, check_odds, matches_matrix, odds_matrix, rank
+from events import EventBroker, format_sse
+from http_cache import EncodedBody, encoded_response
+from rankings import RankedMatches
+from workers import ScraperWorker
+from governor import ConcurrencyGovernor, PRIORITY_USER, PRIORITY_REFRESH, PRIORITY_BACKGROUND
+from metrics import Registry
 
 app = Flask(__name__)
 app.secret_key = 'paris_sportifs_secret_key_2024'
 CORS(app)
 
-# Cache serveur - 30 minutes
+# Métriques Prometheus (/api/metrics) : mesurées en continu, texte produit seulement à la lecture
+_metrics = Registry()
+SCRAPE_PHASE_SECONDS = _metrics.histogram(
+    'paris_scrape_phase_seconds', "Durée des étapes d'un scraping (sport 'all' : étapes communes)",
+    ('bookmaker', 'sport', 'phase'))
+SCRAPE_SECONDS = _metrics.histogram(
+    'paris_scrape_duration_seconds', "Durée totale d'un scraping", ('bookmaker', 'status'))
+SCRAPE_PEAK_RSS = _metrics.gauge(
+    'paris_scrape_peak_rss_megabytes', "Pic de RSS de Chrome + chromedriver du dernier scraping", ('bookmaker',))
+CACHE_LOOKUPS = _metrics.counter(
+    'paris_cache_lookups_total', "Lectures de la vue en cache d'un bookmaker (hit, stale, miss)",
+    ('bookmaker', 'result'))
+API_SECONDS = _metrics.histogram(
+    'paris_api_request_seconds', "Latence des requêtes HTTP (jusqu'à l'envoi des en-têtes)",
+    ('endpoint', 'method', 'status'))
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def observe_request(response):
+    started = g.get('request_started')
+    if started is not None:
+        # Route (et non URL) en label : nombre de séries borné
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        API_SECONDS.observe(time.perf_counter() - started,
+                            endpoint=endpoint, method=request.method, status=str(response.status_code))
+    return response
+
+# Pool de drivers Chrome chauds (un par bookmaker scrapé en parallèle)
+DRIVER_POOL_SIZE = int(os.environ.get('DRIVER_POOL_SIZE', 2))
+
+# Scrapers dans des process workers supervisés (durée et mémoire max, arbre de process tué si dépassement)
+SCRAPER_ISOLATION = os.environ.get('SCRAPER_ISOLATION', '1') == '1'
+SCRAPE_DEADLINE = int(os.environ.get('SCRAPE_DEADLINE', 240))        # secondes
+WORKER_MAX_RSS_MB = int(os.environ.get('WORKER_MAX_RSS_MB', 900))   # worker + chromedriver + Chrome
+_workers = {}
+_workers_lock = threading.Lock()
+
+# Chargement des pages sport en parallèle dans des onglets d'un même navigateur
+MULTI_TAB = os.environ.get('MULTI_TAB', '1') == '1'
+
+# Régulateur : navigateurs et onglets simultanés selon la mémoire libre, les CPU et la charge
+# (MAX_BROWSERS : plafond, par défaut celui du profil navigateur ou le nombre de CPU)
+MAX_BROWSERS = int(os.environ.get('MAX_BROWSERS', 0)) or get_browser_profile().max_browsers
+GOVERNOR_RESERVE_MB = int(os.environ.get('GOVERNOR_RESERVE_MB', 300))  # Mémoire laissée au système
+_governor = ConcurrencyGovernor(max_slots=MAX_BROWSERS, reserve_mb=GOVERNOR_RESERVE_MB)
+# Navigateur gardé au chaud dans chaque worker entre deux scrapings : pas avec un seul
+# navigateur autorisé (profil 'pi'), ni quand le régulateur manque de mémoire
+WORKER_WARM_BROWSER = DRIVER_POOL_SIZE > 0 and MAX_BROWSERS != 1
+
+# Cache serveur - 30 minutes (vue agrégée par bookmaker)
 _cache = {}
 CACHE_DURATION = 1800  # 30 minutes
 
+# Cache par (bookmaker, sport) : chaque sport a sa propre durée de vie
+# Les cotes du foot bougent beaucoup plus que celles du hockey
+SPORT_TTLS = {
+    'Football': 600,
+    'Basketball': 900,
+    'Tennis': 900,
+    'Rugby': 1800,
+    'Hockey': 1800,
+}
+_sport_cache = {}  # (bookmaker, sport) -> {'matches', 'timestamp', 'scraped_at', 'cost', 'refreshes', 'empty_streak'}
+# Sport sans match : nouvel essai après FAILED_SPORT_RETRY secondes si le scraping a échoué ;
+# sinon (hors saison, page vide) délai doublé à chaque résultat vide, jusqu'au TTL du sport
+FAILED_SPORT_RETRY = 60
+
+# Stale-while-revalidate : données expirées servies immédiatement pendant le rafraîchissement,
+# sauf au-delà de cette durée après expiration (on bloque alors sur un scraping)
+MAX_STALENESS = int(os.environ.get('MAX_STALENESS', 7200))  # 2 heures
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+# Rafraîchissement planifié : chaque bookmaker est re-scrapé avant l'expiration de ses sports
+REFRESH_LEAD = int(os.environ.get('REFRESH_LEAD', 60))             # Avance sur l'expiration (s)
+REFRESH_JITTER = int(os.environ.get('REFRESH_JITTER', 30))         # Gigue aléatoire (s)
+REFRESH_CONCURRENCY = int(os.environ.get('REFRESH_CONCURRENCY', 2))  # Le régulateur limite ensuite les navigateurs
+_scheduler = RefreshScheduler(lead=REFRESH_LEAD, jitter=REFRESH_JITTER, max_concurrent=REFRESH_CONCURRENCY)
+
+# Cache persistant (SQLite) : un redémarrage repart du dernier état connu ('' pour désactiver)
+CACHE_DB = os.environ.get('CACHE_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'cache.db'))
+_cache_store = None
+
+# Historique des cotes (évolution par match), sous-échantillonné au-delà de 6 h
+HISTORY_FILE = os.environ.get('HISTORY_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'odds_history.bin'))
+HISTORY_COMPACT_INTERVAL = 3600
+HISTORY_SAVE_INTERVAL = int(os.environ.get('HISTORY_SAVE_INTERVAL', 600))  # Écriture disque au plus toutes les 10 min
+_history = OddsHistory()
+_history_compacted_at = time.time()
+_history_saved_at = time.time()
+
+# Flux d'événements (SSE) : statuts et matchs poussés au navigateur dès qu'une page est traitée
+_events = EventBroker()
+STREAM_HEARTBEAT = 15  # Commentaire SSE envoyé si rien ne se passe (garde la connexion ouverte)
+
+SCRAPERS = {'pmu': PMUScraper, 'winamax': WinamaxScraper}
+
 # Status du pré-chargement
 _preload_status = {'pmu': 'pending', 'winamax': 'pending'}
 _locks = {
@@ -31,119 +146,429 @@ _locks = {
     'winamax': threading.Lock()
 }
 
+# Derniers matchs scrapés par bookmaker (index par ID, sport, compétition)
+_match_stores = {'pmu': MatchStore(), 'winamax': MatchStore()}
+# Classement complet (tous les matchs, pas seulement le top 20) et ses index triés
+_rankings = {'pmu': RankedMatches([]), 'winamax': RankedMatches([])}
+MATCHES_PAGE_MAX = 500
+
+# Vue combinée PMU + Winamax : recalculée à chaque mise à jour des matchs d'un bookmaker
+# (rapprochement coûteux), servie pré-encodée pour la limite par défaut
+COMBINED_DEFAULT_LIMIT = 20
+_combined_view = None  # (vue complète, EncodedBody de la page par défaut)
+_combined_lock = threading.Lock()
+
+def set_preload_status(bookmaker, value):
+    """Met à jour le statut d'un bookmaker et le pousse aux clients connectés"""
+    _preload_status[bookmaker] = value
+    if _events.subscribers:
+        _events.publish('status', {'bookmaker': bookmaker, 'preload': value,
+                                   'cache': cache_summary(bookmaker, time.time())})
+
+
 def get_cached_data(key):
     if key in _cache:
         cached = _cache[key]
-        if time.time() - cached['timestamp'] < CACHE_DURATION:
+        if time.time() < cached['expires_at']:
             return cached['data']
     return None
 
 
-def set_cache_data(key, data):
-    _cache[key] = {'data': data, 'timestamp': time.time()}
+def set_cache_data(key, data, expires_at=None):
+    now = time.time()
+    _cache[key] = {'data': data, 'timestamp': now, 'expires_at': expires_at or now + CACHE_DURATION,
+                   'encoded': encode_view(data)}
+    if _cache_store is not None:
+        _cache_store.put(f"view:{key}", data, now, _cache[key]['expires_at'])
+
+
+def persist_sport(bookmaker, sport):
+    """Écrit le cache d'un sport sur disque"""
+    entry = _sport_cache.get((bookmaker, sport))
+    if _cache_store is None or entry is None:
+        return
+    data = {
+        'matches': [asdict(m) for m in entry['matches']],
+        'scraped_at': entry['scraped_at'],
+        'cost': entry['cost'],
+        'refreshes': entry['refreshes'],
+        'empty_streak': entry['empty_streak'],
+    }
+    _cache_store.put(f"sport:{bookmaker}:{sport}", data, entry['timestamp'],
+                     entry['timestamp'] + sport_ttl(sport))
+
+
+def load_persistent_cache():
+    """Ouvre le cache disque et recharge le dernier état (vues, sports, index de matchs)"""
+    global _cache_store
+    _cache_store = open_cache_store(CACHE_DB)
+    if _cache_store is None:
+        return
+    
+    started = time.time()
+    for key, entry in _cache_store.load_all('sport:').items():
+        _, bookmaker, sport = key.split(':', 2)
+        if bookmaker not in SCRAPERS:
+            continue
+        _sport_cache[(bookmaker, sport)] = {
+            'matches': [Match(**m) for m in entry['data']['matches']],
+            'timestamp': entry['timestamp'],
+            'scraped_at': entry['data'].get('scraped_at', entry['timestamp']),
+            'cost': entry['data'].get('cost', 0),
+            'refreshes': entry['data'].get('refreshes', 0),
+            'empty_streak': entry['data'].get('empty_streak', 0),
+        }
+    for key, entry in _cache_store.load_all('view:').items():
+        _cache[key[len('view:'):]] = entry
+    
+    for (bookmaker, sport), entry in _sport_cache.items():
+        _match_stores[bookmaker].upsert_many(entry['matches'])
+    for bm in SCRAPERS:
+        _rankings[bm] = RankedMatches(format_match_rows(_match_stores[bm].to_list()))
+    update_combined_view()
+    for bm in SCRAPERS:
+        if f"{bm}_all" in _cache:
+            set_preload_status(bm, 'ready')
+    
+    print(f"💾 {len(_cache)} vues et {len(_sport_cache)} sports rechargés depuis le disque "
+          f"({(time.time() - started) * 1000:.0f} ms)")
+
+
+def bookmaker_sports(bookmaker):
+    """Noms des sports scrapés pour un bookmaker"""
+    scraper_class = SCRAPERS[bookmaker]
+    return list({**scraper_class.SPORTS_1X2, **scraper_class.SPORTS_1_2})
+
+
+def sport_ttl(sport):
+    return SPORT_TTLS.get(sport, CACHE_DURATION)
+
 
+def sport_expires_at(bookmaker, sport):
+    """Date d'expiration d'un sport en cache (0 si jamais scrapé)"""
+    entry = _sport_cache.get((bookmaker, sport))
+    return entry['timestamp'] + sport_ttl(sport) if entry else 0
 
-def scrape_bookmaker(bookmaker):
-    """Scrape un bookmaker et retourne les données formatées"""
-    global _preload_status
+
+def stale_sports(bookmaker, ahead=0):
+    """Sports dont le cache a expiré (ou jamais scrapés), ou expire dans moins de `ahead` secondes"""
+    limit = time.time() + ahead
+    return [sport for sport in bookmaker_sports(bookmaker) if sport_expires_at(bookmaker, sport) <= limit]
+
+
+def get_worker(bookmaker):
+    """Worker isolé d'un bookmaker (son process est lancé au premier scraping)"""
+    with _workers_lock:
+        if not _workers:
+            atexit.register(stop_workers)
+        if bookmaker not in _workers:
+            _workers[bookmaker] = ScraperWorker(
+                bookmaker, SCRAPERS[bookmaker],
+                scraper_kwargs={'headless': True, 'fast_mode': True, 'multi_tab': MULTI_TAB},
+                deadline=SCRAPE_DEADLINE, max_rss_mb=WORKER_MAX_RSS_MB,
+                pool_size=1 if WORKER_WARM_BROWSER else 0,
+            )
+        return _workers[bookmaker]
+
+
+def stop_workers():
+    """Arrête les workers (et leurs navigateurs) à la sortie de l'application"""
+    for worker in list(_workers.values()):
+        worker.stop()
+
+
+def refresh_sports(bookmaker, sports, priority=PRIORITY_USER):
+    """Re-scrape uniquement les sports donnés et met à jour leur cache
+    
+    Le scraping attend son tour dans le régulateur (par priorité, selon les ressources libres).
+    """
+    def on_page(sport, matches):
+        # Résultats partiels : affichés par le navigateur sans attendre les autres sports
+        if _events.subscribers:
+            matches_3p, matches_2p = format_matches(matches)
+            _events.publish('sport', {
+                'bookmaker': bookmaker, 'sport': sport,
+                'matches_3p': matches_3p[:20], 'matches_2p': matches_2p[:20],
+                'count_3p': len(matches_3p), 'count_2p': len(matches_2p),
+            })
+    
+    with _governor.slot(bookmaker, priority):
+        max_tabs = _governor.tabs_for(bookmaker) if MULTI_TAB else None
+        if SCRAPER_ISOLATION:
+            result = get_worker(bookmaker).scrape(sports=sports, on_page=on_page, options={'max_tabs': max_tabs},
+                                                  keep_browser=not _governor.under_pressure())
+        else:
+            scraper = SCRAPERS[bookmaker](headless=True, fast_mode=True, multi_tab=MULTI_TAB, max_tabs=max_tabs)
+            result = scraper.scrape(sports=sports, on_page=on_page)
+    _governor.record(bookmaker, result.peak_rss_mb, tabs=min(max_tabs or 1, len(sports)))
+    observe_scrape(bookmaker, result)
+    record_history(result.matches)
+    
+    by_sport = {sport: [] for sport in sports}
+    for m in result.matches:
+        by_sport.setdefault(m.sport, []).append(m)
+    
+    now = time.time()
+    for sport, matches in by_sport.items():
+        previous = _sport_cache.get((bookmaker, sport))
+        cost = result.page_stats.get(sport, {}).get('seconds', 0)
+        if matches:
+            _sport_cache[(bookmaker, sport)] = {
+                'matches': matches,
+                'timestamp': now,
+                'scraped_at': now,
+                'cost': cost,
+                'refreshes': (previous['refreshes'] + 1) if previous else 1,
+                'empty_streak': 0,
+            }
+            persist_sport(bookmaker, sport)
+            continue
+        
+        # Aucun match : nouvel essai rapide si le scraping a échoué, de plus en plus espacé
+        # si la page est simplement vide (l'expiration est avancée via le timestamp)
+        empty_streak = previous['empty_streak'] if previous else 0
+        if result.status == 'error':
+            delay = FAILED_SPORT_RETRY
+        else:
+            empty_streak += 1
+            delay = min(sport_ttl(sport), FAILED_SPORT_RETRY * 2 ** (empty_streak - 1))
+        kept = live_matches(previous, now) if previous else []
+        print(f"  ⚠️ {bookmaker}/{sport}: aucun match ({len(kept)} anciens conservés), "
+              f"nouvel essai dans {delay:.0f}s")
+        _sport_cache[(bookmaker, sport)] = {
+            'matches': kept,
+            'timestamp': now - sport_ttl(sport) + delay,
+            'scraped_at': previous['scraped_at'] if previous else now,
+            'cost': cost,
+            'refreshes': previous['refreshes'] if previous else 0,
+            'empty_streak': empty_streak,
+        }
+        # Démarrage à froid : rien d'écrit sur disque, un redémarrage re-scrape aussitôt
+        if previous:
+            persist_sport(bookmaker, sport)
+    return result
+
+
+def live_matches(entry, now):
+    """Anciennes cotes d'un sport encore servables : pas plus vieilles que MAX_STALENESS,
+    matchs pas encore commencés"""
+    if now - entry['scraped_at'] > MAX_STALENESS:
+        return []
+    current = datetime.fromtimestamp(now)
+    return [m for m in entry['matches'] if (m.kickoff(current) or current) >= current]
+
+
+def observe_scrape(bookmaker, result):
+    """Verse les durées par étape d'un ScraperResult dans les métriques"""
+    SCRAPE_SECONDS.observe(result.duration_seconds, bookmaker=bookmaker, status=result.status)
+    if result.peak_rss_mb:
+        SCRAPE_PEAK_RSS.set(result.peak_rss_mb, bookmaker=bookmaker)
+    for sport, phases in result.phase_seconds.items():
+        for phase, seconds in phases.items():
+            SCRAPE_PHASE_SECONDS.observe(seconds, bookmaker=bookmaker, sport=sport or 'all', phase=phase)
+
+
+def record_history(matches):
+    """Ajoute les cotes scrapées à l'historique (compactage et sauvegarde périodiques)"""
+    global _history_compacted_at
+    _history.record(matches)
+    now = time.time()
+    if now - _history_compacted_at > HISTORY_COMPACT_INTERVAL:
+        _history_compacted_at = now
+        _history.compact()
+        save_history()
+    elif now - _history_saved_at > HISTORY_SAVE_INTERVAL:
+        save_history()
+
+
+def save_history():
+    """Écrit l'historique sur disque (après compactage, périodiquement et à l'arrêt)"""
+    global _history_saved_at
+    _history_saved_at = time.time()
+    if HISTORY_FILE:
+        try:
+            _history.save(HISTORY_FILE)
+        except OSError as e:
+            print(f"⚠️ Sauvegarde de l'historique impossible: {e}")
+
+
+def format_match_rows(matches):
+    """Matchs au format de l'API (conversions calculées en un seul passage)"""
+    batch = calculate_batch(matches_matrix(matches))
+    rows = []
+    for i, m in enumerate(matches):
+        match_data = {
+            'id': m.id,
+            'home_team': m.home_team,
+            'away_team': m.away_team,
+            'competition': m.competition,
+            'sport': m.sport,
+            'odds_home': m.odds_home,
+            'odds_draw': m.odds_draw,
+            'odds_away': m.odds_away,
+            'profit_garanti': round(float(batch.guaranteed_profit[i]), 0),
+            'conversion_rate': round(float(batch.conversion_rate[i]), 1),
+            'assignment': batch.assignment(i, (m.home_team, 'Match Nul', m.away_team)),
+            'players': int(batch.outcomes[i]),
+        }
+        rows.append(match_data)
+    return rows
+
+
+def format_matches(matches):
+    """Matchs au format de l'API, séparés 3 / 2 joueurs et triés par taux de conversion"""
+    ranking = RankedMatches(format_match_rows(matches))
+    return ranking.ranked(3), ranking.ranked(2)
+
+
+def scrape_bookmaker(bookmaker, ahead=0, priority=PRIORITY_USER):
+    """Scrape un bookmaker (seulement les sports expirés) et retourne les données formatées
     
+    Args:
+        ahead: Rafraîchit aussi les sports expirant dans moins de `ahead` secondes (planificateur)
+        priority: Priorité dans la file du régulateur (governor.PRIORITY_*)
+    """
     # Vérifier si déjà en cours (bloquer jusqu'à la fin)
     with _locks[bookmaker]:
         # Vérifier le cache une 2ème fois au cas où il aurait été rempli pendant l'attente
         cached = get_cached_data(f"{bookmaker}_all")
-        if cached:
+        if cached and not (ahead and stale_sports(bookmaker, ahead)):
             return cached
             
-        _preload_status[bookmaker] = 'loading'
+        set_preload_status(bookmaker, 'loading')
         
         try:
-            if bookmaker == 'pmu':
-                scraper = PMUScraper(headless=True, fast_mode=True)
+            stale = stale_sports(bookmaker, ahead)
+            if stale:
+                result = refresh_sports(bookmaker, stale, priority)
             else:
-                scraper = WinamaxScraper(headless=True, fast_mode=True)
-            
-            result = scraper.scrape()
-            
-            # Séparer les matchs
-            matches_3p = []
-            matches_2p = []
-            sports_2p = ['basketball', 'tennis', 'basket', 'volley', 'mma', 'boxe']
+                result = ScraperResult(bookmaker=SCRAPERS[bookmaker].BOOKMAKER_NAME)
             
-            for m in result.matches:
-                sport_lower = (m.sport or m.competition or '').lower()
-                is_2p = any(s in sport_lower for s in sports_2p) or m.odds_draw < 1.05 or m.odds_draw > 50
-                
-                match_data = {
-                    'id': m.id,
-                    'home_team': m.home_team,
-                    'away_team': m.away_team,
-                    'competition': m.competition,
-                    'sport': m.sport,
-                    'odds_home': m.odds_home,
-                    'odds_draw': m.odds_draw,
-                    'odds_away': m.odds_away,
-                }
-                
-                if is_2p:
-                    min_odds = min(m.odds_home, m.odds_away)
-                    match_data['profit_garanti'] = round((min_odds - 1) * 100, 0)
-                    match_data['conversion_rate'] = round((min_odds - 1) * 100 / 200 * 100, 1)
-                    match_data['assignment'] = [
-                        {'joueur': 'Joueur 1', 'issue': f"1 - {m.home_team}", 'cote': m.odds_home, 'gain': round((m.odds_home - 1) * 100, 2)},
-                        {'joueur': 'Joueur 2', 'issue': f"2 - {m.away_team}", 'cote': m.odds_away, 'gain': round((m.odds_away - 1) * 100, 2)},
-                    ]
-                    match_data['assignment'].sort(key=lambda x: x['cote'], reverse=True)
-                    matches_2p.append(match_data)
-                else:
-                    min_odds = min(m.odds_home, m.odds_draw, m.odds_away)
-                    match_data['profit_garanti'] = round((min_odds - 1) * 100, 0)
-                    match_data['conversion_rate'] = round((min_odds - 1) * 100 / 300 * 100, 1)
-                    match_data['assignment'] = m.get_assignment()
-                    matches_3p.append(match_data)
+            # Vue bookmaker : fusion des caches par sport
+            store = MatchStore()
+            for sport in bookmaker_sports(bookmaker):
+                entry = _sport_cache.get((bookmaker, sport))
+                if entry:
+                    store.upsert_many(entry['matches'])
+            _match_stores[bookmaker] = store
             
-            # Trier par taux de conversion pour les 3 joueurs aussi (comme demandé)
-            matches_3p.sort(key=lambda x: x['conversion_rate'], reverse=True)
-            # Trier par taux de conversion pour les 2 joueurs
-            matches_2p.sort(key=lambda x: x['conversion_rate'], reverse=True)
+            # Classement complet trié une seule fois ; la vue n'en garde que le début
+            ranking = RankedMatches(format_match_rows(store.to_list()))
+            _rankings[bookmaker] = ranking
+            update_combined_view()
             
             response_data = {
                 'bookmaker': result.bookmaker,
                 'status': result.status,
                 'duration': round(result.duration_seconds, 1),
+                'page_stats': result.page_stats,
+                'peak_rss_mb': round(result.peak_rss_mb, 1),
+                'refreshed_sports': stale,
                 'from_cache': False,
-                'matches_3p': matches_3p[:20],
-                'matches_2p': matches_2p[:20],
-                'count_3p': len(matches_3p),
-                'count_2p': len(matches_2p),
+                'matches_3p': ranking.top(3, 20),
+                'matches_2p': ranking.top(2, 20),
+                'count_3p': ranking.count(3),
+                'count_2p': ranking.count(2),
             }
             
-            set_cache_data(f"{bookmaker}_all", response_data)
-            _preload_status[bookmaker] = 'ready'
+            # La vue expire dès que le premier sport expire
+            expires_at = min(sport_expires_at(bookmaker, sport) for sport in bookmaker_sports(bookmaker))
+            set_cache_data(f"{bookmaker}_all", response_data, expires_at=expires_at)
+            if _events.subscribers:
+                _events.publish('bookmaker', dict(response_data, key=bookmaker, from_cache=True))
+            set_preload_status(bookmaker, 'ready')
             return response_data
             
         except Exception as e:
-            _preload_status[bookmaker] = 'error'
+            set_preload_status(bookmaker, 'error')
             print(f"❌ Erreur scraping {bookmaker}: {e}")
             return None
 
 
-def preload_all():
-    """Pré-charge les données des deux bookmakers en parallèle"""
-    print("🚀 Pré-chargement des données en cours...")
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        futures = {
-            executor.submit(scrape_bookmaker, 'pmu'): 'pmu',
-            executor.submit(scrape_bookmaker, 'winamax'): 'winamax'
-        }
-        for future in as_completed(futures):
-            bm = futures[future]
-            try:
-                result = future.result()
-                if result:
-                    print(f"✅ {bm.upper()} pré-chargé ({result['count_3p']} matchs 3P, {result['count_2p']} matchs 2P)")
-            except Exception as e:
-                print(f"❌ Erreur pré-chargement {bm}: {e}")
-    print("🎉 Pré-chargement terminé !")
+def refresh_in_background(bookmaker):
+    """Lance un rafraîchissement en arrière-plan (un seul à la fois par bookmaker)"""
+    with _refreshing_lock:
+        if bookmaker in _refreshing:
+            return False
+        _refreshing.add(bookmaker)
+    
+    def run():
+        try:
+            scrape_bookmaker(bookmaker, priority=PRIORITY_REFRESH)
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(bookmaker)
+    
+    threading.Thread(target=run, daemon=True).start()
+    return True
+
+
+def cached_view(bookmaker):
+    """Vue en cache d'un bookmaker servable sans scraping bloquant
+    
+    - cache valide : (entrée, 'fresh')
+    - cache expiré depuis moins de MAX_STALENESS : (entrée, 'stale') + rafraîchissement en arrière-plan
+    - sinon (démarrage à froid ou données trop vieilles) : (None, None)
+    """
+    entry = _cache.get(f"{bookmaker}_all")
+    now = time.time()
+    if entry:
+        if now < entry['expires_at']:
+            CACHE_LOOKUPS.inc(bookmaker=bookmaker, result='hit')
+            return entry, 'fresh'
+        if now - entry['expires_at'] < MAX_STALENESS:
+            CACHE_LOOKUPS.inc(bookmaker=bookmaker, result='stale')
+            refresh_in_background(bookmaker)
+            return entry, 'stale'
+    CACHE_LOOKUPS.inc(bookmaker=bookmaker, result='miss')
+    return None, None
+
+
+def get_bookmaker_data(bookmaker):
+    """Données d'un bookmaker, sans attendre de scraping si des données pas trop anciennes existent"""
+    entry, state = cached_view(bookmaker)
+    if entry:
+        age = round(time.time() - entry['timestamp'], 0)
+        # Copie : le dict en cache est partagé entre les requêtes
+        return dict(entry['data'], from_cache=True, stale=state == 'stale', age_seconds=age)
+    
+    data = scrape_bookmaker(bookmaker)
+    return dict(data, stale=False, age_seconds=0) if data else None
+
+
+def encode_view(data):
+    """JSON pré-encodé d'une vue, commun à HIT, STALE et MISS : sans from_cache,
+    l'état du cache n'est donné que par l'en-tête X-Cache"""
+    return EncodedBody.from_data({k: v for k, v in data.items() if k != 'from_cache'})
+
+
+def encoded_view(entry):
+    """JSON pré-encodé d'une vue (créé à la demande pour les vues rechargées du disque)"""
+    if 'encoded' not in entry:
+        entry['encoded'] = encode_view(entry['data'])
+    return entry['encoded']
+
+
+def scheduled_refresh(bookmaker):
+    """Tâche du planificateur : rafraîchit les sports proches de l'expiration
+    
+    Returns:
+        Date de la prochaine expiration (None en cas d'échec, le planificateur recule alors)
+    """
+    result = scrape_bookmaker(bookmaker, ahead=REFRESH_LEAD + REFRESH_JITTER, priority=PRIORITY_BACKGROUND)
+    if not result:
+        return None
+    if result['refreshed_sports']:
+        print(f"🔄 {bookmaker.upper()} rafraîchi : {', '.join(result['refreshed_sports'])} "
+              f"({result['count_3p']} matchs 3P, {result['count_2p']} matchs 2P)")
+    return _cache[f"{bookmaker}_all"]['expires_at']
+
+
+def start_scheduler():
+    """Planifie le rafraîchissement des bookmakers (premier passage immédiat = pré-chargement)"""
+    for bm in SCRAPERS:
+        _scheduler.add_job(bm, lambda bm=bm: scheduled_refresh(bm))
+    _scheduler.start()
 
 
 @app.route('/')
@@ -153,31 +578,35 @@ def index():
 
 @app.route('/api/scrape/<bookmaker>')
 def api_scrape(bookmaker):
-    """Scrape et retourne matchs"""
-    cache_key = f"{bookmaker}_all"
-    cached = get_cached_data(cache_key)
-    if cached:
-        cached['from_cache'] = True
-        return jsonify(cached)
+    """Scrape et retourne matchs (données expirées servies pendant le rafraîchissement)
     
+    Le JSON de la vue est servi pré-encodé (gzip / brotli) avec un ETag ; l'état du cache
+    est dans les en-têtes X-Cache (HIT, STALE, MISS) et Age.
+    """
     if bookmaker not in ['pmu', 'winamax']:
         return jsonify({'error': 'Bookmaker inconnu'}), 400
     
-    result = scrape_bookmaker(bookmaker)
-    if result:
-        return jsonify(result)
+    entry, state = cached_view(bookmaker)
+    cache_status = 'STALE' if state == 'stale' else 'HIT'
+    if entry is None and scrape_bookmaker(bookmaker):
+        entry, cache_status = _cache.get(f"{bookmaker}_all"), 'MISS'
+    if entry:
+        return encoded_response(encoded_view(entry), headers={
+            'X-Cache': cache_status,
+            'Age': str(int(max(0, time.time() - entry['timestamp']))),
+        })
     return jsonify({'error': 'Erreur de scraping', 'matches_3p': [], 'matches_2p': [], 'count_3p': 0, 'count_2p': 0}), 500
 
 
 @app.route('/api/scrape-all')
 def api_scrape_all():
-    """Scrape les deux bookmakers en parallèle"""
+    """Scrape les deux bookmakers (en parallèle si le régulateur le permet)"""
     results = {}
     
-    with ThreadPoolExecutor(max_workers=2) as executor:
+    with ThreadPoolExecutor(max_workers=len(SCRAPERS)) as executor:
         futures = {
-            executor.submit(lambda: get_cached_data('pmu_all') or scrape_bookmaker('pmu')): 'pmu',
-            executor.submit(lambda: get_cached_data('winamax_all') or scrape_bookmaker('winamax')): 'winamax'
+            executor.submit(get_bookmaker_data, 'pmu'): 'pmu',
+            executor.submit(get_bookmaker_data, 'winamax'): 'winamax'
         }
         for future in as_completed(futures):
             bm = futures[future]
@@ -189,26 +618,230 @@ def api_scrape_all():
     return jsonify(results)
 
 
+def update_combined_view():
+    """Recalcule la vue combinée à partir des matchs actuels des deux bookmakers"""
+    global _combined_view
+    with _combined_lock:
+        # Stores lus sous le verrou : le dernier calcul voit les deux dernières mises à jour
+        pmu_matches = _match_stores['pmu'].to_list()
+        winamax_matches = _match_stores['winamax'].to_list()
+        combined = combine_bookmakers(pmu_matches, winamax_matches)
+        view = {
+            'count': len(combined),
+            'count_pmu': len(pmu_matches),
+            'count_winamax': len(winamax_matches),
+            'matches_3p': [m for m in combined if m['players'] == 3],
+            'matches_2p': [m for m in combined if m['players'] == 2],
+        }
+        _combined_view = (view, EncodedBody.from_data(combined_page(view, COMBINED_DEFAULT_LIMIT)))
+    return _combined_view
+
+
+def combined_page(view, limit):
+    """Vue combinée limitée aux `limit` premiers matchs 3 et 2 joueurs"""
+    return dict(view, matches_3p=view['matches_3p'][:limit], matches_2p=view['matches_2p'][:limit])
+
+
+@app.route('/api/combined')
+def api_combined():
+    """Matchs présents sur PMU et Winamax : meilleure cote par issue entre les deux"""
+    limit = request.args.get('limit', default=COMBINED_DEFAULT_LIMIT, type=int)
+    if limit < 1:
+        return jsonify({'error': '"limit" : entier strictement positif'}), 400
+    view, encoded = _combined_view or update_combined_view()
+    if limit == COMBINED_DEFAULT_LIMIT:
+        return encoded_response(encoded)
+    return jsonify(combined_page(view, min(limit, MATCHES_PAGE_MAX)))
+
+
+MAX_CALCULATE_ROWS = 50000
+
+
+def is_amount(value):
+    """Nombre JSON fini et positif (pas un booléen ni une chaîne)"""
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and math.isfinite(value) and value >= 0)
+
+
+@app.route('/api/calculate', methods=['POST'])
+def api_calculate():
+    """Calcul en lot : {"odds": [[1, N, 2] ou [1, 2], ...], "freebet": 100, "stakes": [...], "players": 3}"""
+    payload = request.get_json(silent=True) or {}
+    rows = payload.get('odds')
+    if not isinstance(rows, list) or not rows:
+        return jsonify({'error': 'Liste de cotes attendue dans "odds"'}), 400
+    if len(rows) > MAX_CALCULATE_ROWS:
+        return jsonify({'error': f'Au plus {MAX_CALCULATE_ROWS} lignes par appel'}), 400
+    
+    stakes = payload.get('stakes')
+    players = payload.get('players')
+    freebet = payload.get('freebet', 100)
+    if stakes is not None and (not isinstance(stakes, list) or len(stakes) > MAX_PLAYERS
+                               or not all(is_amount(x) for x in stakes)):
+        return jsonify({'error': f'"stakes" : liste d\'au plus {MAX_PLAYERS} montants finis et positifs'}), 400
+    # bool est une sous-classe d'int : true / false ne sont ni un nombre de joueurs ni un montant
+    if players is not None and (type(players) is not int or players not in (2, 3)):
+        return jsonify({'error': '"players" : 2 ou 3'}), 400
+    if not is_amount(freebet):
+        return jsonify({'error': '"freebet" : montant fini et positif attendu'}), 400
+    
+    try:
+        odds = odds_matrix(rows)
+        check_odds(odds)
+        batch = calculate_batch(odds, freebet=float(freebet),
+                                stakes=[float(x) for x in stakes] if stakes else None,
+                                players=players)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    results = batch.to_dicts()
+    for i, result in enumerate(results):
+        result['index'] = i
+    if payload.get('sort', True):
+        results = [results[i] for i in rank(batch)]
+    return jsonify({'count': len(results), 'results': results})
+
+
+@app.route('/api/matches')
+def api_matches():
+    """Tous les matchs d'un bookmaker, filtrés et paginés par curseur
+    
+    Paramètres : bookmaker, sport, competition, players (2 ou 3), min_conversion, cursor, limit
+    """
+    bookmaker = request.args.get('bookmaker', '')
+    if bookmaker not in _rankings:
+        return jsonify({'error': 'Bookmaker inconnu'}), 400
+    limit = min(max(request.args.get('limit', default=50, type=int), 1), MATCHES_PAGE_MAX)
+    
+    ranking = _rankings[bookmaker]
+    try:
+        matches, next_cursor = ranking.query(
+            sport=request.args.get('sport'),
+            competition=request.args.get('competition'),
+            players=request.args.get('players', type=int),
+            min_conversion=request.args.get('min_conversion', type=float),
+            cursor=request.args.get('cursor'),
+            limit=limit,
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'bookmaker': bookmaker,
+        'total': len(ranking),
+        'count': len(matches),
+        'matches': matches,
+        'next_cursor': next_cursor,
+    })
+
+
+@app.route('/api/history/<match_id>')
+def api_history(match_id):
+    """Évolution des cotes d'un match (paramètres optionnels from / to en timestamp, et sport
+    si l'id existe dans plusieurs sports)"""
+    start = request.args.get('from', type=float)
+    end = request.args.get('to', type=float)
+    try:
+        trajectory = _history.trajectory(match_id, start, end, sport=request.args.get('sport'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if trajectory is None:
+        return jsonify({'error': 'Match inconnu'}), 404
+    return jsonify(trajectory)
+
+
+@app.route('/api/trending')
+def api_trending():
+    """Matchs dont la cote minimale a le plus progressé sur les `hours` dernières heures"""
+    hours = request.args.get('hours', default=6, type=float)
+    limit = request.args.get('limit', default=20, type=int)
+    return jsonify({'hours': hours, 'matches': _history.trending(time.time() - hours * 3600, limit)})
+
+
+def cache_summary(bm, current_time):
+    """État du cache d'un bookmaker (vue agrégée et détail par sport)"""
+    key = f"{bm}_all"
+    if key in _cache:
+        cached = _cache[key]
+        age = current_time - cached['timestamp']
+        summary = {
+            'has_data': True,
+            'count_3p': cached['data'].get('count_3p', 0),
+            'count_2p': cached['data'].get('count_2p', 0),
+            'age_seconds': round(age, 0),
+            'expires_in': max(0, round(cached['expires_at'] - current_time, 0)),
+            'stale': current_time >= cached['expires_at'],
+            'sports': _match_stores[bm].count_by_sport(),
+        }
+    else:
+        summary = {'has_data': False}
+    
+    summary['per_sport'] = {}
+    for sport in bookmaker_sports(bm):
+        entry = _sport_cache.get((bm, sport))
+        if entry:
+            summary['per_sport'][sport] = {
+                'count': len(entry['matches']),
+                'ttl': sport_ttl(sport),
+                'age_seconds': round(current_time - entry['scraped_at'], 0),
+                'expires_in': max(0, round(sport_expires_at(bm, sport) - current_time, 0)),
+                'last_cost_seconds': entry['cost'],
+                'refreshes': entry['refreshes'],
+                'empty_streak': entry['empty_streak'],
+            }
+    return summary
+
+
+@app.route('/api/stream')
+def api_stream():
+    """Flux SSE : état initial, puis statuts, pages de sport et vues complètes au fil de l'eau"""
+    q = _events.subscribe()
+    
+    def generate():
+        try:
+            now = time.time()
+            yield format_sse('snapshot', {
+                'preload': _preload_status.copy(),
+                'cache': {bm: cache_summary(bm, now) for bm in SCRAPERS},
+            })
+            while True:
+                try:
+                    yield q.get(timeout=STREAM_HEARTBEAT)
+                except queue.Empty:
+                    yield ': ping\n\n'
+        finally:
+            _events.unsubscribe(q)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/metrics')
+def api_metrics():
+    """Métriques au format texte Prometheus (durées par étape, cache, latence de l'API)"""
+    return Response(_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @app.route('/api/status')
 def api_status():
     """Retourne le statut du cache et du pré-chargement"""
     current_time = time.time()
     status = {'preload': _preload_status.copy(), 'cache': {}}
+    status['persistent_cache'] = _cache_store.path if _cache_store is not None else None
+    with _refreshing_lock:
+        status['refreshing'] = sorted(_refreshing)
+    pool = get_pool()
+    if pool is not None:
+        status['driver_pool'] = pool.stats()
+    status['scheduler'] = _scheduler.stats()
+    status['history'] = _history.stats()
+    status['stream_clients'] = _events.subscribers
+    status['workers'] = {bm: worker.stats() for bm, worker in _workers.items()}
+    status['browser_profile'] = get_browser_profile().name
+    status['governor'] = _governor.stats()
     
     for bm in ['pmu', 'winamax']:
-        key = f"{bm}_all"
-        if key in _cache:
-            cached = _cache[key]
-            age = current_time - cached['timestamp']
-            status['cache'][bm] = {
-                'has_data': True,
-                'count_3p': cached['data'].get('count_3p', 0),
-                'count_2p': cached['data'].get('count_2p', 0),
-                'age_seconds': round(age, 0),
-                'expires_in': max(0, round(CACHE_DURATION - age, 0))
-            }
-        else:
-            status['cache'][bm] = {'has_data': False}
+        status['cache'][bm] = cache_summary(bm, current_time)
     
     return jsonify(status)
 
@@ -217,16 +850,36 @@ def api_status():
 def api_clear_cache():
     global _cache
     _cache = {}
+    _sport_cache.clear()
+    # Index et classements dérivés du cache : sinon /api/matches et /api/combined servent encore l'ancien état
+    for bm in SCRAPERS:
+        _match_stores[bm] = MatchStore()
+        _rankings[bm] = RankedMatches([])
+    update_combined_view()
+    if _cache_store is not None:
+        _cache_store.clear()
+    for bm in SCRAPERS:
+        _scheduler.run_soon(bm)
     return jsonify({'status': 'ok'})
 
 
-# Pré-chargement au démarrage (dans un thread séparé)
+# Pré-chargement puis rafraîchissement continu (dans un thread séparé)
 def start_preload():
     time.sleep(2)  # Attendre que le serveur soit prêt
-    preload_all()
+    if DRIVER_POOL_SIZE > 0 and not SCRAPER_ISOLATION:
+        print(f"🔥 Démarrage de {DRIVER_POOL_SIZE} navigateurs chauds...")
+        init_pool(size=DRIVER_POOL_SIZE, headless=True)
+    print("🚀 Pré-chargement et rafraîchissement planifié des données...")
+    start_scheduler()
 
 
 if __name__ == '__main__':
+    # Dernier état connu servi immédiatement (rafraîchi ensuite par le planificateur)
+    load_persistent_cache()
+    if HISTORY_FILE and _history.load(HISTORY_FILE):
+        print(f"📈 Historique des cotes rechargé ({len(_history)} observations)")
+    atexit.register(save_history)
+    
     # Lancer le pré-chargement en background
     preload_thread = threading.Thread(target=start_preload, daemon=True)
     preload_thread.start()
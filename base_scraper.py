@@ -0,0 +1,314 @@
+"""
+Socle commun des scrapers de bookmakers (Selenium + HTTP)
+
+BaseScraper porte tout ce qui ne dépend pas du site : choix du backend (HTTP
+puis repli Selenium), driver emprunté au pool, onglets parallèles, blocage
+des ressources, scroll adaptatif, mesures (phases, poids des pages, pic de
+mémoire) et dédoublonnage des matchs. Chaque bookmaker ne fournit que ses
+URLs, son bandeau de cookies et ses parseurs :
+
+- _accept_cookies() : consentement sur la page courante
+- _parse_http_page(name, path, url, html) : matchs d'une page récupérée en HTTP
+- _extract_page(name, path, loaded_at) : matchs de la page (ou de l'onglet) Selenium courante
+"""
+from typing import Callable, Dict, List, Optional
+from itertools import chain
+import time
+
+from models import Match, MatchStore, ScraperResult
+from fetchers import HttpBackend, fetch_all, get_http_backend
+from metrics import phase_timer
+from browser import (create_driver, get_pool, quit_driver, open_tabs, close_tabs,
+                     inject_cookies, driver_rss_mb, DEFAULT_BLOCKED, block_resources, page_weight)
+from readiness import ReadinessConfig, ScrollBudget, adaptive_scroll
+
+
+class BaseScraper:
+    """Scraper générique : les sous-classes définissent les URLs et le parsing"""
+
+    BOOKMAKER_NAME = ""
+    BASE_URL = ""
+
+    # Sports 1X2 (3 issues) et 1-2 (2 issues) : {nom: chemin}
+    SPORTS_1X2: Dict[str, str] = {}
+    SPORTS_1_2: Dict[str, str] = {}
+
+    # Nom de l'état navigateur persistant (cookies de consentement)
+    STATE_NAME = ""
+
+    def __init__(self, headless: bool = True, fast_mode: bool = True, multi_tab: bool = False,
+                 readiness: Optional[ReadinessConfig] = None, profile_dir: Optional[str] = None,
+                 backend: str = 'auto', http_backend: Optional[HttpBackend] = None,
+                 blocked_resources: Optional[tuple] = DEFAULT_BLOCKED,
+                 scroll_budget: Optional[ScrollBudget] = None, scroll_budgets: Optional[dict] = None,
+                 max_tabs: Optional[int] = None):
+        """
+        Args:
+            headless: True pour exécuter sans interface graphique
+            fast_mode: True pour scraper seulement les pages principales
+            multi_tab: True pour charger toutes les pages sport en parallèle (un onglet chacune)
+            readiness: Délais d'attente du rendu des pages (défauts de ReadinessConfig)
+            profile_dir: Profil Chrome persistant (driver hors pool uniquement)
+            backend: 'auto' (HTTP puis repli Selenium), 'http' ou 'selenium'
+            http_backend: Backend HTTP (par défaut la session partagée de fetchers)
+            blocked_resources: Catégories de browser.BLOCKLIST bloquées (None pour tout charger)
+            scroll_budget: Limites du scroll adaptatif (défauts de ScrollBudget)
+            scroll_budgets: Limites spécifiques par sport, ex: {"Tennis": ScrollBudget(max_scrolls=3)}
+            max_tabs: Onglets ouverts à la fois en mode multi_tab (None : un par sport)
+        """
+        self.headless = headless
+        self.fast_mode = fast_mode
+        self.multi_tab = multi_tab
+        self.max_tabs = max_tabs
+        self.readiness = readiness or ReadinessConfig()
+        self.profile_dir = profile_dir
+        self.backend = backend
+        self.http_backend = http_backend
+        self.blocked_resources = tuple(blocked_resources or ())
+        self.scroll_budget = scroll_budget or ScrollBudget()
+        self.scroll_budgets = scroll_budgets or {}
+        self.page_stats = {}
+        self.peak_rss_mb = 0.0
+        self.phases = {}  # {sport ('' : étapes communes): {étape: secondes}}
+        self.driver = None
+        self.cookies_accepted = False
+        self._from_pool = False
+        self._pages_loaded = 0
+
+    # ------------------------------------------------------------------
+    # Spécifique au bookmaker
+    # ------------------------------------------------------------------
+
+    def _accept_cookies(self):
+        """Accepte le bandeau de cookies de la page courante (sonde unique, non bloquante)"""
+        raise NotImplementedError
+
+    def _parse_http_page(self, name: str, path: str, url: str, html: str) -> Optional[List[Match]]:
+        """Matchs d'une page récupérée en HTTP (None si elle ne se lit pas sans navigateur)"""
+        raise NotImplementedError
+
+    def _extract_page(self, name: str, path: str, loaded_at: float) -> List[Match]:
+        """Extrait les matchs de la page (ou de l'onglet) Selenium courante"""
+        raise NotImplementedError
+
+    # ------------------------------------------------------------------
+    # Navigateur
+    # ------------------------------------------------------------------
+
+    def _create_driver(self):
+        """Crée un driver Chrome avec options anti-détection"""
+        return create_driver(self.headless, profile_dir=self.profile_dir)
+
+    def _start_driver(self):
+        """Démarre le driver si nécessaire (emprunté au pool s'il existe)"""
+        if self.driver is None:
+            pool = get_pool()
+            with self._phase('', 'driver_start'):
+                if pool is not None and pool.headless == self.headless and not self.profile_dir:
+                    self.driver = pool.acquire()
+                    self._from_pool = True
+                else:
+                    self.driver = self._create_driver()
+                    self._from_pool = False
+            self._pages_loaded = 0
+            # Consentement déjà donné lors d'un run précédent : cookies injectés avant la 1ère page
+            inject_cookies(self.driver, self.STATE_NAME)
+            self._block_resources(self.driver)
+
+    def _block_resources(self, driver):
+        """Bloque images, polices, médias, trackers... de l'onglet courant"""
+        if self.blocked_resources:
+            block_resources(driver, self.blocked_resources)
+
+    def _adaptive_scroll(self, name: str, count_script: str):
+        """Scrolle selon le budget du sport et rapporte les matchs ajoutés par scroll"""
+        budget = self.scroll_budgets.get(name, self.scroll_budget)
+        added = adaptive_scroll(self.driver, count_script, budget, self.readiness)
+        # Une cote par issue
+        matches_added = [round(n / self._outcomes(name)) for n in added]
+        self.page_stats.setdefault(name, {})['scroll_added'] = matches_added
+        print(f"    🖱️ {name}: {len(added)} scrolls, matchs ajoutés {matches_added}")
+
+    def _outcomes(self, name: str) -> int:
+        """Issues par match du sport : 3 en 1X2, 2 en 1-2"""
+        return 3 if name in self.SPORTS_1X2 else 2
+
+    def _record_page_weight(self, name: str):
+        """Mesure le poids de la page courante (requêtes, octets) pour suivre les gains du blocage"""
+        weight = page_weight(self.driver)
+        self.page_stats.setdefault(name, {}).update(weight)
+        print(f"    📦 {name}: {weight['requests']} requêtes, {weight['bytes'] / 1024:.0f} Ko")
+
+    def _phase(self, sport: str, phase: str):
+        """Chronomètre une étape du scraping (durées renvoyées dans ScraperResult.phase_seconds)"""
+        return phase_timer(self.phases, sport, phase)
+
+    def _sample_rss(self):
+        """Relève la mémoire de Chrome + chromedriver et garde le pic du scraping"""
+        if self.driver is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb, driver_rss_mb(self.driver))
+
+    def _stop_driver(self):
+        """Arrête le driver ou le rend au pool"""
+        if self.driver:
+            self._sample_rss()
+            pool = get_pool()
+            with self._phase('', 'driver_stop'):
+                if self._from_pool and pool is not None:
+                    pool.release(self.driver, pages=self._pages_loaded)
+                else:
+                    quit_driver(self.driver)
+            self.driver = None
+
+    # ------------------------------------------------------------------
+    # Scraping
+    # ------------------------------------------------------------------
+
+    def scrape(self, sports: Optional[List[str]] = None,
+               on_page: Optional[Callable[[str, List[Match]], None]] = None) -> ScraperResult:
+        """Lance le scraping et retourne un ScraperResult
+
+        Args:
+            sports: Noms des sports à scraper (par défaut tous)
+            on_page: Appelé avec (sport, nouveaux matchs) dès qu'une page est traitée
+        """
+        start_time = time.time()
+        store = MatchStore()
+        self.page_stats = {}
+        self.peak_rss_mb = 0.0
+        self.phases = {}
+        status = "success"
+        message = ""
+
+        print(f"🔄 Scraping {self.BOOKMAKER_NAME} (mode {'rapide' if self.fast_mode else 'complet'})...")
+
+        try:
+            # Scraper tous les sports 1X2 et 1-2
+            sports_to_scrape = {**self.SPORTS_1X2, **self.SPORTS_1_2}
+            if sports is not None:
+                sports_to_scrape = {name: path for name, path in sports_to_scrape.items() if name in sports}
+            remaining = dict(sports_to_scrape)
+            pages = []
+
+            # Sans navigateur d'abord : Selenium seulement pour les pages où HTTP échoue
+            if self.backend != 'selenium':
+                for sport_name, matches in self._scrape_pages_http(sports_to_scrape):
+                    if matches:
+                        del remaining[sport_name]
+                        pages.append((sport_name, matches))
+                if self.backend == 'http':
+                    remaining = {}
+                elif remaining:
+                    print(f"  ↪️ Repli Selenium pour: {', '.join(remaining)}")
+
+            if remaining:
+                self._start_driver()
+                if self.multi_tab and len(remaining) > 1:
+                    pages = chain(pages, self._scrape_pages_in_tabs(remaining))
+                else:
+                    pages = chain(pages, ((name, self._scrape_page(name, path)) for name, path in remaining.items()))
+
+            page_started = time.time()
+            for sport_name, matches in pages:
+                # Coût de la page (hors pages déjà récupérées en HTTP, comptées dès le début)
+                self.page_stats.setdefault(sport_name, {})['seconds'] = round(time.time() - page_started, 2)
+
+                page_matches = []
+                for match in matches:
+                    match.sport = sport_name
+                    # Éviter les doublons par (sport, ID) : on garde le premier (pari principal)
+                    if match not in store:
+                        store.upsert(match)
+                        page_matches.append(match)
+
+                if page_matches:
+                    print(f"  ✅ {sport_name}: +{len(page_matches)} nouveaux matchs")
+                if on_page is not None:
+                    try:
+                        on_page(sport_name, page_matches)
+                    except Exception as e:
+                        print(f"  ⚠️ on_page {sport_name}: {e}")
+                self._sample_rss()
+                page_started = time.time()
+
+            message = f"{len(store)} matchs récupérés"
+
+        except Exception as e:
+            status = "error"
+            message = str(e)
+            print(f"❌ Erreur: {e}")
+        finally:
+            self._stop_driver()
+
+        duration = time.time() - start_time
+        print(f"\n📊 Total: {len(store)} matchs uniques ({duration:.1f}s)")
+        if self.peak_rss_mb:
+            print(f"🧠 Pic mémoire Chrome: {self.peak_rss_mb:.0f} Mo")
+
+        return ScraperResult(
+            matches=store.to_list(),
+            bookmaker=self.BOOKMAKER_NAME,
+            status=status,
+            message=message,
+            duration_seconds=duration,
+            page_stats=self.page_stats,
+            peak_rss_mb=self.peak_rss_mb,
+            phase_seconds=self.phases
+        )
+
+    def get_all_matches(self) -> List[Match]:
+        """Alias pour compatibilité"""
+        return self.scrape().matches
+
+    def _scrape_page(self, name: str, path: str) -> List[Match]:
+        """Charge une page sport dans le driver puis en extrait les matchs"""
+        try:
+            url = f"{self.BASE_URL}{path}"
+            with self._phase(name, 'navigate'):
+                self.driver.get(url)
+            self._pages_loaded += 1
+        except Exception as e:
+            print(f"    ⚠️ Erreur: {str(e)[:50]}")
+            return []
+
+        return self._extract_page(name, path, time.time())
+
+    def _scrape_pages_http(self, sports: dict):
+        """Récupère les pages en HTTP (parallèle, session keep-alive) et les parse
+        (générateur de (sport, matchs), vide si la page ne se lit pas sans navigateur)"""
+        backend = self.http_backend or get_http_backend()
+        urls = {name: f"{self.BASE_URL}{path}" for name, path in sports.items()}
+        with self._phase('', 'http_fetch'):
+            pages = fetch_all(backend, urls)
+        for name, html in pages.items():
+            matches = None
+            if html:
+                with self._phase(name, 'parse'):
+                    matches = self._parse_http_page(name, sports[name], urls[name], html)
+            if matches is not None:
+                print(f"    → {name}: {len(matches)} matchs trouvés (HTTP)")
+            yield name, matches or []
+
+    def _scrape_pages_in_tabs(self, sports: dict):
+        """Ouvre les pages sport dans des onglets qui chargent en parallèle (par lots de
+        max_tabs), puis les parse une par une (générateur de (sport, matchs))"""
+        main_handle = self.driver.current_window_handle
+        names = list(sports)
+        batch_size = self.max_tabs or len(names)
+        for start in range(0, len(names), batch_size):
+            urls = {name: f"{self.BASE_URL}{sports[name]}" for name in names[start:start + batch_size]}
+            with self._phase('', 'navigate'):
+                tabs = open_tabs(self.driver, urls, prepare=self._block_resources if self.blocked_resources else None)
+            self._pages_loaded += len(tabs)
+
+            try:
+                for name, (handle, opened_at) in tabs.items():
+                    try:
+                        self.driver.switch_to.window(handle)
+                    except Exception as e:
+                        print(f"    ⚠️ Erreur onglet {name}: {str(e)[:50]}")
+                        yield name, []
+                        continue
+                    yield name, self._extract_page(name, sports[name], opened_at)
+            finally:
+                close_tabs(self.driver, [handle for handle, _ in tabs.values()], main_handle)
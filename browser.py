@@ -0,0 +1,591 @@
+"""
+Gestion commune des navigateurs Chrome pour les scrapers
+Création des drivers (anti-détection) et pool de drivers chauds partagé par tout le process
+"""
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional
+import atexit
+import json
+import threading
+import time
+import os
+
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# État navigateur persistant (cookies de consentement, profils Chrome)
+BROWSER_STATE_DIR = os.environ.get(
+    'BROWSER_STATE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.browser_state')
+)
+
+
+@dataclass(frozen=True)
+class BrowserProfile:
+    """Réglages Chrome selon la machine (mémoire disponible)"""
+    name: str
+    window_size: str = "1920,1080"
+    renderer_process_limit: Optional[int] = None  # None : modèle de process par défaut de Chrome
+    js_heap_mb: Optional[int] = None              # Taille max du tas JS (V8) par renderer
+    disable_cache: bool = False                   # Pas de cache disque / média
+    extra_args: tuple = ()
+    max_browsers: Optional[int] = None            # Plafond de navigateurs simultanés (None : selon la machine)
+
+
+BROWSER_PROFILES = {
+    'standard': BrowserProfile(name='standard'),
+    # Raspberry Pi (1-2 Go) : un seul renderer, petit viewport, tas JS plafonné, aucun cache
+    'pi': BrowserProfile(
+        name='pi',
+        window_size="1024,768",
+        renderer_process_limit=1,
+        js_heap_mb=256,
+        disable_cache=True,
+        extra_args=(
+            "--disable-features=site-per-process,Translate,OptimizationHints,MediaRouter",
+            "--process-per-site",
+            "--disable-extensions",
+            "--disable-background-networking",
+            "--disable-component-update",
+            "--disable-default-apps",
+            "--disable-sync",
+            "--no-first-run",
+            "--mute-audio",
+            "--aggressive-cache-discard",
+        ),
+        max_browsers=1,
+    ),
+}
+PI_MODE_MAX_RAM_MB = 2560  # En dessous, le profil 'pi' est choisi automatiquement
+
+
+def total_ram_mb() -> Optional[float]:
+    """Mémoire physique totale (Mo) d'après /proc/meminfo"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemTotal:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+@lru_cache(maxsize=1)
+def get_browser_profile() -> BrowserProfile:
+    """Profil choisi par BROWSER_PROFILE (standard / pi), sinon selon la RAM de la machine"""
+    name = os.environ.get('BROWSER_PROFILE')
+    if name not in BROWSER_PROFILES:
+        ram = total_ram_mb()
+        name = 'pi' if ram is not None and ram <= PI_MODE_MAX_RAM_MB else 'standard'
+    return BROWSER_PROFILES[name]
+
+
+@lru_cache(maxsize=1)
+def get_chromedriver_path() -> str:
+    """Chemin du chromedriver, résolu une seule fois par process"""
+    # Adaptation Raspberry Pi / ARM
+    if os.path.exists("/usr/bin/chromedriver"):
+        return "/usr/bin/chromedriver"
+    return ChromeDriverManager().install()
+
+
+# Ressources bloquées via CDP (Network.setBlockedURLs) : on ne lit que le texte des cotes
+BLOCKLIST = {
+    'images': ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico'],
+    'media': ['*.mp4', '*.webm', '*.m3u8', '*.mp3', '*.ogg'],
+    'fonts': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+    'analytics': [
+        '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+        '*facebook.net*', '*connect.facebook.com*', '*hotjar.com*', '*criteo.*',
+        '*scorecardresearch.com*', '*tiktok.com*', '*snapchat.com*', '*bing.com*',
+        '*adnxs.com*', '*taboola.com*', '*outbrain.com*',
+    ],
+    # Optionnel : sans CSS, innerText perd la mise en page (PMU lit le texte du body)
+    'css': ['*.css'],
+}
+DEFAULT_BLOCKED = ('images', 'media', 'fonts', 'analytics')
+
+# Poids de la page courante d'après Resource Timing (les requêtes bloquées n'y figurent pas)
+PAGE_WEIGHT_JS = """
+const nav = performance.getEntriesByType('navigation')[0];
+const res = performance.getEntriesByType('resource');
+let bytes = nav ? (nav.transferSize || 0) : 0;
+for (const e of res) bytes += e.transferSize || 0;
+return {requests: res.length + (nav ? 1 : 0), bytes: bytes};
+"""
+
+
+def block_resources(driver, categories: Iterable[str] = DEFAULT_BLOCKED,
+                    extra_patterns: Iterable[str] = ()) -> List[str]:
+    """
+    Bloque les ressources inutiles de l'onglet courant via CDP.
+
+    Le blocage s'applique par onglet : à rappeler sur chaque nouvel onglet
+    (voir open_tabs). Retourne la liste des motifs bloqués.
+    """
+    patterns = [p for category in categories for p in BLOCKLIST.get(category, [])]
+    patterns.extend(extra_patterns)
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+    except Exception as e:
+        print(f"⚠️ Blocage des ressources impossible: {str(e)[:50]}")
+    return patterns
+
+
+def page_weight(driver) -> dict:
+    """Nombre de requêtes et octets transférés par la page courante"""
+    try:
+        weight = driver.execute_script(PAGE_WEIGHT_JS) or {}
+        return {'requests': int(weight.get('requests', 0)), 'bytes': int(weight.get('bytes', 0))}
+    except Exception:
+        return {'requests': 0, 'bytes': 0}
+
+
+def create_driver(headless: bool = True, profile_dir: Optional[str] = None,
+                  profile: Optional[BrowserProfile] = None):
+    """Crée un driver Chrome avec options anti-détection
+
+    Args:
+        headless: True pour exécuter sans interface graphique
+        profile_dir: Répertoire de profil Chrome réutilisé d'un lancement à l'autre
+            (cookies et consentement conservés). Un profil ne peut servir qu'à un
+            seul Chrome à la fois.
+        profile: Réglages mémoire (par défaut get_browser_profile())
+    """
+    profile = profile or get_browser_profile()
+    options = Options()
+    if headless:
+        options.add_argument("--headless=new")
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        options.add_argument(f"--user-data-dir={profile_dir}")
+
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument(f"--window-size={profile.window_size}")
+    if profile.renderer_process_limit:
+        options.add_argument(f"--renderer-process-limit={profile.renderer_process_limit}")
+    if profile.js_heap_mb:
+        options.add_argument(f"--js-flags=--max-old-space-size={profile.js_heap_mb}")
+    if profile.disable_cache:
+        options.add_argument("--disk-cache-size=1")
+        options.add_argument("--media-cache-size=1")
+    for arg in profile.extra_args:
+        options.add_argument(arg)
+    # Les onglets en arrière-plan doivent continuer à charger à pleine vitesse (mode multi-onglets)
+    options.add_argument("--disable-background-timer-throttling")
+    options.add_argument("--disable-backgrounding-occluded-windows")
+    options.add_argument("--disable-renderer-backgrounding")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    options.add_argument(f"--user-agent={USER_AGENT}")
+
+    service = Service(get_chromedriver_path())
+
+    # Initialisation du driver
+    driver = webdriver.Chrome(service=service, options=options)
+
+    # Configuration Stealth (Furtivité avancée)
+    try:
+        from selenium_stealth import stealth
+        stealth(driver,
+            languages=["fr-FR", "fr"],
+            vendor="Google Inc.",
+            platform="Win32",
+            webgl_vendor="Intel Inc.",
+            renderer="Intel Iris OpenGL Engine",
+            fix_hairline=True,
+        )
+    except ImportError:
+        print("⚠️ Selenium-stealth non installé, mode standard")
+
+    # Bypass classique supplémentaire
+    # + tampon Resource Timing agrandi pour mesurer le poids complet des pages (250 entrées par défaut)
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+        "source": """
+            Object.defineProperty(navigator, 'webdriver', {
+                get: () => undefined
+            });
+            performance.setResourceTimingBufferSize(5000);
+        """
+    })
+    if profile.disable_cache:
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setCacheDisabled', {'cacheDisabled': True})
+        except Exception:
+            pass
+
+    return driver
+
+
+def quit_driver(driver):
+    """Ferme un driver sans jamais lever d'exception"""
+    try:
+        driver.quit()
+    except:
+        pass
+
+
+def record_page(filename: str, content: str):
+    """Enregistre le contenu d'une page si RECORD_DIR est défini (pages de référence
+    pour les benchmarks de parseurs et le serveur de rejeu)"""
+    record_dir = os.environ.get('RECORD_DIR')
+    if not record_dir:
+        return
+    try:
+        os.makedirs(record_dir, exist_ok=True)
+        with open(os.path.join(record_dir, filename), 'w', encoding='utf-8') as f:
+            f.write(content)
+    except OSError as e:
+        print(f"⚠️ Page non enregistrée: {str(e)[:50]}")
+
+
+def _cookies_path(name: str) -> str:
+    return os.path.join(BROWSER_STATE_DIR, f"{name}_cookies.json")
+
+
+def save_cookies(driver, name: str):
+    """Enregistre les cookies du domaine courant (ex: après acceptation du bandeau)"""
+    try:
+        cookies = driver.get_cookies()
+        os.makedirs(BROWSER_STATE_DIR, exist_ok=True)
+        tmp_path = _cookies_path(name) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cookies, f)
+        os.replace(tmp_path, _cookies_path(name))
+    except Exception as e:
+        print(f"⚠️ Cookies non sauvegardés: {str(e)[:50]}")
+
+
+def inject_cookies(driver, name: str) -> bool:
+    """
+    Injecte les cookies enregistrés via CDP, avant toute navigation.
+
+    Returns:
+        True si des cookies ont été injectés
+    """
+    try:
+        with open(_cookies_path(name), encoding='utf-8') as f:
+            cookies = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    now = time.time()
+    cdp_cookies = []
+    for c in cookies:
+        if c.get('expiry') and c['expiry'] < now:
+            continue
+        cookie = {
+            'name': c['name'],
+            'value': c['value'],
+            'domain': c.get('domain', ''),
+            'path': c.get('path', '/'),
+            'secure': c.get('secure', False),
+            'httpOnly': c.get('httpOnly', False),
+        }
+        if c.get('expiry'):
+            cookie['expires'] = c['expiry']
+        if c.get('sameSite') in ('Strict', 'Lax', 'None'):
+            cookie['sameSite'] = c['sameSite']
+        cdp_cookies.append(cookie)
+
+    if not cdp_cookies:
+        return False
+    try:
+        driver.execute_cdp_cmd('Network.setCookies', {'cookies': cdp_cookies})
+        return True
+    except Exception:
+        return False
+
+
+def open_tabs(driver, urls: Dict[str, str],
+              prepare: Optional[Callable] = None) -> Dict[str, tuple]:
+    """
+    Ouvre chaque URL dans son propre onglet sans attendre la fin du chargement.
+
+    Args:
+        prepare: Appelé sur chaque nouvel onglet vide avant la navigation
+            (ex: block_resources, qui ne s'applique qu'à l'onglet courant)
+
+    Returns:
+        {nom: (handle de l'onglet, timestamp d'ouverture)}, dans l'ordre de `urls`
+    """
+    tabs = {}
+    for name, url in urls.items():
+        before = set(driver.window_handles)
+        if prepare is None:
+            # window.open rend la main immédiatement : les pages chargent en parallèle
+            driver.execute_script("window.open(arguments[0], '_blank');", url)
+            opened_at = time.time()
+            new_handles = [h for h in driver.window_handles if h not in before]
+        else:
+            driver.execute_script("window.open('about:blank', '_blank');")
+            new_handles = [h for h in driver.window_handles if h not in before]
+            if not new_handles:
+                continue
+            driver.switch_to.window(new_handles[0])
+            prepare(driver)
+            # Navigation non bloquante (driver.get attendrait la fin du chargement)
+            driver.execute_script("window.location.href = arguments[0];", url)
+            opened_at = time.time()
+        if new_handles:
+            tabs[name] = (new_handles[0], opened_at)
+    return tabs
+
+
+def close_tabs(driver, handles: List[str], main_handle: str):
+    """Ferme les onglets ouverts par open_tabs et revient à l'onglet principal"""
+    for handle in handles:
+        try:
+            driver.switch_to.window(handle)
+            driver.close()
+        except Exception:
+            pass
+    try:
+        driver.switch_to.window(main_handle)
+    except Exception:
+        pass
+
+
+# ============================================================================
+# Mesure mémoire (lecture directe de /proc, sans dépendance)
+# ============================================================================
+
+def _read_proc_table() -> Dict[int, tuple]:
+    """Retourne {pid: (ppid, rss_kb)} pour tous les process visibles"""
+    table = {}
+    try:
+        pids = [int(p) for p in os.listdir('/proc') if p.isdigit()]
+    except OSError:
+        return table
+
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                stat = f.read()
+            # Le nom du process peut contenir des espaces : on coupe après la dernière ')'
+            ppid = int(stat[stat.rindex(')') + 2:].split()[1])
+            rss_kb = 0
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        rss_kb = int(line.split()[1])
+                        break
+            table[pid] = (ppid, rss_kb)
+        except (OSError, ValueError):
+            continue
+    return table
+
+
+def process_tree_pids(root_pid: int) -> List[int]:
+    """PIDs du process et de tous ses descendants"""
+    table = _read_proc_table()
+    children: Dict[int, List[int]] = {}
+    for pid, (ppid, _) in table.items():
+        children.setdefault(ppid, []).append(pid)
+
+    result = []
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        if pid in table:
+            result.append(pid)
+        stack.extend(children.get(pid, []))
+    return result
+
+
+def process_tree_rss_mb(root_pid: int) -> float:
+    """RSS cumulée (Mo) d'un process et de ses descendants (0 si indisponible)"""
+    table = _read_proc_table()
+    return sum(table[pid][1] for pid in process_tree_pids(root_pid) if pid in table) / 1024
+
+
+def driver_rss_mb(driver) -> float:
+    """RSS cumulée de chromedriver + Chrome pour un driver"""
+    try:
+        return process_tree_rss_mb(driver.service.process.pid)
+    except Exception:
+        return 0.0
+
+
+# ============================================================================
+# Pool de drivers chauds
+# ============================================================================
+
+@dataclass
+class PooledDriver:
+    """Driver géré par le pool avec ses compteurs d'usure"""
+    driver: object
+    created_at: float = field(default_factory=time.time)
+    pages: int = 0
+    leases: int = 0
+
+
+class DriverPool:
+    """
+    Pool de drivers Chrome réutilisables entre les scrapings.
+
+    Les drivers sont créés à l'avance (warm_up), prêtés aux scrapers puis
+    rendus au pool. Un driver est recyclé quand il ne répond plus, qu'il a
+    chargé trop de pages ou qu'il dépasse le plafond mémoire.
+    """
+
+    def __init__(self, size: int = 2, headless: bool = True,
+                 max_pages: int = 50, max_rss_mb: float = 700):
+        """
+        Args:
+            size: Nombre de drivers gardés au chaud
+            headless: Mode headless des drivers créés
+            max_pages: Nombre de pages chargées avant recyclage
+            max_rss_mb: Plafond mémoire (Chrome + chromedriver) avant recyclage
+        """
+        self.size = size
+        self.headless = headless
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._idle: List[PooledDriver] = []
+        self._leased: Dict[int, PooledDriver] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self.created = 0
+        self.recycled = 0
+
+    def _new(self) -> PooledDriver:
+        self.created += 1
+        return PooledDriver(driver=create_driver(self.headless))
+
+    def warm_up(self):
+        """Crée les drivers manquants jusqu'à `size`"""
+        while True:
+            with self._lock:
+                if self._closed or len(self._idle) + len(self._leased) >= self.size:
+                    return
+            pooled = self._new()
+            with self._lock:
+                if self._closed:
+                    quit_driver(pooled.driver)
+                    return
+                self._idle.append(pooled)
+
+    def _is_healthy(self, pooled: PooledDriver) -> bool:
+        if pooled.pages >= self.max_pages:
+            return False
+        try:
+            pooled.driver.execute_script("return 1")
+        except Exception:
+            return False
+        if self.max_rss_mb and driver_rss_mb(pooled.driver) > self.max_rss_mb:
+            return False
+        return True
+
+    def _recycle(self, pooled: PooledDriver):
+        self.recycled += 1
+        quit_driver(pooled.driver)
+
+    def acquire(self):
+        """Prête un driver sain (créé à la volée si le pool est vide)"""
+        while True:
+            with self._lock:
+                pooled = self._idle.pop() if self._idle else None
+            if pooled is None:
+                pooled = self._new()
+                break
+            if self._is_healthy(pooled):
+                break
+            self._recycle(pooled)
+
+        pooled.leases += 1
+        with self._lock:
+            self._leased[id(pooled.driver)] = pooled
+        return pooled.driver
+
+    def release(self, driver, pages: int = 0):
+        """Rend un driver au pool après usage"""
+        with self._lock:
+            pooled = self._leased.pop(id(driver), None)
+        if pooled is None:
+            quit_driver(driver)
+            return
+
+        pooled.pages += pages
+        with self._lock:
+            keep = not self._closed and len(self._idle) < self.size
+        if not keep or not self._is_healthy(pooled):
+            self._recycle(pooled)
+            return
+
+        # Page blanche pour libérer la mémoire de la page précédente
+        try:
+            driver.get("about:blank")
+        except Exception:
+            self._recycle(pooled)
+            return
+        with self._lock:
+            self._idle.append(pooled)
+
+    @contextmanager
+    def lease(self):
+        """Context manager : `with pool.lease() as driver: ...`"""
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close_idle(self) -> int:
+        """Ferme les drivers inactifs (le pool reste utilisable) ; retourne leur nombre"""
+        with self._lock:
+            drivers, self._idle = self._idle, []
+        for pooled in drivers:
+            quit_driver(pooled.driver)
+        return len(drivers)
+
+    def shutdown(self):
+        """Ferme tous les drivers du pool"""
+        with self._lock:
+            self._closed = True
+            drivers = self._idle + list(self._leased.values())
+            self._idle = []
+            self._leased = {}
+        for pooled in drivers:
+            quit_driver(pooled.driver)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'idle': len(self._idle),
+                'leased': len(self._leased),
+                'size': self.size,
+                'created': self.created,
+                'recycled': self.recycled,
+            }
+
+
+_pool: Optional[DriverPool] = None
+
+
+def init_pool(size: int = 2, headless: bool = True, warm: bool = True, **kwargs) -> DriverPool:
+    """Initialise le pool global (à appeler au démarrage de l'app)"""
+    global _pool
+    if _pool is None:
+        _pool = DriverPool(size=size, headless=headless, **kwargs)
+        atexit.register(_pool.shutdown)
+    if warm:
+        _pool.warm_up()
+    return _pool
+
+
+def get_pool() -> Optional[DriverPool]:
+    """Pool global, ou None si aucun pool n'a été initialisé"""
+    return _pool
@@ -14,6 +14,9 @@ from concurrent.futures import ThreadPoolExecutor
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from pmu.scraper import PMUScraper
 from winamax.scraper import WinamaxScraper
+from calculator import calculate_batch, matches_matrix
+from browser import get_browser_profile
+from governor import ConcurrencyGovernor
 from flask import render_template # On utilise Jinja de Flask ou Jinja2 directement
 from jinja2 import Environment, FileSystemLoader
 
@@ -21,10 +24,12 @@ def scrape_data():
     """Lance le scraping parallèle"""
     results = {'pmu': None, 'winamax': None}
     
+    # Le régulateur lance le second navigateur seulement si la machine le supporte
+    governor = ConcurrencyGovernor(max_slots=get_browser_profile().max_browsers)
     with ThreadPoolExecutor(max_workers=2) as executor:
         futures = {
-            executor.submit(run_scraper, 'pmu'): 'pmu',
-            executor.submit(run_scraper, 'winamax'): 'winamax'
+            executor.submit(run_scraper, 'pmu', governor): 'pmu',
+            executor.submit(run_scraper, 'winamax', governor): 'winamax'
         }
         for future in futures:
             bm = futures[future]
@@ -36,40 +41,33 @@ def scrape_data():
     
     return results
 
-def run_scraper(bookmaker):
+def run_scraper(bookmaker, governor=None):
     """Logique de scraping adaptée de app.py mais sans cache"""
-    if bookmaker == 'pmu':
-        scraper = PMUScraper(headless=True, fast_mode=True)
-    else:
-        scraper = WinamaxScraper(headless=True, fast_mode=True)
-    
-    result = scraper.scrape()
+    governor = governor or ConcurrencyGovernor(max_slots=1)
+    with governor.slot(bookmaker):
+        max_tabs = governor.tabs_for(bookmaker)
+        if bookmaker == 'pmu':
+            scraper = PMUScraper(headless=True, fast_mode=True, multi_tab=True, max_tabs=max_tabs)
+        else:
+            scraper = WinamaxScraper(headless=True, fast_mode=True, multi_tab=True, max_tabs=max_tabs)
+        
+        result = scraper.scrape()
     
+    # Calcul des conversions de tous les matchs en un seul passage
+    batch = calculate_batch(matches_matrix(result.matches))
     matches_3p = []
     matches_2p = []
-    sports_2p = ['basketball', 'tennis', 'basket', 'volley', 'mma', 'boxe']
     
-    for m in result.matches:
-        sport_lower = (m.sport or m.competition or '').lower()
-        is_2p = any(s in sport_lower for s in sports_2p) or m.odds_draw < 1.05 or m.odds_draw > 50
-        
+    for i, m in enumerate(result.matches):
         match_data = m.to_dict() # Utilise la méthode native du modèle
         
-        # On s'assure que les champs calculés sont présents (déjà fait par to_dict mais recheck conversion)
-        if 'conversion_rate' not in match_data:
-             match_data['conversion_rate'] = m.conversion_rate
+        # Profit et conversion recalculés selon le nombre d'issues (2 ou 3 joueurs)
+        match_data['profit_garanti'] = round(float(batch.guaranteed_profit[i]), 2)
+        match_data['conversion_rate'] = round(float(batch.conversion_rate[i]), 2)
         
         # Ajout attribution pour affichage facile
-        if is_2p:
-            match_data['assignment'] = [
-                {'joueur': 'Joueur 1', 'issue': f"1 - {m.home_team}", 'cote': m.odds_home, 'gain': round((m.odds_home - 1) * 100, 2)},
-                {'joueur': 'Joueur 2', 'issue': f"2 - {m.away_team}", 'cote': m.odds_away, 'gain': round((m.odds_away - 1) * 100, 2)},
-            ]
-            match_data['assignment'].sort(key=lambda x: x['cote'], reverse=True)
-            matches_2p.append(match_data)
-        else:
-            match_data['assignment'] = m.get_assignment()
-            matches_3p.append(match_data)
+        match_data['assignment'] = batch.assignment(i, (m.home_team, 'Match Nul', m.away_team))
+        (matches_2p if batch.outcomes[i] == 2 else matches_3p).append(match_data)
     
     # Tri
     matches_3p.sort(key=lambda x: x['conversion_rate'], reverse=True)
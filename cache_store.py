@@ -0,0 +1,81 @@
+"""
+Cache persistant sur disque (SQLite) pour redémarrer avec les dernières données
+
+Chaque entrée (clé, données JSON, date, expiration) est écrite dans sa propre
+transaction : après un crash on retrouve l'état de la dernière écriture réussie.
+"""
+from typing import Dict, Optional
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class SQLiteCacheStore:
+    """Stockage clé -> {'data', 'timestamp', 'expires_at'} dans un fichier SQLite"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL : les écritures n'écrasent jamais la dernière version valide du fichier
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " data TEXT NOT NULL,"
+            " timestamp REAL NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+
+    def put(self, key: str, data, timestamp: float, expires_at: float):
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, data, timestamp, expires_at) VALUES (?, ?, ?, ?)",
+                (key, payload, timestamp, expires_at))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def load_all(self, prefix: str = "") -> Dict[str, dict]:
+        """Toutes les entrées (dont la clé commence par `prefix`), expirées comprises"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, data, timestamp, expires_at FROM cache WHERE key LIKE ? || '%'",
+                (prefix,)).fetchall()
+        entries = {}
+        for key, payload, timestamp, expires_at in rows:
+            try:
+                data = json.loads(payload)
+            except ValueError:
+                continue  # Entrée illisible : ignorée, elle sera réécrite au prochain scraping
+            entries[key] = {'data': data, 'timestamp': timestamp, 'expires_at': expires_at}
+        return entries
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_cache_store(path: Optional[str]) -> Optional[SQLiteCacheStore]:
+    """Ouvre le cache persistant (None si désactivé ou inutilisable)"""
+    if not path:
+        return None
+    started = time.time()
+    try:
+        store = SQLiteCacheStore(path)
+    except sqlite3.Error as e:
+        print(f"⚠️ Cache persistant indisponible ({path}): {e}")
+        return None
+    print(f"💾 Cache persistant : {path} ({(time.time() - started) * 1000:.0f} ms)")
+    return store
@@ -0,0 +1,224 @@
+"""
+Calcul vectorisé de la conversion des freebets (NumPy)
+
+Toutes les cotes sont traitées en un seul passage : cote minimale, profit
+garanti, taux de conversion et répartition des paris entre joueurs, pour
+n'importe quel montant de freebet et nombre de joueurs.
+"""
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence
+import numpy as np
+
+from models import Match
+
+
+DEFAULT_FREEBET = 100.0
+MAX_PLAYERS = 10  # Au-delà, les joueurs en plus ne misent rien (3 issues au plus)
+OUTCOME_LABELS = ('1', 'N', '2')
+SPORTS_2P = ('basketball', 'tennis', 'basket', 'volley', 'mma', 'boxe')
+
+
+def is_fake_draw(odds_draw: float) -> bool:
+    """Cote de nul factice des scrapers pour les matchs à 2 issues (< 1.05 ou > 50)"""
+    return odds_draw < 1.05 or odds_draw > 50
+
+
+def effective_min_odds(home: float, draw: float, away: float) -> float:
+    """Cote minimale en ignorant le nul factice des matchs à 2 issues"""
+    return min(home, away) if is_fake_draw(draw) else min(home, draw, away)
+
+
+def is_two_player(match: Match) -> bool:
+    """Match à 2 issues (sport sans nul ou cote de nul factice)"""
+    sport_lower = (match.sport or match.competition or '').lower()
+    return any(s in sport_lower for s in SPORTS_2P) or is_fake_draw(match.odds_draw)
+
+
+def odds_matrix(rows: Iterable[Sequence[float]]) -> np.ndarray:
+    """
+    Tableau (n, 3) domicile / nul / extérieur à partir de tuples de 2 ou 3 cotes.
+
+    Les matchs à 2 issues ont NaN comme cote de nul (ainsi que les cotes de nul
+    factices < 1.05 ou > 50 des scrapers).
+    """
+    rows = list(rows)
+    matrix = np.full((len(rows), 3), np.nan)
+    for i, row in enumerate(rows):
+        if len(row) == 2:
+            matrix[i, 0], matrix[i, 2] = row
+        elif len(row) == 3:
+            matrix[i] = row
+        else:
+            raise ValueError(f"Ligne {i}: 2 ou 3 cotes attendues, {len(row)} reçues")
+    draw = matrix[:, 1]
+    with np.errstate(invalid='ignore'):
+        draw[(draw < 1.05) | (draw > 50)] = np.nan
+    return matrix
+
+
+def check_odds(odds: np.ndarray):
+    """ValueError si une cote domicile / extérieur n'est pas un nombre fini > 1 (entrées de l'API)"""
+    ends = odds[:, [0, 2]]
+    invalid = ~np.isfinite(ends) | (np.nan_to_num(ends) <= 1)
+    if invalid.any():
+        raise ValueError(f"Ligne {int(np.nonzero(invalid.any(axis=1))[0][0])}: cotes finies > 1 attendues")
+
+
+def matches_matrix(matches: Iterable[Match]) -> np.ndarray:
+    """Tableau des cotes d'une liste de matchs (sans nul pour les matchs à 2 joueurs)"""
+    return odds_matrix((m.odds_home, m.odds_away) if is_two_player(m) else (m.odds_home, m.odds_draw, m.odds_away)
+                       for m in matches)
+
+
+@dataclass
+class BatchResult:
+    """Résultats par ligne (tableaux NumPy de longueur n)"""
+    outcomes: np.ndarray            # Nombre d'issues (2 ou 3)
+    min_odds: np.ndarray
+    max_odds: np.ndarray
+    covered: np.ndarray             # Assez de joueurs pour couvrir toutes les issues
+    guaranteed_profit: np.ndarray   # 0 si les issues ne sont pas toutes couvertes
+    best_profit: np.ndarray
+    conversion_rate: np.ndarray     # Profit garanti / total des freebets misés, en %
+    order: np.ndarray               # (n, 3) issues par cote décroissante (-1 = pas d'issue)
+    stakes: np.ndarray              # (n, 3) freebet placé sur chaque issue de `order`
+    players: np.ndarray             # (n, 3) joueur (0-based) qui joue chaque issue de `order`
+    odds: np.ndarray                # (n, 3) cotes d'entrée
+
+    def __len__(self) -> int:
+        return len(self.outcomes)
+
+    def assignment(self, i: int, names: Optional[Sequence[str]] = None,
+                   extras: Optional[Sequence[dict]] = None) -> List[dict]:
+        """Répartition d'une ligne, au format de Match.get_assignment
+
+        Args:
+            extras: Champs ajoutés à la ligne de chaque issue (domicile, nul, extérieur)
+        """
+        names = names or ('', 'Match Nul', '')
+        rows = []
+        for slot in range(3):
+            outcome = int(self.order[i, slot])
+            if outcome < 0 or np.isnan(self.stakes[i, slot]):
+                continue
+            label = f"{OUTCOME_LABELS[outcome]} - {names[outcome]}".rstrip(' -')
+            row = {
+                'joueur': f"Joueur {int(self.players[i, slot]) + 1}",
+                'issue': label,
+                'mise': round(float(self.stakes[i, slot]), 2),
+                'gain': round(float(self.odds[i, outcome] - 1) * float(self.stakes[i, slot]), 2),
+                'cote': float(self.odds[i, outcome]),
+            }
+            if extras is not None:
+                row.update(extras[outcome])
+            rows.append(row)
+        return rows
+
+    def to_dicts(self) -> List[dict]:
+        return [
+            {
+                'outcomes': int(self.outcomes[i]),
+                'min_odds': round(float(self.min_odds[i]), 2),
+                'covered': bool(self.covered[i]),
+                'profit_garanti': round(float(self.guaranteed_profit[i]), 2),
+                'meilleur_cas': round(float(self.best_profit[i]), 2),
+                'conversion_rate': round(float(self.conversion_rate[i]), 2),
+                'assignment': self.assignment(i),
+            }
+            for i in range(len(self))
+        ]
+
+
+def calculate_batch(odds: np.ndarray, freebet: float = DEFAULT_FREEBET,
+                    stakes: Optional[Sequence[float]] = None,
+                    players: Optional[int] = None) -> BatchResult:
+    """
+    Calcule la conversion des freebets pour toutes les lignes en un passage.
+
+    Chaque joueur mise son freebet sur une issue différente. Avec des montants
+    différents, le plus gros freebet va sur la plus petite cote : c'est la
+    répartition qui maximise le gain garanti (le minimum des gains).
+
+    Args:
+        odds: Tableau (n, 3) de odds_matrix (NaN = pas de nul)
+        freebet: Montant du freebet de chaque joueur (si `stakes` n'est pas donné)
+        stakes: Montants des freebets par joueur (remplace freebet / players)
+        players: Nombre de joueurs (par défaut : un par issue)
+
+    Returns:
+        BatchResult
+
+    Raises:
+        ValueError: Montants non finis ou négatifs, plus de MAX_PLAYERS joueurs
+    """
+    odds = np.asarray(odds, dtype=np.float64)
+    n = len(odds)
+    valid = ~np.isnan(odds)
+    outcomes = valid.sum(axis=1)
+
+    min_odds = np.nanmin(np.where(valid, odds, np.inf), axis=1)
+    max_odds = np.nanmax(np.where(valid, odds, -np.inf), axis=1)
+
+    # Issues par cote décroissante (les NaN en dernier)
+    order = np.argsort(np.where(valid, -odds, np.inf), axis=1, kind='stable')
+    order[~np.take_along_axis(valid, order, axis=1)] = -1
+    sorted_odds = np.take_along_axis(odds, np.maximum(order, 0), axis=1)
+    sorted_odds[order < 0] = np.nan
+
+    # Freebets des joueurs, du plus petit au plus gros (le plus gros sur la plus petite cote)
+    if stakes is not None:
+        player_stakes = np.asarray(stakes, dtype=np.float64).ravel()
+    else:
+        count = players if players is not None else 3
+        if not 1 <= count <= MAX_PLAYERS:
+            raise ValueError(f"Entre 1 et {MAX_PLAYERS} joueurs")
+        player_stakes = np.full(count, float(freebet))
+    if not 1 <= len(player_stakes) <= MAX_PLAYERS:
+        raise ValueError(f"Entre 1 et {MAX_PLAYERS} montants de freebet")
+    if not np.all(np.isfinite(player_stakes)) or np.any(player_stakes < 0):
+        raise ValueError("Montants de freebet finis et positifs attendus")
+    player_order = np.argsort(player_stakes, kind='stable')
+    ranked_stakes = player_stakes[player_order]
+    num_players = len(player_stakes)
+
+    # Pour une ligne à k issues, les k plus gros freebets jouent et l'issue de rang r (cotes
+    # décroissantes) reçoit le (k-r)ème plus gros. Avec moins de joueurs que d'issues, les plus
+    # petites cotes restent sans mise. Par défaut il y a un joueur par issue (Joueur 1 = plus grosse cote).
+    slot = np.arange(3)[None, :]
+    if stakes is None and players is None:
+        active = outcomes
+        stake_rank = np.broadcast_to(slot, (n, 3))
+    else:
+        active = np.minimum(outcomes, num_players)
+        stake_rank = num_players - active[:, None] + slot   # Rang dans ranked_stakes
+    playing = (slot < active[:, None]) & (order >= 0)
+    stake_rank = np.clip(stake_rank, 0, num_players - 1)
+    slot_stakes = np.where(playing, ranked_stakes[stake_rank], np.nan)
+    slot_players = np.where(playing, player_order[stake_rank], -1)
+
+    covered = active >= outcomes
+    payouts = (sorted_odds - 1) * slot_stakes
+    guaranteed = np.where(covered, np.nanmin(np.where(playing, payouts, np.inf), axis=1), 0.0)
+    total_staked = np.nansum(slot_stakes, axis=1)
+    best = np.nanmax(np.where(playing, payouts, -np.inf), axis=1)
+    conversion = np.divide(guaranteed * 100, total_staked, out=np.zeros(n), where=total_staked > 0)
+
+    return BatchResult(
+        outcomes=outcomes,
+        min_odds=min_odds,
+        max_odds=max_odds,
+        covered=covered,
+        guaranteed_profit=guaranteed,
+        best_profit=best,
+        conversion_rate=conversion,
+        order=order,
+        stakes=slot_stakes,
+        players=slot_players,
+        odds=odds,
+    )
+
+
+def rank(result: BatchResult, descending: bool = True) -> np.ndarray:
+    """Indices des lignes triées par taux de conversion"""
+    key = -result.conversion_rate if descending else result.conversion_rate
+    return np.argsort(key, kind='stable')
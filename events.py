@@ -0,0 +1,58 @@
+"""
+Diffusion d'événements aux navigateurs connectés (Server-Sent Events)
+
+Chaque client abonné a sa propre file ; un client trop lent (file pleine)
+perd les événements en trop plutôt que de bloquer le scraping.
+"""
+from typing import Optional
+import itertools
+import json
+import queue
+import threading
+
+
+class EventBroker:
+    """Publication d'événements vers toutes les files abonnées"""
+
+    def __init__(self, max_queued: int = 100):
+        self.max_queued = max_queued
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.dropped = 0
+
+    def subscribe(self) -> queue.Queue:
+        q = queue.Queue(maxsize=self.max_queued)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q: queue.Queue):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: str, data) -> int:
+        """Envoie un événement à tous les abonnés ; retourne le nombre de destinataires"""
+        message = format_sse(event, data, next(self._ids))
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                self.dropped += 1
+        return len(subscribers)
+
+
+def format_sse(event: str, data, event_id: Optional[int] = None) -> str:
+    """Message au format text/event-stream"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
@@ -0,0 +1,110 @@
+"""
+Récupération des pages sans navigateur pour les scrapers
+
+HttpBackend : requêtes HTTP simples, session keep-alive partagée (gzip,
+réutilisation des connexions). Les pages qui ne se lisent pas en HTTP
+(rendu côté client) passent par Selenium dans les scrapers : rendu,
+cookies et scroll n'ont rien d'un simple "fetch(url) -> html".
+"""
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit, urlunsplit
+from urllib3.util.retry import Retry
+from typing import Dict, Optional
+import requests
+import threading
+import os
+
+from browser import USER_AGENT, record_page
+
+
+class HttpBackend:
+    """
+    Récupération sans navigateur via une session requests partagée.
+
+    Les connexions sont gardées ouvertes (keep-alive) et réutilisées d'une
+    page à l'autre ; les réponses sont demandées compressées (gzip).
+    """
+
+    name = "http"
+
+    def __init__(self, base_url: Optional[str] = None, timeout: float = 10.0,
+                 pool_maxsize: int = 8, retries: int = 1):
+        """
+        Args:
+            base_url: Remplace schéma et hôte de chaque URL (ex: serveur de rejeu local
+                http://127.0.0.1:8765, voir tools/replay_server.py)
+            timeout: Délai max (connexion + lecture) par requête
+            pool_maxsize: Connexions gardées ouvertes par hôte
+            retries: Nouvelles tentatives sur erreur de connexion ou 5xx
+        """
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=pool_maxsize,
+            max_retries=Retry(total=retries, backoff_factor=0.3,
+                              status_forcelist=(502, 503, 504), allowed_methods=('GET',)),
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'fr-FR,fr;q=0.9',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        })
+
+    def _target(self, url: str) -> str:
+        if not self.base_url:
+            return url
+        base = urlsplit(self.base_url)
+        parts = urlsplit(url)
+        return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, ''))
+
+    def fetch(self, url: str) -> Optional[str]:
+        """HTML de la page, ou None en cas d'échec"""
+        try:
+            response = self.session.get(self._target(url), timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"    ⚠️ HTTP {url}: {str(e)[:50]}")
+            return None
+        if response.status_code != 200:
+            print(f"    ⚠️ HTTP {response.status_code} sur {url}")
+            return None
+
+        # Enregistrement au format du serveur de rejeu : <RECORD_DIR>/http/<hôte>/<chemin>
+        parts = urlsplit(url)
+        record_page(os.path.join('http', parts.netloc, parts.path.strip('/') or 'index') + '.html',
+                    response.text)
+        return response.text
+
+    def close(self):
+        self.session.close()
+
+
+_http_backend: Optional[HttpBackend] = None
+_http_lock = threading.Lock()
+
+
+def get_http_backend() -> HttpBackend:
+    """Backend HTTP partagé par tout le process (une seule session keep-alive)
+
+    HTTP_BASE_URL redirige toutes les requêtes (ex: serveur de rejeu local).
+    """
+    global _http_backend
+    with _http_lock:
+        if _http_backend is None:
+            _http_backend = HttpBackend(base_url=os.environ.get('HTTP_BASE_URL'))
+        return _http_backend
+
+
+def fetch_all(backend: HttpBackend, urls: Dict[str, str], max_workers: int = 4) -> Dict[str, Optional[str]]:
+    """Récupère plusieurs pages en parallèle sur le même backend : {nom: html ou None}"""
+    if not urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+        futures = {name: executor.submit(backend.fetch, url) for name, url in urls.items()}
+        return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,183 @@
+"""
+Régulation du nombre de navigateurs et d'onglets lancés en parallèle
+
+Avant chaque scraping, le régulateur regarde la mémoire disponible, le nombre
+de CPU et la charge de la machine, et le coût mesuré des scrapings précédents
+(pic de RSS de Chrome par bookmaker). Les demandes en attente passent par
+ordre de priorité (requête d'un utilisateur avant rafraîchissement planifié).
+Sur un Pi un seul navigateur tourne à la fois ; une machine plus grosse en
+lance davantage, avec plus d'onglets par navigateur.
+"""
+from contextlib import contextmanager
+from typing import Dict, Optional
+import heapq
+import itertools
+import os
+import threading
+import time
+
+
+PRIORITY_USER = 0         # Requête bloquante d'un utilisateur (cache vide)
+PRIORITY_REFRESH = 5      # Données expirées servies pendant le rafraîchissement
+PRIORITY_BACKGROUND = 10  # Rafraîchissement planifié
+
+
+def available_memory_mb() -> Optional[float]:
+    """Mémoire disponible (Mo) d'après /proc/meminfo (None si indisponible)"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def load_per_cpu() -> float:
+    """Charge moyenne sur 1 minute rapportée au nombre de CPU (0 si indisponible)"""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return 0.0
+
+
+class ConcurrencyGovernor:
+    """File de scrapings par priorité, lancés selon les ressources libres"""
+
+    def __init__(self, max_slots: Optional[int] = None, reserve_mb: float = 300.0,
+                 default_cost_mb: float = 450.0, max_load_per_cpu: float = 1.5,
+                 max_tabs: int = 8, settle: float = 20.0, smoothing: float = 0.3,
+                 poll_interval: float = 1.0):
+        """
+        Args:
+            max_slots: Navigateurs simultanés au maximum (par défaut le nombre de CPU)
+            reserve_mb: Mémoire laissée libre pour le système et Flask
+            default_cost_mb: Coût supposé d'un scraping tant qu'aucun n'a été mesuré
+            max_load_per_cpu: Au-delà de cette charge, un seul scraping à la fois
+            max_tabs: Onglets simultanés au maximum par navigateur
+            settle: Durée (s) pendant laquelle un scraping qui démarre n'est pas encore
+                visible dans la mémoire disponible (son coût estimé est alors réservé)
+            smoothing: Poids d'une nouvelle mesure dans la moyenne mobile des coûts
+            poll_interval: Période (s) de réévaluation des ressources pour les demandes en attente
+        """
+        self.max_slots = max_slots or os.cpu_count() or 1
+        self.reserve_mb = reserve_mb
+        self.default_cost_mb = default_cost_mb
+        self.max_load_per_cpu = max_load_per_cpu
+        self.max_tabs = max_tabs
+        self.settle = settle
+        self.smoothing = smoothing
+        self.poll_interval = poll_interval
+        self._cond = threading.Condition()
+        self._waiting = []                      # Tas de (priorité, n° d'arrivée)
+        self._seq = itertools.count()
+        self._running: Dict[int, tuple] = {}    # n° -> (nom, début)
+        self._costs: Dict[str, float] = {}      # Pic de RSS moyen par nom (Mo)
+        self._tab_costs: Dict[str, float] = {}  # Coût moyen d'un onglet par nom (Mo)
+        self.started = 0
+        self.waited_seconds = 0.0
+
+    def cost_mb(self, name: str) -> float:
+        return self._costs.get(name, self.default_cost_mb)
+
+    def _headroom_mb(self, now: float) -> Optional[float]:
+        """Mémoire utilisable pour un nouveau scraping (None si inconnue)"""
+        available = available_memory_mb()
+        if available is None:
+            return None
+        # Scrapings tout juste lancés : leur Chrome n'a pas encore pris sa mémoire
+        starting = sum(self.cost_mb(name) for name, started in self._running.values()
+                       if now - started < self.settle)
+        return available - self.reserve_mb - starting
+
+    def _can_start(self, name: str, now: float) -> bool:
+        running = len(self._running)
+        if running == 0:
+            return True  # Toujours au moins un scraping, même sur une machine chargée
+        if running >= self.max_slots or load_per_cpu() > self.max_load_per_cpu:
+            return False
+        headroom = self._headroom_mb(now)
+        return headroom is None or headroom >= self.cost_mb(name)
+
+    def acquire(self, name: str, priority: int = PRIORITY_BACKGROUND) -> int:
+        """Attend son tour et des ressources suffisantes ; retourne le jeton à rendre à release()"""
+        waited = time.time()
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            while True:
+                now = time.time()
+                if self._waiting[0] == ticket and self._can_start(name, now):
+                    break
+                self._cond.wait(self.poll_interval)
+            heapq.heappop(self._waiting)
+            self._running[ticket[1]] = (name, now)
+            self.started += 1
+            self.waited_seconds += now - waited
+            self._cond.notify_all()  # La demande suivante peut peut-être démarrer aussi
+        return ticket[1]
+
+    def release(self, token: int):
+        with self._cond:
+            self._running.pop(token, None)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, name: str, priority: int = PRIORITY_BACKGROUND):
+        token = self.acquire(name, priority)
+        try:
+            yield
+        finally:
+            self.release(token)
+
+    def record(self, name: str, peak_rss_mb: float, tabs: int = 1):
+        """Met à jour le coût mesuré d'un scraping (pic de RSS de Chrome, 0 = pas de navigateur)"""
+        if peak_rss_mb <= 0:
+            return
+        with self._cond:
+            previous = self._costs.get(name)
+            self._costs[name] = peak_rss_mb if previous is None else \
+                previous + self.smoothing * (peak_rss_mb - previous)
+            # Grossièrement : le navigateur compte comme un onglet de plus
+            tab_cost = peak_rss_mb / (tabs + 1)
+            previous = self._tab_costs.get(name)
+            self._tab_costs[name] = tab_cost if previous is None else \
+                previous + self.smoothing * (tab_cost - previous)
+
+    def under_pressure(self) -> bool:
+        """Pas de place pour un navigateur de plus (mémoire ou charge) : les navigateurs
+        gardés au chaud entre deux scrapings doivent alors être fermés"""
+        with self._cond:
+            headroom = self._headroom_mb(time.time())
+            cost = max(self._costs.values(), default=self.default_cost_mb)
+        return load_per_cpu() > self.max_load_per_cpu or (headroom is not None and headroom < cost)
+
+    def tabs_for(self, name: str) -> int:
+        """Onglets que le scraping de `name` peut ouvrir à la fois
+
+        Appelé une fois le créneau obtenu : le coût estimé de son navigateur est
+        alors déjà réservé dans la marge.
+        """
+        with self._cond:
+            headroom = self._headroom_mb(time.time())
+            tab_cost = self._tab_costs.get(name, self.default_cost_mb / 3)
+        if headroom is None:
+            return self.max_tabs
+        return max(1, min(self.max_tabs, int(headroom / tab_cost)))
+
+    def stats(self) -> dict:
+        """Ressources et file d'attente, pour /api/status"""
+        available = available_memory_mb()
+        with self._cond:
+            return {
+                'max_slots': self.max_slots,
+                'running': sorted(name for name, _ in self._running.values()),
+                'waiting': len(self._waiting),
+                'available_mb': round(available, 0) if available is not None else None,
+                'load_per_cpu': round(load_per_cpu(), 2),
+                'cost_mb': {name: round(cost, 0) for name, cost in self._costs.items()},
+                'tab_cost_mb': {name: round(cost, 0) for name, cost in self._tab_costs.items()},
+                'started': self.started,
+                'avg_wait_seconds': round(self.waited_seconds / self.started, 2) if self.started else 0,
+            }
@@ -0,0 +1,348 @@
+"""
+Historique compact des cotes (série temporelle en colonnes)
+
+Une ligne par observation (match, bookmaker) : horodatage, identifiants
+internés et trois cotes en float32, dans des array.array contigus.
+Seuls les changements de cotes sont enregistrés ; les anciennes données
+sont sous-échantillonnées puis supprimées.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+import json
+import os
+import struct
+import threading
+import time
+
+from calculator import effective_min_odds
+from models import Match, MatchStore
+
+
+# Colonnes : (nom, typecode array)
+COLUMNS = (
+    ('t', 'd'),        # Horodatage (s)
+    ('match', 'I'),    # Identifiant de match interné
+    ('bookmaker', 'H'),
+    ('home', 'f'),     # Cotes en float32
+    ('draw', 'f'),
+    ('away', 'f'),
+)
+
+_HEADER = struct.Struct('<4sI')  # Magic + taille de l'en-tête JSON
+_MAGIC = b'ODH1'
+
+
+class OddsHistory:
+    """
+    Stockage en colonnes des cotes observées.
+
+    Les lignes sont ajoutées dans l'ordre chronologique ; chaque série
+    (match, bookmaker) garde la liste croissante de ses positions et chaque
+    match la liste de ses bookmakers. Une requête par intervalle cherche par
+    dichotomie les positions limites dans la colonne des horodatages, puis
+    dans les positions de la série.
+    """
+
+    def __init__(self, full_resolution: float = 6 * 3600, bucket: float = 900,
+                 retention: float = 7 * 24 * 3600):
+        """
+        Args:
+            full_resolution: Âge (s) jusqu'auquel toutes les observations sont gardées
+            bucket: Au-delà, une seule observation (la dernière) par tranche de `bucket` secondes
+            retention: Âge (s) au-delà duquel les observations sont supprimées
+        """
+        self.full_resolution = full_resolution
+        self.bucket = bucket
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._cols = {name: array(code) for name, code in COLUMNS}
+        self._match_ids: List[str] = []
+        self._match_index: Dict[Tuple[str, str], int] = {}  # (sport, id) comme MatchStore -> match
+        self._id_index: Dict[str, List[int]] = {}           # id -> matchs (un par sport)
+        self._match_info: List[Tuple[str, str, str]] = []  # (domicile, extérieur, sport)
+        self._bookmakers: List[str] = []
+        self._bookmaker_index: Dict[str, int] = {}
+        self._series: Dict[Tuple[int, int], array] = {}  # (match, bookmaker) -> positions
+        self._match_series: Dict[int, List[int]] = {}     # match -> bookmakers ayant une série
+        self._last: Dict[Tuple[int, int], Tuple[float, float, float]] = {}
+
+    # --- Internement ---
+
+    def _intern_match(self, match: Match) -> int:
+        # Même id dans deux sports : deux séries distinctes
+        key = MatchStore.key(match.id, match.sport)
+        idx = self._match_index.get(key)
+        if idx is None:
+            idx = len(self._match_ids)
+            self._match_index[key] = idx
+            self._id_index.setdefault(MatchStore.normalize_id(match.id), []).append(idx)
+            self._match_ids.append(match.id)
+            self._match_info.append((match.home_team, match.away_team, match.sport))
+        return idx
+
+    def _rebuild_match_index(self):
+        self._match_index = {}
+        self._id_index = {}
+        for idx, (match_id, (_, _, sport)) in enumerate(zip(self._match_ids, self._match_info)):
+            self._match_index[MatchStore.key(match_id, sport)] = idx
+            self._id_index.setdefault(MatchStore.normalize_id(match_id), []).append(idx)
+
+    def _find_match(self, match_id: str, sport: Optional[str]) -> Optional[int]:
+        """Match interné d'après son id (et son sport si l'id existe dans plusieurs sports)"""
+        if sport is not None:
+            return self._match_index.get(MatchStore.key(match_id, sport))
+        found = self._id_index.get(MatchStore.normalize_id(match_id), [])
+        if len(found) > 1:
+            sports = ', '.join(sorted(self._match_info[idx][2] for idx in found))
+            raise ValueError(f'Match présent dans plusieurs sports ({sports}) : préciser sport')
+        return found[0] if found else None
+
+    def _intern_bookmaker(self, bookmaker: str) -> int:
+        idx = self._bookmaker_index.get(bookmaker)
+        if idx is None:
+            idx = len(self._bookmakers)
+            self._bookmaker_index[bookmaker] = idx
+            self._bookmakers.append(bookmaker)
+        return idx
+
+    # --- Écriture ---
+
+    def _append_row(self, t: float, match_idx: int, bm_idx: int, odds: Tuple[float, float, float]):
+        cols = self._cols
+        position = len(cols['t'])
+        if position:
+            t = max(t, cols['t'][-1])  # Horloge reculée : la colonne reste triée
+        cols['t'].append(t)
+        cols['match'].append(match_idx)
+        cols['bookmaker'].append(bm_idx)
+        cols['home'].append(odds[0])
+        cols['draw'].append(odds[1])
+        cols['away'].append(odds[2])
+        key = (match_idx, bm_idx)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = array('I')
+            self._match_series.setdefault(match_idx, []).append(bm_idx)
+        series.append(position)
+        self._last[key] = odds
+
+    def record(self, matches: Iterable[Match], timestamp: Optional[float] = None) -> int:
+        """Ajoute les cotes observées ; retourne le nombre de lignes ajoutées (cotes modifiées)"""
+        t = timestamp or time.time()
+        added = 0
+        with self._lock:
+            for m in matches:
+                match_idx = self._intern_match(m)
+                bm_idx = self._intern_bookmaker(m.bookmaker)
+                # Arrondi float32 pour comparer avec la dernière valeur stockée
+                odds = tuple(array('f', (m.odds_home, m.odds_draw, m.odds_away)))
+                if self._last.get((match_idx, bm_idx)) == odds:
+                    continue
+                self._append_row(t, match_idx, bm_idx, odds)
+                added += 1
+        return added
+
+    # --- Lecture ---
+
+    def __len__(self) -> int:
+        return len(self._cols['t'])
+
+    def _series_rows(self, key: Tuple[int, int], start: Optional[float], end: Optional[float]) -> List[int]:
+        positions = self._series.get(key)
+        if not positions:
+            return []
+        # Colonne t triée : bornes en positions globales, puis dans celles de la série
+        times = self._cols['t']
+        lo = bisect_left(positions, bisect_left(times, start)) if start is not None else 0
+        hi = bisect_left(positions, bisect_right(times, end)) if end is not None else len(positions)
+        return positions[lo:hi].tolist()
+
+    def trajectory(self, match_id: str, start: Optional[float] = None,
+                   end: Optional[float] = None, sport: Optional[str] = None) -> Optional[dict]:
+        """Évolution des cotes d'un match, par bookmaker (None si match inconnu)
+
+        Raises:
+            ValueError: `sport` omis alors que l'id existe dans plusieurs sports
+        """
+        with self._lock:
+            match_idx = self._find_match(match_id, sport)
+            if match_idx is None:
+                return None
+            cols = self._cols
+            home_team, away_team, sport = self._match_info[match_idx]
+            series = {}
+            for bm_idx in self._match_series.get(match_idx, ()):
+                rows = self._series_rows((match_idx, bm_idx), start, end)
+                if not rows:
+                    continue
+                bookmaker = self._bookmakers[bm_idx]
+                points = {
+                    't': [cols['t'][r] for r in rows],
+                    'home': [round(cols['home'][r], 2) for r in rows],
+                    'draw': [round(cols['draw'][r], 2) for r in rows],
+                    'away': [round(cols['away'][r], 2) for r in rows],
+                }
+                points['min_odds'] = [effective_min_odds(h, d, a)
+                                      for h, d, a in zip(points['home'], points['draw'], points['away'])]
+                series[bookmaker] = points
+        return {
+            'match_id': self._match_ids[match_idx],
+            'home_team': home_team,
+            'away_team': away_team,
+            'sport': sport,
+            'series': series,
+        }
+
+    def trending(self, since: float, limit: int = 20) -> List[dict]:
+        """Matchs dont la cote minimale a le plus progressé depuis `since`"""
+        movements = []
+        with self._lock:
+            cols = self._cols
+            for (match_idx, bm_idx), positions in self._series.items():
+                last = positions[-1]
+                # Valeur de référence : dernière observation avant `since` (sinon la première)
+                rows = self._series_rows((match_idx, bm_idx), None, since)
+                first = rows[-1] if rows else positions[0]
+                if first == last:
+                    continue
+                before = effective_min_odds(cols['home'][first], cols['draw'][first], cols['away'][first])
+                after = effective_min_odds(cols['home'][last], cols['draw'][last], cols['away'][last])
+                home_team, away_team, sport = self._match_info[match_idx]
+                movements.append({
+                    'match_id': self._match_ids[match_idx],
+                    'bookmaker': self._bookmakers[bm_idx],
+                    'home_team': home_team,
+                    'away_team': away_team,
+                    'sport': sport,
+                    'min_odds_before': round(before, 2),
+                    'min_odds_now': round(after, 2),
+                    'change': round(after - before, 2),
+                })
+        movements.sort(key=lambda m: m['change'], reverse=True)
+        return movements[:limit]
+
+    # --- Sous-échantillonnage ---
+
+    def compact(self, now: Optional[float] = None) -> int:
+        """
+        Supprime les observations trop vieilles et ne garde que la dernière
+        de chaque tranche `bucket` au-delà de `full_resolution`. Les matchs
+        qui n'ont plus aucune observation sont retirés de la table d'internement.
+
+        Returns:
+            Nombre de lignes supprimées
+        """
+        now = now or time.time()
+        drop_before = now - self.retention
+        full_after = now - self.full_resolution
+        with self._lock:
+            cols = self._cols
+            keep = []
+            for key, positions in self._series.items():
+                previous_bucket = None
+                kept = []
+                # Parcours à rebours : la dernière observation d'une tranche est gardée
+                for p in reversed(positions):
+                    t = cols['t'][p]
+                    if t < drop_before:
+                        break
+                    if t < full_after:
+                        bucket = int(t // self.bucket)
+                        if bucket == previous_bucket:
+                            continue
+                        previous_bucket = bucket
+                    kept.append(p)
+                keep.extend(kept)  # Série entièrement expirée : supprimée
+
+            removed = len(cols['t']) - len(keep)
+            if removed:
+                keep.sort()
+                old = cols
+                self._cols = {name: array(code, (old[name][p] for p in keep)) for name, code in COLUMNS}
+                self._prune_matches()
+                self._rebuild_series()
+        return removed
+
+    def _prune_matches(self):
+        """Renumérote les matchs encore présents dans les lignes et oublie les autres"""
+        used = sorted(set(self._cols['match']))
+        if len(used) == len(self._match_ids):
+            return
+        renumber = {old: new for new, old in enumerate(used)}
+        self._cols['match'] = array('I', (renumber[m] for m in self._cols['match']))
+        self._match_ids = [self._match_ids[old] for old in used]
+        self._match_info = [self._match_info[old] for old in used]
+        self._rebuild_match_index()
+
+    def _rebuild_series(self):
+        self._series = {}
+        self._match_series = {}
+        self._last = {}
+        cols = self._cols
+        for position, (match_idx, bm_idx) in enumerate(zip(cols['match'], cols['bookmaker'])):
+            key = (match_idx, bm_idx)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = array('I')
+                self._match_series.setdefault(match_idx, []).append(bm_idx)
+            series.append(position)
+            self._last[key] = (cols['home'][position], cols['draw'][position], cols['away'][position])
+
+    # --- Persistance ---
+
+    def save(self, path: str):
+        """Écrit l'historique dans un fichier binaire (remplacement atomique)"""
+        with self._lock:
+            header = json.dumps({
+                'rows': len(self._cols['t']),
+                'match_ids': self._match_ids,
+                'match_info': self._match_info,
+                'bookmakers': self._bookmakers,
+            }, ensure_ascii=False).encode('utf-8')
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, len(header)))
+                f.write(header)
+                for name, _ in COLUMNS:
+                    self._cols[name].tofile(f)
+            os.replace(tmp, path)
+
+    def load(self, path: str) -> bool:
+        """Recharge un historique écrit par save() ; False si absent ou illisible"""
+        try:
+            with open(path, 'rb') as f:
+                magic, size = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC:
+                    return False
+                header = json.loads(f.read(size).decode('utf-8'))
+                cols = {}
+                for name, code in COLUMNS:
+                    cols[name] = array(code)
+                    cols[name].fromfile(f, header['rows'])
+        except (OSError, ValueError, EOFError, struct.error):
+            return False
+
+        with self._lock:
+            self._reset()
+            self._cols = cols
+            self._match_ids = header['match_ids']
+            self._match_info = [tuple(info) for info in header['match_info']]
+            self._rebuild_match_index()
+            self._bookmakers = header['bookmakers']
+            self._bookmaker_index = {bm: i for i, bm in enumerate(self._bookmakers)}
+            self._rebuild_series()
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'rows': len(self._cols['t']),
+                'matches': len(self._match_ids),
+                'series': len(self._series),
+                'bytes': sum(col.itemsize * len(col) for col in self._cols.values()),
+            }
@@ -0,0 +1,66 @@
+"""
+Réponses JSON pré-encodées et validées par ETag
+
+Le JSON d'une vue en cache est sérialisé et compressé une seule fois
+(gzip, et brotli si installé) ; les requêtes suivantes renvoient directement
+les octets, ou un 304 si le navigateur a déjà la même version.
+"""
+from dataclasses import dataclass
+from typing import Dict, Optional
+import gzip
+import hashlib
+import json
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # Optionnel : sans brotli on sert du gzip
+    brotli = None
+
+
+@dataclass(frozen=True)
+class EncodedBody:
+    """JSON immuable et ses variantes compressées, avec leur ETag commun"""
+    raw: bytes
+    gzip: bytes
+    br: Optional[bytes]
+    etag: str  # Empreinte du JSON (faible : partagée par les variantes compressées)
+
+    @classmethod
+    def from_data(cls, data) -> 'EncodedBody':
+        raw = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return cls(
+            raw=raw,
+            gzip=gzip.compress(raw, compresslevel=6, mtime=0),
+            br=brotli.compress(raw, quality=6) if brotli is not None else None,
+            etag=hashlib.blake2b(raw, digest_size=12).hexdigest(),
+        )
+
+    def variant(self, accept_encodings) -> tuple:
+        """(octets, encodage) selon l'en-tête Accept-Encoding du client"""
+        if self.br is not None and accept_encodings['br']:
+            return self.br, 'br'
+        if accept_encodings['gzip']:
+            return self.gzip, 'gzip'
+        return self.raw, None
+
+
+def encoded_response(body: EncodedBody, headers: Optional[Dict[str, str]] = None,
+                     status: int = 200) -> Response:
+    """Réponse pour la requête courante : 304 si l'ETag correspond, sinon la meilleure variante"""
+    common = {
+        'ETag': f'W/"{body.etag}"',
+        'Vary': 'Accept-Encoding',
+        'Cache-Control': 'no-cache',  # Le navigateur garde la réponse mais revalide à chaque fois
+    }
+    common.update(headers or {})
+
+    if request.if_none_match.contains_weak(body.etag):
+        return Response(status=304, headers=common)
+
+    payload, encoding = body.variant(request.accept_encodings)
+    response = Response(payload, status=status, mimetype='application/json', headers=common)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,210 @@
+"""
+Rapprochement des matchs entre bookmakers (PMU × Winamax)
+
+Les noms d'équipes sont normalisés (accents, ponctuation, mots vides, alias)
+puis indexés par sport et par mot : seules les paires partageant un mot
+sont comparées, au lieu de comparer chaque match à tous les autres.
+"""
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Tuple
+import re
+import unicodedata
+
+import numpy as np
+
+from calculator import DEFAULT_FREEBET, calculate_batch, is_two_player, odds_matrix
+from models import Match
+
+
+# Mots sans valeur pour identifier une équipe
+STOPWORDS = frozenset([
+    'fc', 'sc', 'ac', 'as', 'cf', 'afc', 'sv', 'fk', 'sk', 'bk', 'if', 'cd', 'ud', 'rc', 'us', 'ss',
+    'club', 'de', 'del', 'la', 'le', 'les', 'du', 'des', 'the', 'and', 'et', 'calcio',
+])
+
+# Alias courants -> nom normalisé de référence
+ALIASES = {
+    'psg': 'paris saint germain',
+    'paris sg': 'paris saint germain',
+    'om': 'marseille',
+    'olympique marseille': 'marseille',
+    'ol': 'lyon',
+    'olympique lyonnais': 'lyon',
+    'losc': 'lille',
+    'man utd': 'manchester united',
+    'man united': 'manchester united',
+    'man city': 'manchester city',
+    'spurs': 'tottenham',
+    'tottenham hotspur': 'tottenham',
+    'wolves': 'wolverhampton',
+    'inter': 'inter milan',
+    'internazionale': 'inter milan',
+    'milan': 'ac milan',
+    'atletico': 'atletico madrid',
+    'atl madrid': 'atletico madrid',
+    'bayern': 'bayern munich',
+    'bayern munchen': 'bayern munich',
+    'gladbach': 'monchengladbach',
+    'borussia monchengladbach': 'monchengladbach',
+    'dortmund': 'borussia dortmund',
+    'bvb': 'borussia dortmund',
+}
+
+NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+MIN_SCORE = 0.75  # Similarité minimale pour lier deux matchs
+MAX_BLOCK = 50    # Mot trop fréquent ('united', 'real'...) : ignoré s'il existe un mot plus rare
+
+
+def normalize_team(name: str) -> str:
+    """'Paris Saint-Germain FC' -> 'paris saint germain' (alias appliqués)"""
+    text = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode('ascii').lower()
+    text = NON_ALNUM_RE.sub(' ', text).strip()
+    if text in ALIASES:
+        return ALIASES[text]
+    key = ' '.join(token for token in text.split() if token not in STOPWORDS) or text
+    return ALIASES.get(key, key)
+
+
+def name_tokens(key: str) -> List[str]:
+    """Mots utilisables pour l'index (assez longs pour être discriminants)"""
+    return [token for token in key.split() if len(token) >= 3]
+
+
+def name_similarity(a: str, b: str) -> float:
+    """Similarité de deux noms normalisés (préfixe commun = noms tronqués par les sites)"""
+    if a == b:
+        return 1.0
+    if a.startswith(b) or b.startswith(a):
+        return 0.95
+    return SequenceMatcher(None, a, b).ratio()
+
+
+class MatchResolver:
+    """
+    Index de blocage sur les matchs d'un bookmaker : (sport, mot) -> matchs.
+
+    Chaque match d'un autre bookmaker n'est comparé qu'aux candidats
+    partageant au moins un mot d'équipe dans le même sport.
+    """
+
+    def __init__(self, matches: Iterable[Match]):
+        self.matches: List[Match] = []
+        self._keys: List[Tuple[str, str]] = []
+        self._index: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        for match in matches:
+            self.add(match)
+
+    def add(self, match: Match):
+        idx = len(self.matches)
+        home, away = normalize_team(match.home_team), normalize_team(match.away_team)
+        self.matches.append(match)
+        self._keys.append((home, away))
+        sport = (match.sport or '').lower()
+        for token in set(name_tokens(home) + name_tokens(away)):
+            self._index[(sport, token)].append(idx)
+
+    def candidates(self, sport: str, keys: Tuple[str, str]) -> List[int]:
+        """Matchs indexés partageant un mot d'équipe (les mots trop fréquents sont écartés)"""
+        found = set()
+        for key in keys:
+            postings = [self._index.get((sport, token), ()) for token in name_tokens(key)]
+            postings = [p for p in postings if p]
+            if not postings:
+                continue
+            selective = [p for p in postings if len(p) <= MAX_BLOCK] or [min(postings, key=len)]
+            for p in selective:
+                found.update(p)
+        return sorted(found)
+
+    def score(self, keys: Tuple[str, str], idx: int) -> Tuple[float, bool]:
+        """(similarité, domicile/extérieur inversés) entre des noms normalisés et un candidat"""
+        home, away = keys
+        other_home, other_away = self._keys[idx]
+        direct = min(name_similarity(home, other_home), name_similarity(away, other_away))
+        swapped = min(name_similarity(home, other_away), name_similarity(away, other_home))
+        return (swapped, True) if swapped > direct else (direct, False)
+
+    def resolve(self, matches: Iterable[Match], min_score: float = MIN_SCORE) -> List[Tuple[Match, Match, float, bool]]:
+        """
+        Lie chaque match au meilleur candidat de l'index (un candidat au plus une fois).
+
+        Returns:
+            [(match indexé, match donné, similarité, inversé), ...]
+        """
+        scored = []
+        for match in matches:
+            keys = (normalize_team(match.home_team), normalize_team(match.away_team))
+            for idx in self.candidates((match.sport or '').lower(), keys):
+                similarity, swapped = self.score(keys, idx)
+                if similarity >= min_score:
+                    scored.append((similarity, idx, match, swapped))
+
+        # Affectation gloutonne, meilleures similarités d'abord
+        scored.sort(key=lambda item: item[0], reverse=True)
+        used_indexed, used_given, pairs = set(), set(), []
+        for similarity, idx, match, swapped in scored:
+            if idx in used_indexed or id(match) in used_given:
+                continue
+            used_indexed.add(idx)
+            used_given.add(id(match))
+            pairs.append((self.matches[idx], match, round(similarity, 3), swapped))
+        return pairs
+
+
+def best_odds_view(pairs: List[Tuple[Match, Match, float, bool]],
+                   freebet: float = DEFAULT_FREEBET) -> List[dict]:
+    """
+    Vue combinée : meilleure cote par issue entre les deux bookmakers
+    et profit garanti d'un freebet par joueur avec ces cotes (calculator.calculate_batch).
+    """
+    if not pairs:
+        return []
+    best_rows, first_rows, second_rows, sources = [], [], [], []
+    for first, second, similarity, swapped in pairs:
+        # Cotes du second match remises dans l'ordre domicile/extérieur du premier
+        second_home, second_away = (second.odds_away, second.odds_home) if swapped else (second.odds_home, second.odds_away)
+        first_odds = [first.odds_home, first.odds_draw, first.odds_away]
+        second_odds = [second_home, second.odds_draw, second_away]
+        if is_two_player(first) or is_two_player(second):
+            del first_odds[1], second_odds[1]
+        best = [max((a, first.bookmaker), (b, second.bookmaker), key=lambda item: item[0])
+                for a, b in zip(first_odds, second_odds)]
+        best_rows.append([odds for odds, _ in best])
+        first_rows.append(first_odds)
+        second_rows.append(second_odds)
+        bookmakers = [bookmaker for _, bookmaker in best]
+        if len(bookmakers) == 2:
+            bookmakers.insert(1, None)
+        sources.append([{'bookmaker': bookmaker} for bookmaker in bookmakers])
+
+    batch = calculate_batch(odds_matrix(best_rows), freebet=freebet)
+    # Meilleure conversion possible chez un seul des deux bookmakers
+    single_best = np.maximum(calculate_batch(odds_matrix(first_rows), freebet=freebet).guaranteed_profit,
+                             calculate_batch(odds_matrix(second_rows), freebet=freebet).guaranteed_profit)
+
+    view = []
+    for i, (first, second, similarity, swapped) in enumerate(pairs):
+        names = (first.home_team, 'Match Nul', first.away_team)
+        view.append({
+            'ids': [first.id, second.id],
+            'home_team': first.home_team,
+            'away_team': first.away_team,
+            'sport': first.sport,
+            'competition': first.competition or second.competition,
+            'similarity': similarity,
+            'players': int(batch.outcomes[i]),
+            'assignment': batch.assignment(i, names, extras=sources[i]),
+            'profit_garanti': round(float(batch.guaranteed_profit[i]), 0),
+            'conversion_rate': round(float(batch.conversion_rate[i]), 1),
+            'gain_vs_best_single': round(float(batch.guaranteed_profit[i] - single_best[i]), 2),
+        })
+    view.sort(key=lambda item: item['conversion_rate'], reverse=True)
+    return view
+
+
+def combine_bookmakers(first: Iterable[Match], second: Iterable[Match],
+                       min_score: float = MIN_SCORE) -> List[dict]:
+    """Rapproche deux listes de matchs et retourne la vue meilleures cotes"""
+    return best_odds_view(MatchResolver(first).resolve(second, min_score))
@@ -2,8 +2,8 @@
 Models communs pour les scrapers de paris sportifs
 Ces classes sont partagées entre tous les bookmakers scrappés
 """
-from dataclasses import dataclass, field
-from typing import List, Optional
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, Iterator, List, Optional
 from datetime import datetime
 
 
@@ -50,6 +50,24 @@ class Match:
         """Taux de conversion en % (profit garanti / mise totale)"""
         return (self.guaranteed_profit / 300) * 100
     
+    def kickoff(self, now: Optional[datetime] = None) -> Optional[datetime]:
+        """Date de début du match d'après `date` ("JJ/MM HH:MM", sans année), None si inconnue
+
+        L'année est celle de la date la plus proche de `now` (matchs de fin/début d'année).
+        """
+        try:
+            parsed = datetime.strptime(self.date.strip(), '%d/%m %H:%M')
+        except ValueError:
+            return None
+        now = now or datetime.now()
+        candidates = []
+        for year in (now.year - 1, now.year, now.year + 1):
+            try:
+                candidates.append(parsed.replace(year=year))
+            except ValueError:  # 29/02 hors année bissextile
+                continue
+        return min(candidates, key=lambda d: abs(d - now), default=None)
+
     def get_assignment(self, num_players: int = 3) -> list:
         """
         Retourne la répartition optimale des paris entre joueurs
@@ -112,6 +130,9 @@ class ScraperResult:
     message: str = ""
     timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
     duration_seconds: float = 0.0
+    page_stats: Dict[str, dict] = field(default_factory=dict)  # Par page: requêtes, octets...
+    peak_rss_mb: float = 0.0  # RSS max de Chrome + chromedriver pendant le scraping (0 sans navigateur)
+    phase_seconds: Dict[str, Dict[str, float]] = field(default_factory=dict)  # {sport ('' : commun): {étape: s}}
     
     @property
     def count(self) -> int:
@@ -125,10 +146,122 @@ class ScraperResult:
             "count": self.count,
             "timestamp": self.timestamp,
             "duration_seconds": round(self.duration_seconds, 2),
+            "page_stats": self.page_stats,
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+            "phase_seconds": {sport: {phase: round(s, 3) for phase, s in phases.items()}
+                              for sport, phases in self.phase_seconds.items()},
             "matches": [m.to_dict() for m in self.matches]
         }
 
 
+class MatchStore:
+    """
+    Ensemble de matchs indexé par (sport, ID normalisé) (doublons détectés en O(1))
+    
+    Les IDs ne contiennent pas le sport : "France - Italie" peut exister en
+    football et en rugby. Index secondaires par sport, compétition et
+    bookmaker. Un upsert d'un match déjà connu remplace l'entrée (les objets
+    Match reçus ne sont jamais modifiés, ils peuvent être partagés).
+    """
+    
+    def __init__(self, matches: Iterable[Match] = ()):
+        self._matches: Dict[tuple, Match] = {}
+        # Index secondaires : valeur -> {clé: None} (ensemble ordonné)
+        self._by_sport: Dict[str, Dict[tuple, None]] = {}
+        self._by_competition: Dict[str, Dict[tuple, None]] = {}
+        self._by_bookmaker: Dict[str, Dict[tuple, None]] = {}
+        self.upsert_many(matches)
+    
+    @staticmethod
+    def normalize_id(match_id: str) -> str:
+        return match_id.strip().lower()
+    
+    @classmethod
+    def key(cls, match_id: str, sport: Optional[str]) -> tuple:
+        return ((sport or '').lower(), cls.normalize_id(match_id))
+    
+    def _index(self, match: Match, key: tuple):
+        self._by_sport.setdefault(match.sport, {})[key] = None
+        self._by_competition.setdefault(match.competition, {})[key] = None
+        self._by_bookmaker.setdefault(match.bookmaker, {})[key] = None
+    
+    def _unindex(self, match: Match, key: tuple):
+        for index, value in ((self._by_sport, match.sport),
+                             (self._by_competition, match.competition),
+                             (self._by_bookmaker, match.bookmaker)):
+            ids = index.get(value)
+            if ids is not None:
+                ids.pop(key, None)
+                if not ids:
+                    del index[value]
+    
+    def upsert(self, match: Match) -> bool:
+        """
+        Ajoute un match ou met à jour les cotes du match existant.
+        
+        Returns:
+            True si le match est nouveau
+        """
+        key = self.key(match.id, match.sport)
+        existing = self._matches.get(key)
+        if existing is None:
+            self._matches[key] = match
+            self._index(match, key)
+            return True
+        
+        if existing is match:
+            return False
+        
+        # Nouvel objet à la place de l'ancien (qui peut appartenir à un cache par sport)
+        self._unindex(existing, key)
+        self._matches[key] = replace(
+            match,
+            competition=match.competition or existing.competition,
+            date=match.date or existing.date,
+            url=match.url or existing.url,
+        )
+        self._index(self._matches[key], key)
+        return False
+    
+    def upsert_many(self, matches: Iterable[Match]) -> int:
+        """Upsert de plusieurs matchs ; retourne le nombre de nouveaux"""
+        return sum(1 for m in matches if self.upsert(m))
+    
+    def remove(self, match_id: str, sport: Optional[str] = None) -> Optional[Match]:
+        key = self.key(match_id, sport)
+        match = self._matches.pop(key, None)
+        if match is not None:
+            self._unindex(match, key)
+        return match
+    
+    def get(self, match_id: str, sport: Optional[str] = None) -> Optional[Match]:
+        return self._matches.get(self.key(match_id, sport))
+    
+    def by_sport(self, sport: str) -> List[Match]:
+        return [self._matches[k] for k in self._by_sport.get(sport, ())]
+    
+    def by_competition(self, competition: str) -> List[Match]:
+        return [self._matches[k] for k in self._by_competition.get(competition, ())]
+    
+    def by_bookmaker(self, bookmaker: str) -> List[Match]:
+        return [self._matches[k] for k in self._by_bookmaker.get(bookmaker, ())]
+    
+    def count_by_sport(self) -> Dict[str, int]:
+        return {sport: len(ids) for sport, ids in self._by_sport.items()}
+    
+    def __contains__(self, match: Match) -> bool:
+        return self.key(match.id, match.sport) in self._matches
+    
+    def __len__(self) -> int:
+        return len(self._matches)
+    
+    def __iter__(self) -> Iterator[Match]:
+        return iter(list(self._matches.values()))
+    
+    def to_list(self) -> List[Match]:
+        return list(self._matches.values())
+
+
 def display_matches(matches: List[Match], limit: int = 20):
     """Affiche les matchs de manière formatée"""
     if not matches:
@@ -2,5 +2,6 @@
 Package PMU Sport - Scraper pour parisportif.pmu.fr
 """
 from .scraper import PMUScraper, get_best_matches, get_matches_as_json
+from .parser import PMUTextParser
 
-__all__ = ['PMUScraper', 'get_best_matches', 'get_matches_as_json']
+__all__ = ['PMUScraper', 'PMUTextParser', 'get_best_matches', 'get_matches_as_json']
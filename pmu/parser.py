@@ -0,0 +1,163 @@
+"""
+Parseur en flux du texte brut des pages PMU Sport
+
+Chaque ligne est classée une seule fois (équipe, cote, "Nul", heure, date...)
+puis passe dans une petite machine à états qui émet les matchs 1X2 et 1-2.
+Le texte peut être fourni d'un bloc (parse) ou par morceaux (feed / close).
+"""
+import re
+from typing import List, Optional, Tuple
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models import Match
+
+
+# Types de lignes
+TEAM, ODDS, NUL, TIME, DATE, OTHER = 'team', 'odds', 'nul', 'time', 'date', 'other'
+
+# Pattern pour détecter les cotes (X,XX ou X.XX)
+ODDS_RE = re.compile(r'^(\d{1,2}[,\.]\d{2})$')
+TIME_RE = re.compile(r'^\d{1,2}h\d{2}$')
+DIGITS_RE = re.compile(r'^\d+$')
+# Date : "AUJOURD'HUI...", "DEMAIN..." en début de ligne, ou un mois entier précédé du jour
+# ("SAMEDI 18 OCTOBRE") ; un mois seul dans un nom d'équipe (Marseille, Mainz) n'en est pas une
+DATE_RE = re.compile(r"^(?:AUJOURD['’]?HUI|DEMAIN)\b|"
+                     r"\b\d{1,2}(?:ER)?\s+(?:JANVIER|FÉVRIER|FEVRIER|MARS|AVRIL|MAI|JUIN|JUILLET|AOÛT|AOUT|"
+                     r"SEPTEMBRE|OCTOBRE|NOVEMBRE|DÉCEMBRE|DECEMBRE)\b")
+NUL_LABELS = frozenset(['nul', 'match nul'])
+SHORT_LABELS = frozenset(['n', '1', '2', 'x'])
+
+
+def classify_line(line: str) -> Tuple[str, object]:
+    """Retourne (type, valeur) pour une ligne déjà nettoyée"""
+    if ODDS_RE.match(line):
+        return ODDS, float(line.replace(',', '.'))
+    lower = line.lower()
+    if lower in NUL_LABELS:
+        return NUL, line
+    if lower in SHORT_LABELS or len(line) <= 2 or DIGITS_RE.match(line):
+        return OTHER, line
+    if TIME_RE.match(line):
+        return TIME, line
+    if DATE_RE.search(line.upper()):
+        return DATE, line
+    return TEAM, line
+
+
+class PMUTextParser:
+    """
+    Machine à états : une cote est rattachée à la ligne qui la précède
+    immédiatement (son libellé).
+
+    - équipe1, cote, Nul, cote, équipe2, cote  → match 1X2
+    - équipe1, cote, équipe2, cote             → match 1-2
+
+    `outcomes` (3 pour une page 1X2, 2 pour une page 1-2) limite les matchs
+    émis à ce type : sur une page 1X2, deux équipes consécutives sans "Nul"
+    sont deux matchs voisins mal découpés, pas un match 1-2.
+    """
+
+    def __init__(self, competition: str, bookmaker: str = "PMU Sport", url: str = "",
+                 outcomes: Optional[int] = None):
+        self.competition = competition
+        self.bookmaker = bookmaker
+        self.url = url
+        self.outcomes = outcomes
+        self.matches: List[Match] = []
+        self._seen_ids = set()
+        self._buffer = ""
+        self._label: Optional[Tuple[str, object]] = None  # Dernière ligne non-cote
+        self._outcomes: List[Tuple[str, object, float]] = []  # (type du libellé, libellé, cote)
+
+    def feed(self, chunk: str) -> List[Match]:
+        """Ajoute un morceau de texte ; retourne les matchs complétés par ce morceau"""
+        self._buffer += chunk
+        lines = self._buffer.split('\n')
+        # La dernière ligne peut être incomplète : on la garde pour le prochain morceau
+        self._buffer = lines.pop()
+        return self._consume(lines)
+
+    def close(self) -> List[Match]:
+        """Termine le flux (traite la dernière ligne en attente)"""
+        lines, self._buffer = [self._buffer], ""
+        return self._consume(lines)
+
+    def parse(self, text: str) -> List[Match]:
+        """Parse un texte complet et retourne tous les matchs"""
+        self.feed(text)
+        self.close()
+        return self.matches
+
+    def _consume(self, lines: List[str]) -> List[Match]:
+        emitted = []
+        for raw in lines:
+            line = raw.strip()
+            if not line:
+                continue
+            kind, value = classify_line(line)
+            if kind != ODDS:
+                self._label = (kind, value)
+                continue
+
+            if self._label is None or self._label[0] not in (TEAM, NUL):
+                # Cote sans libellé exploitable (cotes consécutives, "1", heure...) : séquence cassée
+                self._outcomes = []
+                self._label = None
+                continue
+
+            self._outcomes.append((self._label[0], self._label[1], value))
+            self._label = None
+            match = self._try_emit()
+            if match is not None:
+                emitted.append(match)
+        return emitted
+
+    def _try_emit(self) -> Optional[Match]:
+        outcomes = self._outcomes
+        kinds = [kind for kind, _, _ in outcomes]
+
+        if kinds[0] != TEAM:
+            # Un match commence toujours par l'équipe domicile
+            self._outcomes = []
+            return None
+
+        if kinds == [TEAM, TEAM] and self.outcomes != 3:
+            (_, home, odds1), (_, away, odds2) = outcomes
+            self._outcomes = []
+            return self._emit(home, away, odds1, 1.0, odds2, [odds1, odds2])
+
+        if kinds == [TEAM, NUL, TEAM]:
+            (_, home, odds1), (_, _, odds_n), (_, away, odds2) = outcomes
+            self._outcomes = []
+            return self._emit(home, away, odds1, odds_n, odds2, [odds1, odds_n, odds2])
+
+        if kinds == [TEAM, NUL] and self.outcomes != 2:
+            return None  # Attendre la cote de l'équipe extérieur
+
+        # Séquence inattendue : on repart de la dernière cote si elle peut ouvrir un match
+        last = outcomes[-1]
+        self._outcomes = [last] if last[0] == TEAM else []
+        return None
+
+    def _emit(self, home_team: str, away_team: str, odds_home: float, odds_draw: float,
+              odds_away: float, odds: List[float]) -> Optional[Match]:
+        if not all(1.01 <= o <= 100 for o in odds):
+            return None
+        if home_team == away_team:
+            return None
+
+        # Normalisation ID (indépendant de l'ordre domicile/extérieur)
+        teams_sorted = sorted([home_team.lower().strip(), away_team.lower().strip()])
+        match_id = f"pmu_{teams_sorted[0][:10]}_{teams_sorted[1][:10]}"
+        if match_id in self._seen_ids:
+            return None
+        self._seen_ids.add(match_id)
+
+        match = Match(
+            id=match_id, competition=self.competition, home_team=home_team[:40], away_team=away_team[:40],
+            date="", odds_home=odds_home, odds_draw=odds_draw, odds_away=odds_away,
+            bookmaker=self.bookmaker, url=self.url)
+        self.matches.append(match)
+        return match
@@ -0,0 +1,109 @@
+"""
+Classement complet des matchs d'un bookmaker, avec index triés
+
+Les matchs formatés sont triés une seule fois par taux de conversion ;
+chaque index (sport, compétition, nombre de joueurs) est une liste de
+positions dans ce classement, donc déjà triée. Une requête parcourt
+l'index le plus sélectif à partir du curseur et s'arrête dès que la page
+est pleine ou que le taux passe sous le minimum demandé.
+"""
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+import base64
+import json
+
+
+def sort_key(row: dict) -> Tuple[float, str]:
+    """Ordre du classement : meilleur taux de conversion d'abord, puis id"""
+    return (-row['conversion_rate'], row['id'])
+
+
+def encode_cursor(row: dict) -> str:
+    """Curseur opaque = clé de tri du dernier match renvoyé (reste valable après un rafraîchissement)"""
+    raw = json.dumps([row['conversion_rate'], row['id']], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """Clé de tri d'un curseur (ValueError si invalide)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        conversion_rate, match_id = json.loads(raw)
+        return (-float(conversion_rate), str(match_id))
+    except (TypeError, ValueError) as e:
+        raise ValueError('Curseur invalide') from e
+
+
+class RankedMatches:
+    """Matchs formatés (dicts de l'API) triés une fois, indexés par sport / compétition / joueurs"""
+
+    def __init__(self, rows: List[dict]):
+        self.rows = sorted(rows, key=sort_key)
+        self._keys = [sort_key(row) for row in self.rows]
+        self.by_sport: Dict[str, List[int]] = defaultdict(list)
+        self.by_competition: Dict[str, List[int]] = defaultdict(list)
+        self.by_players: Dict[int, List[int]] = defaultdict(list)
+        # Un seul passage dans l'ordre du classement : chaque index est déjà trié
+        for position, row in enumerate(self.rows):
+            self.by_sport[(row.get('sport') or '').lower()].append(position)
+            self.by_competition[(row.get('competition') or '').lower()].append(position)
+            self.by_players[row['players']].append(position)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def top(self, players: int, limit: int) -> List[dict]:
+        return [self.rows[p] for p in self.by_players.get(players, ())[:limit]]
+
+    def count(self, players: int) -> int:
+        return len(self.by_players.get(players, ()))
+
+    def ranked(self, players: int) -> List[dict]:
+        return [self.rows[p] for p in self.by_players.get(players, ())]
+
+    def query(self, sport: Optional[str] = None, competition: Optional[str] = None,
+              players: Optional[int] = None, min_conversion: Optional[float] = None,
+              cursor: Optional[str] = None, limit: int = 50) -> Tuple[List[dict], Optional[str]]:
+        """
+        Page de matchs filtrés, dans l'ordre du classement.
+
+        Returns:
+            (matchs, curseur de la page suivante ou None)
+        """
+        filters = []
+        if sport:
+            filters.append(self.by_sport.get(sport.lower(), []))
+        if competition:
+            filters.append(self.by_competition.get(competition.lower(), []))
+        if players:
+            filters.append(self.by_players.get(players, []))
+
+        # Index le plus sélectif parcouru, les autres critères vérifiés match par match
+        if filters:
+            postings = min(filters, key=len)
+        else:
+            postings = range(len(self.rows))
+        sport_key = sport.lower() if sport else None
+        competition_key = competition.lower() if competition else None
+
+        start = 0
+        if cursor:
+            after = bisect_right(self._keys, decode_cursor(cursor))
+            start = bisect_right(postings, after - 1) if filters else after
+
+        page = []
+        for i in range(start, len(postings)):
+            row = self.rows[postings[i]]
+            if min_conversion is not None and row['conversion_rate'] < min_conversion:
+                return page, None  # Classement décroissant : plus aucun match ne passe
+            if sport_key and (row.get('sport') or '').lower() != sport_key:
+                continue
+            if competition_key and (row.get('competition') or '').lower() != competition_key:
+                continue
+            if players and row['players'] != players:
+                continue
+            if len(page) == limit:
+                return page, encode_cursor(page[-1])
+            page.append(row)
+        return page, None
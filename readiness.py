@@ -0,0 +1,200 @@
+"""
+Détection de la disponibilité des pages (remplace les time.sleep fixes des scrapers)
+On attend des signaux réels : cotes présentes, nombre de cotes stable, réseau inactif
+"""
+from dataclasses import dataclass
+from typing import List, Optional
+import time
+
+
+# Nombre de nœuds texte ressemblant à une cote (X,XX ou X.XX) dans la page.
+# Pas de innerText (mise en page forcée et copie de tout le texte à chaque sondage) :
+# les nœuds texte sont parcourus avec un TreeWalker, et seulement si un MutationObserver
+# a vu le DOM changer depuis le dernier appel.
+ODDS_TEXT_COUNT_JS = r"""
+if (window.__oddsCount === undefined) {
+    window.__oddsDirty = true;
+    new MutationObserver(() => { window.__oddsDirty = true; })
+        .observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+}
+if (window.__oddsDirty) {
+    window.__oddsDirty = false;
+    const walker = document.createTreeWalker(document.body || document.documentElement, NodeFilter.SHOW_TEXT);
+    let count = 0;
+    while (walker.nextNode()) {
+        if (/^\s*\d{1,2}[,.]\d{2}\s*$/.test(walker.currentNode.data)) count++;
+    }
+    window.__oddsCount = count;
+}
+return window.__oddsCount;
+"""
+
+
+def css_count_js(selector: str) -> str:
+    """Script retournant le nombre d'éléments correspondant au sélecteur CSS"""
+    return f"return document.querySelectorAll({selector!r}).length;"
+
+
+@dataclass
+class ReadinessConfig:
+    """Délais (en secondes) des attentes de disponibilité"""
+    appear_timeout: float = 10.0    # Délai max pour voir apparaître les premières cotes
+    stable_window: float = 0.4      # Durée sans changement du nombre de cotes pour considérer la page rendue
+    stable_timeout: float = 5.0     # Délai max pour la stabilisation
+    network_idle: float = 0.5       # Durée sans requête réseau pour considérer le réseau inactif
+    network_timeout: float = 5.0    # Délai max pour l'inactivité réseau
+    poll_interval: float = 0.1
+
+
+@dataclass
+class ScrollBudget:
+    """Limites du scroll adaptatif (on s'arrête dès que plus rien n'apparaît)"""
+    max_scrolls: int = 25
+    max_seconds: float = 15.0
+    max_elements: int = 5000        # Nombre de cotes au-delà duquel on arrête
+    growth_timeout: float = 1.5     # Attente max de nouvelles cotes après chaque scroll
+    patience: int = 1               # Scrolls consécutifs sans nouvelle cote avant d'arrêter
+
+
+def _count(driver, count_script: str) -> int:
+    try:
+        return int(driver.execute_script(count_script) or 0)
+    except Exception:
+        return 0
+
+
+def wait_for_count(driver, count_script: str, timeout: float, poll: float = 0.1,
+                   minimum: int = 1) -> int:
+    """Attend que le script de comptage retourne au moins `minimum`.
+    Retourne le dernier compte (éventuellement < minimum si le délai est dépassé)."""
+    deadline = time.time() + timeout
+    count = _count(driver, count_script)
+    while count < minimum and time.time() < deadline:
+        time.sleep(poll)
+        count = _count(driver, count_script)
+    return count
+
+
+def wait_for_stable_count(driver, count_script: str, window: float, timeout: float,
+                          poll: float = 0.1) -> int:
+    """Attend que le compte ne change plus pendant `window` secondes (ou le délai max)"""
+    deadline = time.time() + timeout
+    count = _count(driver, count_script)
+    stable_since = time.time()
+    while time.time() < deadline:
+        time.sleep(poll)
+        new_count = _count(driver, count_script)
+        if new_count != count:
+            count = new_count
+            stable_since = time.time()
+        elif time.time() - stable_since >= window:
+            break
+    return count
+
+
+# Ressources chargées par le document courant (Resource Timing). Un PerformanceObserver
+# compte les suivantes : le tampon de performance.getEntries est limité à 250 entrées.
+RESOURCE_COUNT_JS = """
+if (window.__resourceCount === undefined) {
+    window.__resourceCount = performance.getEntriesByType('resource').length;
+    new PerformanceObserver(list => { window.__resourceCount += list.getEntries().length; })
+        .observe({type: 'resource'});
+}
+return window.__resourceCount;
+"""
+
+
+def _resource_count(driver) -> Optional[int]:
+    try:
+        return int(driver.execute_script(RESOURCE_COUNT_JS))
+    except Exception:
+        return None
+
+
+def wait_for_network_idle(driver, idle: float, timeout: float, poll: float = 0.1) -> bool:
+    """
+    Attend qu'aucune nouvelle ressource ne se charge pendant `idle` secondes.
+
+    Basé sur Resource Timing, propre à l'onglet courant (correct en mode
+    multi-onglets) et sans journal réseau à faire tamponner par chromedriver.
+    """
+    deadline = time.time() + timeout
+    last_activity = time.time()
+    last_resources = _resource_count(driver)
+
+    while time.time() < deadline:
+        resources = _resource_count(driver)
+        if resources != last_resources:
+            last_resources = resources
+            last_activity = time.time()
+        if time.time() - last_activity >= idle:
+            return True
+        time.sleep(poll)
+    return False
+
+
+def wait_until_ready(driver, count_script: str, config: ReadinessConfig,
+                     started_at: Optional[float] = None) -> int:
+    """
+    Attend qu'une page de cotes soit rendue.
+
+    1. Les premières cotes apparaissent (sinon on se rabat sur l'inactivité réseau)
+    2. Leur nombre reste stable pendant `stable_window`
+
+    Args:
+        count_script: Script JS retournant le nombre de cotes affichées
+        started_at: Début du chargement (mode onglets : le temps déjà écoulé est décompté)
+
+    Returns:
+        Nombre de cotes présentes
+    """
+    elapsed = time.time() - started_at if started_at else 0
+    count = wait_for_count(driver, count_script, max(0, config.appear_timeout - elapsed),
+                           config.poll_interval)
+    if count == 0:
+        wait_for_network_idle(driver, config.network_idle, config.network_timeout,
+                              config.poll_interval)
+        return _count(driver, count_script)
+
+    return wait_for_stable_count(driver, count_script, config.stable_window,
+                                 config.stable_timeout, config.poll_interval)
+
+
+def adaptive_scroll(driver, count_script: str, budget: ScrollBudget,
+                    config: ReadinessConfig) -> List[int]:
+    """
+    Scrolle jusqu'en bas tant que de nouvelles cotes apparaissent.
+
+    Après chaque scroll on attend que le compte augmente (au plus
+    `growth_timeout`), puis qu'il se stabilise. On s'arrête quand il
+    n'augmente plus ou que le budget (scrolls, temps, éléments) est épuisé.
+
+    Returns:
+        Nombre de cotes ajoutées par chaque scroll
+    """
+    started = time.time()
+    count = _count(driver, count_script)
+    added = []
+    idle = 0
+
+    while (len(added) < budget.max_scrolls and count < budget.max_elements
+           and time.time() - started < budget.max_seconds):
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        remaining = budget.max_seconds - (time.time() - started)
+        new_count = wait_for_count(driver, count_script, min(budget.growth_timeout, max(0, remaining)),
+                                   config.poll_interval, minimum=count + 1)
+        if new_count > count:
+            # Laisser finir le lot en cours de rendu
+            new_count = wait_for_stable_count(driver, count_script, config.stable_window,
+                                              config.stable_timeout, config.poll_interval)
+        added.append(max(0, new_count - count))
+
+        if new_count <= count:
+            idle += 1
+            if idle >= budget.patience:
+                break
+        else:
+            idle = 0
+            count = new_count
+
+    return added
@@ -0,0 +1,152 @@
+"""
+Planificateur de rafraîchissement en arrière-plan
+
+Chaque tâche retourne la date d'expiration de ses données : elle est relancée
+un peu avant (avance + gigue aléatoire), avec un nombre limité de tâches
+simultanées et un recul exponentiel en cas d'erreur.
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+import random
+import threading
+import time
+
+
+@dataclass
+class ScheduledJob:
+    """État d'une tâche planifiée"""
+    name: str
+    func: Callable[[], Optional[float]]  # Retourne la date d'expiration des données, None en cas d'échec
+    next_run: float = 0.0
+    running: bool = False
+    runs: int = 0
+    failures: int = 0              # Échecs consécutifs
+    last_run: Optional[float] = None
+    last_duration: Optional[float] = None
+    last_error: Optional[str] = None
+
+
+class RefreshScheduler:
+    """
+    Thread unique qui lance les tâches arrivées à échéance.
+
+    Les tâches tournent dans leurs propres threads, au plus `max_concurrent`
+    à la fois ; une tâche en attente de place est lancée au tick suivant.
+    """
+
+    def __init__(self, lead: float = 60.0, jitter: float = 30.0, max_concurrent: int = 2,
+                 backoff_base: float = 30.0, backoff_max: float = 1800.0,
+                 min_interval: float = 30.0, tick: float = 1.0):
+        """
+        Args:
+            lead: Avance (s) prise sur l'expiration des données
+            jitter: Avance supplémentaire aléatoire (s), pour ne pas tout relancer en même temps
+            max_concurrent: Nombre max de tâches simultanées
+            backoff_base: Délai (s) après le premier échec, doublé à chaque échec consécutif
+            backoff_max: Délai max (s) entre deux essais en échec
+            min_interval: Délai min (s) entre deux exécutions réussies d'une même tâche
+            tick: Période (s) de vérification des échéances
+        """
+        self.lead = lead
+        self.jitter = jitter
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.min_interval = min_interval
+        self.tick = tick
+        self._jobs: Dict[str, ScheduledJob] = {}
+        self._slots = threading.Semaphore(max_concurrent)
+        self._max_concurrent = max_concurrent
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_job(self, name: str, func: Callable[[], Optional[float]], delay: float = 0.0):
+        """Ajoute une tâche, première exécution dans `delay` secondes"""
+        with self._lock:
+            self._jobs[name] = ScheduledJob(name=name, func=func, next_run=time.time() + delay)
+
+    def run_soon(self, name: str):
+        """Avance la prochaine exécution d'une tâche à maintenant"""
+        with self._lock:
+            if name in self._jobs:
+                self._jobs[name].next_run = time.time()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='refresh-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            now = time.time()
+            with self._lock:
+                due = sorted((job for job in self._jobs.values() if not job.running and job.next_run <= now),
+                             key=lambda job: job.next_run)
+            for job in due:
+                if not self._slots.acquire(blocking=False):
+                    break  # Limite atteinte : les autres attendront le tick suivant
+                job.running = True
+                threading.Thread(target=self._run, args=(job,), name=f'refresh-{job.name}',
+                                 daemon=True).start()
+            self._stop.wait(self.tick)
+
+    def _run(self, job: ScheduledJob):
+        started = time.time()
+        expires_at, error = None, None
+        try:
+            expires_at = job.func()
+            if expires_at is None:
+                error = 'aucune donnée'
+        except Exception as e:
+            error = str(e)[:200]
+        finally:
+            self._slots.release()
+
+        now = time.time()
+        with self._lock:
+            job.runs += 1
+            job.last_run = started
+            job.last_duration = round(now - started, 1)
+            job.last_error = error
+            if error is None:
+                job.failures = 0
+                next_run = expires_at - self.lead - random.uniform(0, self.jitter)
+                job.next_run = max(next_run, now + self.min_interval)
+            else:
+                job.failures += 1
+                delay = min(self.backoff_base * 2 ** (job.failures - 1), self.backoff_max)
+                job.next_run = now + delay * random.uniform(1, 1.25)
+                print(f"⚠️ Rafraîchissement {job.name} en échec ({job.failures}x), "
+                      f"nouvel essai dans {delay:.0f}s : {error}")
+            job.running = False
+
+    def stats(self) -> dict:
+        """Prochaines exécutions et dernières durées, pour /api/status"""
+        now = time.time()
+        with self._lock:
+            jobs = {
+                job.name: {
+                    'running': job.running,
+                    'next_run_in': max(0, round(job.next_run - now, 0)),
+                    'runs': job.runs,
+                    'failures': job.failures,
+                    'last_run_age': round(now - job.last_run, 0) if job.last_run else None,
+                    'last_duration': job.last_duration,
+                    'last_error': job.last_error,
+                }
+                for job in self._jobs.values()
+            }
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'max_concurrent': self._max_concurrent,
+            'lead_seconds': self.lead,
+            'jobs': jobs,
+        }
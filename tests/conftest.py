@@ -0,0 +1,38 @@
+"""
+Configuration commune des tests
+
+L'application est importée sans navigateur ni fichiers : pas de process worker,
+pas de cache SQLite ni d'historique sur disque, pas de pool de drivers.
+"""
+import os
+import sys
+
+os.environ.setdefault('SCRAPER_ISOLATION', '0')
+os.environ.setdefault('CACHE_DB', '')
+os.environ.setdefault('HISTORY_FILE', '')
+os.environ.setdefault('DRIVER_POOL_SIZE', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from models import Match
+
+
+def build_match(**fields) -> Match:
+    """Match de test : valeurs par défaut remplacées par `fields` (id dérivé des équipes)"""
+    values = dict(competition='Ligue', home_team='A', away_team='B', date='', odds_home=2.0,
+                  odds_draw=3.2, odds_away=3.5, bookmaker='PMU Sport', sport='Football')
+    values.update(fields)
+    values.setdefault('id', f"{values['home_team']}_{values['away_team']}".lower().replace(' ', '_'))
+    return Match(**values)
+
+
+@pytest.fixture
+def make_match():
+    return build_match
+
+
+@pytest.fixture
+def client():
+    import app as app_module
+    return app_module.app.test_client()
@@ -0,0 +1,27 @@
+"""
+/api/calculate : validation des entrées (booléens refusés comme nombres)
+"""
+import pytest
+
+
+@pytest.fixture
+def calculate(client):
+    def post(**payload):
+        return client.post('/api/calculate', json=dict({'odds': [[2.0, 3.2, 3.5]]}, **payload))
+    return post
+
+
+@pytest.mark.parametrize('payload', [
+    {'players': True}, {'players': False}, {'players': 1}, {'players': 4}, {'players': 3.0},
+    {'freebet': True}, {'freebet': '100'}, {'freebet': -1},
+    {'stakes': [True, 10]}, {'stakes': ['10']}, {'stakes': [10] * 11},
+])
+def test_invalid_inputs_are_rejected(calculate, payload):
+    assert calculate(**payload).status_code == 400
+
+
+@pytest.mark.parametrize('payload', [{}, {'players': 2}, {'players': 3}, {'freebet': 50.5}, {'stakes': [50, 100]}])
+def test_valid_inputs(calculate, payload):
+    response = calculate(**payload)
+    assert response.status_code == 200
+    assert response.get_json()['count'] == 1
@@ -0,0 +1,41 @@
+"""
+/api/combined : vue calculée à la mise à jour des matchs, pas à chaque requête
+"""
+import pytest
+
+import app as app_module
+from models import MatchStore
+
+
+@pytest.fixture
+def client(client, make_match, monkeypatch):
+    stores = {'pmu': MatchStore(), 'winamax': MatchStore()}
+    for home, away, odds in (('Lyon', 'Lens', 2.0), ('Nantes', 'Brest', 2.4), ('Nice', 'Metz', 2.8)):
+        stores['pmu'].upsert(make_match(home_team=home, away_team=away, odds_home=odds))
+        stores['winamax'].upsert(make_match(home_team=home, away_team=away, odds_home=odds + 0.1,
+                                            bookmaker='Winamax'))
+    monkeypatch.setattr(app_module, '_match_stores', stores)
+    monkeypatch.setattr(app_module, '_combined_view', None)
+    calls = []
+    combine = app_module.combine_bookmakers
+    monkeypatch.setattr(app_module, 'combine_bookmakers', lambda *args: calls.append(1) or combine(*args))
+    app_module.update_combined_view()
+    yield client, calls
+
+
+def test_combined_view_is_not_recomputed_per_request(client):
+    client, calls = client
+    first = client.get('/api/combined')
+    second = client.get('/api/combined?limit=2')
+
+    assert first.get_json()['count'] == 3
+    assert len(first.get_json()['matches_3p']) == 3
+    assert len(second.get_json()['matches_3p']) == 2
+    assert calls == [1]
+
+
+def test_combined_limit_must_be_positive(client):
+    client, _ = client
+    assert client.get('/api/combined?limit=0').status_code == 400
+    assert client.get('/api/combined?limit=-1').status_code == 400
+    assert len(client.get('/api/combined?limit=1').get_json()['matches_3p']) == 1
@@ -0,0 +1,36 @@
+"""
+/api/scrape : le corps pré-encodé est le même pour HIT et MISS, l'état est dans X-Cache
+"""
+import time
+
+import pytest
+
+import app as app_module
+
+
+VIEW = {'bookmaker': 'PMU Sport', 'from_cache': False, 'matches_3p': [], 'matches_2p': [],
+        'count_3p': 0, 'count_2p': 0}
+
+
+@pytest.fixture
+def client(client, monkeypatch):
+    monkeypatch.setattr(app_module, '_cache_store', None)
+    app_module._cache.pop('pmu_all', None)
+    yield client
+    app_module._cache.pop('pmu_all', None)
+
+
+def test_miss_then_hit_share_body_without_from_cache(client, monkeypatch):
+    def fake_scrape(bookmaker, **kwargs):
+        app_module.set_cache_data(f"{bookmaker}_all", VIEW, expires_at=time.time() + 60)
+        return VIEW
+    monkeypatch.setattr(app_module, 'scrape_bookmaker', fake_scrape)
+
+    miss = client.get('/api/scrape/pmu')
+    hit = client.get('/api/scrape/pmu')
+
+    assert miss.headers['X-Cache'] == 'MISS'
+    assert hit.headers['X-Cache'] == 'HIT'
+    assert 'from_cache' not in miss.get_json()
+    assert miss.get_json() == hit.get_json()
+    assert miss.headers['ETag'] == hit.headers['ETag']
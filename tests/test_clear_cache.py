@@ -0,0 +1,27 @@
+"""
+/api/clear-cache : vide aussi les index de matchs, les classements et la vue combinée
+"""
+import app as app_module
+from models import MatchStore
+from rankings import RankedMatches
+
+
+def test_clear_cache_resets_match_stores_rankings_and_combined_view(client, make_match, monkeypatch):
+    stores = {'pmu': MatchStore(), 'winamax': MatchStore()}
+    stores['pmu'].upsert(make_match(home_team='Lyon', away_team='Lens'))
+    stores['winamax'].upsert(make_match(home_team='Lyon', away_team='Lens', bookmaker='Winamax'))
+    rankings = {bm: RankedMatches(app_module.format_match_rows(store.to_list())) for bm, store in stores.items()}
+    monkeypatch.setattr(app_module, '_match_stores', stores)
+    monkeypatch.setattr(app_module, '_rankings', rankings)
+    monkeypatch.setattr(app_module, '_cache_store', None)
+    monkeypatch.setattr(app_module._scheduler, 'run_soon', lambda bm: None)
+    app_module.update_combined_view()
+    assert client.get('/api/matches?bookmaker=pmu').get_json()['total'] == 1
+    assert client.get('/api/combined').get_json()['count'] == 1
+
+    assert client.get('/api/clear-cache').get_json() == {'status': 'ok'}
+
+    assert client.get('/api/matches?bookmaker=pmu').get_json()['total'] == 0
+    assert client.get('/api/matches?bookmaker=winamax').get_json()['total'] == 0
+    combined = client.get('/api/combined').get_json()
+    assert (combined['count'], combined['count_pmu'], combined['count_winamax']) == (0, 0, 0)
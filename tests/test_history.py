@@ -0,0 +1,56 @@
+"""
+OddsHistory : requêtes par intervalle, table d'internement (sport, id)
+"""
+import pytest
+
+from history import OddsHistory
+
+
+@pytest.fixture
+def observation(make_match):
+    """Cotes du match m{i} chez un bookmaker"""
+    def build(i, odds, bookmaker='PMU'):
+        return make_match(id=f'm{i}', home_team=f'H{i}', odds_home=odds, bookmaker=bookmaker)
+    return build
+
+
+def test_trajectory_range_follows_timestamps(observation):
+    history = OddsHistory()
+    for step in range(10):
+        history.record([observation(1, 1.5 + step / 10), observation(2, 2.0 + step / 10)],
+                       timestamp=1000 + step * 60)
+
+    points = history.trajectory('m1', start=1120, end=1300)['series']['PMU']
+    assert points['t'] == [1120, 1180, 1240, 1300]
+    assert points['home'] == [1.7, 1.8, 1.9, 2.0]
+    assert history.trajectory('m1', start=2000)['series'] == {}
+
+
+def test_compact_forgets_matches_without_rows(observation):
+    history = OddsHistory(full_resolution=100, bucket=10, retention=1000)
+    history.record([observation(i, 1.5) for i in range(5)], timestamp=1)
+    history.record([observation(i, 1.6, 'Winamax') for i in range(5, 8)], timestamp=5000)
+
+    assert history.compact(now=5050) == 5
+    assert history.stats()['matches'] == 3
+    assert history.trajectory('m0') is None
+    assert history.trajectory('m6')['series']['Winamax']['home'] == [1.6]
+
+
+def test_same_id_in_two_sports_keeps_two_series(observation, make_match, tmp_path):
+    history = OddsHistory()
+    football = observation(1, 1.5)
+    tennis = make_match(id='m1', competition='ATP', home_team='Sinner', away_team='Alcaraz',
+                        odds_home=1.8, odds_draw=1.0, odds_away=2.0, bookmaker='PMU', sport='Tennis')
+    history.record([football, tennis], timestamp=1000)
+
+    with pytest.raises(ValueError):
+        history.trajectory('m1')
+    assert history.trajectory('m1', sport='Football')['series']['PMU']['home'] == [1.5]
+    assert history.trajectory('m1', sport='tennis')['home_team'] == 'Sinner'
+
+    path = str(tmp_path / 'history.bin')
+    history.save(path)
+    reloaded = OddsHistory()
+    assert reloaded.load(path)
+    assert reloaded.trajectory('m1', sport='Tennis')['series']['PMU']['home'] == [1.8]
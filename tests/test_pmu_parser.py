@@ -0,0 +1,40 @@
+"""
+PMUTextParser : dates, noms d'équipes contenant un mois, pages 1X2 / 1-2
+"""
+import pytest
+
+from pmu.parser import DATE, TEAM, PMUTextParser, classify_line
+
+
+def odds_of(matches):
+    return [(m.home_team, m.away_team, m.odds_home, m.odds_draw, m.odds_away) for m in matches]
+
+
+@pytest.mark.parametrize('line', ['Marseille', 'Mainz 05', 'Jamaica', 'Junior', 'Maidenhead'])
+def test_team_names_containing_a_month_are_teams(line):
+    assert classify_line(line)[0] == TEAM
+
+
+@pytest.mark.parametrize('line', ['Samedi 18 octobre', '1er mai', "AUJOURD'HUI", 'Demain 21h00'])
+def test_date_lines(line):
+    assert classify_line(line)[0] == DATE
+
+
+@pytest.mark.parametrize('outcomes', [None, 3])
+def test_1x2_page_with_month_like_team_names(outcomes):
+    text = "Marseille\n2,10\nNul\n3,20\nPSG\n3,40\nLyon\n1,90\nNul\n3,50\nLens\n4,00"
+    matches = PMUTextParser('Football', outcomes=outcomes).parse(text)
+    assert odds_of(matches) == [('Marseille', 'PSG', 2.1, 3.2, 3.4), ('Lyon', 'Lens', 1.9, 3.5, 4.0)]
+
+
+def test_1x2_page_never_emits_two_way_matches():
+    # "Nul" manquant : deux équipes voisines ne forment pas un match 1-2
+    text = "Nantes\n2,10\nRennes\n3,40\nLyon\n1,90\nNul\n3,50\nLens\n4,00"
+    matches = PMUTextParser('Football', outcomes=3).parse(text)
+    assert odds_of(matches) == [('Lyon', 'Lens', 1.9, 3.5, 4.0)]
+
+
+def test_two_way_page():
+    text = "Sinner\n1,50\nAlcaraz\n2,50\nMainz 05\n1,80\nJamaica\n2,00"
+    matches = PMUTextParser('Tennis', outcomes=2).parse(text)
+    assert odds_of(matches) == [('Sinner', 'Alcaraz', 1.5, 1.0, 2.5), ('Mainz 05', 'Jamaica', 1.8, 1.0, 2.0)]
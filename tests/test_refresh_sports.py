@@ -0,0 +1,130 @@
+"""
+Pages sport en échec dans refresh_sports : nouvel essai après FAILED_SPORT_RETRY
+"""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as app_module
+from models import ScraperResult
+
+
+class FakeScraper:
+    """Scraper sans navigateur : renvoie les matchs de `pages`"""
+    BOOKMAKER_NAME = 'PMU'
+    SPORTS_1X2 = {'Football': '/football'}
+    SPORTS_1_2 = {'Tennis': '/tennis'}
+    pages = {}
+    status = 'success'
+
+    def __init__(self, **kwargs):
+        pass
+
+    def scrape(self, sports=None, on_page=None):
+        matches = [m for sport in sports for m in self.pages.get(sport, [])]
+        return ScraperResult(matches=matches, bookmaker=self.BOOKMAKER_NAME, status=self.status)
+
+
+@pytest.fixture
+def fake_pmu(monkeypatch):
+    monkeypatch.setitem(app_module.SCRAPERS, 'pmu', FakeScraper)
+    monkeypatch.setattr(app_module, 'SCRAPER_ISOLATION', False)
+    monkeypatch.setattr(app_module, '_cache_store', None)
+    monkeypatch.setattr(app_module, 'record_history', lambda matches: None)
+    persisted = []
+    monkeypatch.setattr(app_module, 'persist_sport', lambda bm, sport: persisted.append((bm, sport)))
+    for sport in ('Football', 'Tennis'):
+        app_module._sport_cache.pop(('pmu', sport), None)
+    yield persisted
+    for sport in ('Football', 'Tennis'):
+        app_module._sport_cache.pop(('pmu', sport), None)
+
+
+def retry_at(sport):
+    """Date à laquelle le sport sera considéré comme expiré"""
+    return app_module.sport_expires_at('pmu', sport)
+
+
+def test_empty_page_on_cold_start_is_retried_and_not_persisted(make_match, fake_pmu, monkeypatch):
+    monkeypatch.setattr(FakeScraper, 'pages', {'Football': [make_match(sport='Football')]})
+    before = time.time()
+    app_module.refresh_sports('pmu', ['Football', 'Tennis'])
+
+    assert app_module._sport_cache[('pmu', 'Tennis')]['matches'] == []
+    assert retry_at('Tennis') <= time.time() + app_module.FAILED_SPORT_RETRY
+    assert 'Tennis' in app_module.stale_sports('pmu', ahead=app_module.FAILED_SPORT_RETRY + 1)
+    # Football est valide pour son TTL complet et seul lui est écrit sur disque
+    assert retry_at('Football') >= before + app_module.sport_ttl('Football')
+    assert fake_pmu == [('pmu', 'Football')]
+
+
+def test_empty_page_keeps_previous_odds_and_is_retried(make_match, fake_pmu, monkeypatch):
+    monkeypatch.setattr(FakeScraper, 'pages', {'Tennis': [make_match(sport='Tennis')]})
+    app_module.refresh_sports('pmu', ['Tennis'])
+    previous = app_module._sport_cache[('pmu', 'Tennis')]['matches']
+
+    monkeypatch.setattr(FakeScraper, 'pages', {})
+    app_module.refresh_sports('pmu', ['Tennis'])
+
+    assert app_module._sport_cache[('pmu', 'Tennis')]['matches'] == previous
+    assert retry_at('Tennis') <= time.time() + app_module.FAILED_SPORT_RETRY
+    assert fake_pmu == [('pmu', 'Tennis'), ('pmu', 'Tennis')]
+
+
+def retry_delay(sport):
+    """Délai avant le prochain essai d'un sport qui vient d'être scrapé"""
+    return retry_at(sport) - time.time()
+
+
+def test_empty_pages_back_off_up_to_ttl(fake_pmu, monkeypatch):
+    monkeypatch.setattr(FakeScraper, 'pages', {})
+    delays = []
+    for _ in range(6):
+        app_module.refresh_sports('pmu', ['Tennis'])
+        delays.append(round(retry_delay('Tennis')))
+
+    retry = app_module.FAILED_SPORT_RETRY
+    assert delays == [retry, 2 * retry, 4 * retry, 8 * retry] + [app_module.sport_ttl('Tennis')] * 2
+
+
+def test_failed_scrape_retries_soon_without_backoff(fake_pmu, monkeypatch):
+    monkeypatch.setattr(FakeScraper, 'pages', {})
+    monkeypatch.setattr(FakeScraper, 'status', 'error')
+    for _ in range(3):
+        app_module.refresh_sports('pmu', ['Tennis'])
+        assert round(retry_delay('Tennis')) == app_module.FAILED_SPORT_RETRY
+    assert app_module._sport_cache[('pmu', 'Tennis')]['empty_streak'] == 0
+
+
+def test_empty_page_drops_started_and_too_old_matches(make_match, fake_pmu, monkeypatch):
+    started = (datetime.now() - timedelta(hours=1)).strftime('%d/%m %H:%M')
+    upcoming = (datetime.now() + timedelta(hours=2)).strftime('%d/%m %H:%M')
+    monkeypatch.setattr(FakeScraper, 'pages', {'Football': [make_match(sport='Football', date=started)],
+                                               'Tennis': [make_match(sport='Tennis', date=upcoming)]})
+    app_module.refresh_sports('pmu', ['Football', 'Tennis'])
+
+    monkeypatch.setattr(FakeScraper, 'pages', {})
+    app_module.refresh_sports('pmu', ['Football', 'Tennis'])
+    assert app_module._sport_cache[('pmu', 'Football')]['matches'] == []
+    assert len(app_module._sport_cache[('pmu', 'Tennis')]['matches']) == 1
+
+    app_module._sport_cache[('pmu', 'Tennis')]['scraped_at'] -= app_module.MAX_STALENESS + 1
+    app_module.refresh_sports('pmu', ['Tennis'])
+    assert app_module._sport_cache[('pmu', 'Tennis')]['matches'] == []
+
+
+def test_history_file_is_saved_periodically_not_per_refresh(make_match, monkeypatch, tmp_path):
+    saves = []
+    monkeypatch.setattr(app_module, 'HISTORY_FILE', str(tmp_path / 'history.bin'))
+    monkeypatch.setattr(app_module._history, 'save', lambda path: saves.append(path))
+    monkeypatch.setattr(app_module, '_history_saved_at', time.time())
+    monkeypatch.setattr(app_module, '_history_compacted_at', time.time())
+
+    for _ in range(3):
+        app_module.record_history([make_match(sport='Football')])
+    assert saves == []
+
+    monkeypatch.setattr(app_module, '_history_saved_at', time.time() - app_module.HISTORY_SAVE_INTERVAL - 1)
+    app_module.record_history([make_match(sport='Football')])
+    assert len(saves) == 1
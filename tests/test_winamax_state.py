@@ -0,0 +1,30 @@
+"""
+WinamaxScraper._extract_from_state : repli DOM immédiat si l'état préchargé est absent
+"""
+import time
+
+from readiness import ReadinessConfig
+from winamax.scraper import WinamaxScraper
+from winamax.state import STATE_ABSENT, STATE_READY_JS
+
+
+class FakeDriver:
+    """Driver dont la page est analysée mais sans window.PRELOADED_STATE"""
+    current_url = 'https://www.winamax.fr/paris-sportifs/sports/1'
+
+    def __init__(self):
+        self.scripts = []
+
+    def execute_script(self, script):
+        self.scripts.append(script)
+        return STATE_ABSENT if script == STATE_READY_JS else None
+
+
+def test_missing_state_does_not_wait_for_appear_timeout():
+    scraper = WinamaxScraper(readiness=ReadinessConfig(appear_timeout=5.0))
+    scraper.driver = FakeDriver()
+
+    started = time.time()
+    assert scraper._extract_from_state('Football', '/paris-sportifs/sports/1', started) == []
+    assert time.time() - started < 1.0
+    assert scraper.driver.scripts == [STATE_READY_JS]
@@ -0,0 +1,253 @@
+"""
+Benchmark du parseur Winamax : parseur en un seul passage vs ancienne implémentation
+
+Usage:
+    RECORD_DIR=pages python winamax/scraper.py     # enregistre des pages réelles
+    python tools/bench_winamax_parser.py pages/winamax_*.html
+    python tools/bench_winamax_parser.py           # page synthétique si aucun fichier
+"""
+import os
+import re
+import sys
+import time
+import argparse
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bs4 import BeautifulSoup
+from models import Match
+from winamax.scraper import WinamaxScraper
+
+
+class LegacyWinamaxScraper(WinamaxScraper):
+    """Copie figée de l'ancien parseur (re-sélection par grand-parent, double get_text)"""
+    
+    def _parse_matches_with_bs4(self, soup: BeautifulSoup, competition: str) -> List[Match]:
+        """Parse les matchs avec BeautifulSoup - adapté à la structure Winamax"""
+        matches = []
+        
+        # Winamax utilise la classe bet-group-outcome-odd pour les boutons de cotes
+        bet_buttons = soup.select('.bet-group-outcome-odd')
+        
+        if not bet_buttons:
+            # Fallback: chercher par classe contenant "odd"
+            bet_buttons = soup.select('[class*="odd-button"]')
+        
+        print(f"    (trouvé {len(bet_buttons)} boutons de cotes)")
+        
+        # Les cotes sont groupées par 3 (1, N, 2)
+        # Remonter de 2 niveaux pour trouver le conteneur des 3 cotes
+        processed_grandparents = set()
+        
+        for bet_btn in bet_buttons:
+            # Remonter de 2 niveaux (parent puis grand-parent)
+            parent = bet_btn.parent
+            if parent:
+                grandparent = parent.parent
+                if grandparent and id(grandparent) not in processed_grandparents:
+                    # Vérifier si le grand-parent contient exactement 2 ou 3 éléments de cotes
+                    odds_in_grandparent = grandparent.select('.bet-group-outcome-odd')
+                    
+                    if len(odds_in_grandparent) in [2, 3]:
+                        processed_grandparents.add(id(grandparent))
+                        
+                        # Extraire le texte complet du grand-parent
+                        match = self._parse_match_from_bet_group(grandparent, competition)
+                        if match:
+                            matches.append(match)
+        
+        return matches
+    
+    def _parse_match_from_bet_group(self, elem, competition: str) -> Optional[Match]:
+        """Parse un groupe de paris pour extraire le match"""
+        try:
+            # Récupérer le texte avec séparateurs
+            text = elem.get_text('|', strip=True)
+            
+            if not text or len(text) < 10:
+                return None
+            
+            # Pattern Winamax: "XXX|Équipe1|cote1|Match nul|cote2|Équipe2|cote3"
+            # ou parfois: "Équipe1|cote1|N|cote2|Équipe2|cote3"
+            
+            parts = [p.strip() for p in text.split('|') if p.strip()]
+            
+            # Trouver les cotes (format X,XX ou X.XX)
+            odds_pattern = r'^(\d{1,2}[,\.]\d{1,2})$'
+            
+            odds_indices = []
+            for i, part in enumerate(parts):
+                if re.match(odds_pattern, part):
+                    odds_indices.append(i)
+            
+            if len(odds_indices) < 2:
+                return None
+            
+            # Les 2 ou 3 premières cotes trouvées
+            odds_values = []
+            for idx in odds_indices[:3]:
+                val = float(parts[idx].replace(',', '.'))
+                if 1.01 <= val <= 100:
+                    odds_values.append(val)
+            
+            if len(odds_values) not in [2, 3]:
+                return None
+            
+            if len(odds_values) == 3:
+                odds_home = odds_values[0]
+                odds_draw = odds_values[1]
+                odds_away = odds_values[2]
+            else:
+                odds_home = odds_values[0]
+                odds_draw = 1.0  # Pas de nul
+                odds_away = odds_values[1]
+            
+            # Trouver les équipes
+            # Pattern Winamax 3 issues: "index|équipe1|cote1|Match nul|cote2|équipe2|cote3"
+            # Pattern Winamax 2 issues: "index|équipe1|cote1|équipe2|cote2"
+            
+            first_odds_idx = odds_indices[0]
+            # Pour 2 issues, la 2ème cote est à l'index 1
+            last_odds_idx = odds_indices[2] if len(odds_indices) >= 3 else odds_indices[1]
+            
+            # Équipe domicile: juste avant la 1ère cote
+            home_team = None
+            for i in range(first_odds_idx - 1, -1, -1):
+                candidate = parts[i]
+                # Ignorer "Match nul", "N", les nombres seuls, et les pourcentages
+                if candidate.lower() not in ['match nul', 'n', 'nul', '1', '2', 'x']:
+                    if not re.match(r'^[\d,\.%]+$', candidate):  # Exclure aussi les %
+                        if len(candidate) > 2:  # Un nom d'équipe a au moins 3 caractères
+                            home_team = candidate
+                            break
+            
+            # Équipe extérieur: ENTRE la 1ère et dernière cote utilisée
+            # Pour 3 issues: entre cote 2 et cote 3
+            # Pour 2 issues: entre cote 1 et cote 2
+            away_team = None
+            
+            if len(odds_values) == 3:
+                start_search = odds_indices[1] + 1
+                end_search = odds_indices[2]
+            else:
+                start_search = odds_indices[0] + 1
+                end_search = odds_indices[1]
+
+            for i in range(start_search, end_search):
+                candidate = parts[i]
+                if candidate.lower() not in ['match nul', 'n', 'nul', '1', '2', 'x']:
+                    if not re.match(r'^[\d,\.%]+$', candidate):  # Exclure aussi les %
+                        if len(candidate) > 2:  # Un nom d'équipe a au moins 3 caractères
+                            away_team = candidate
+                            break
+            
+            if not home_team or not away_team:
+                return None
+            
+            # Nettoyer les noms d'équipes
+            home_team = home_team[:40].strip()
+            away_team = away_team[:40].strip()
+            
+            if home_team == away_team or len(home_team) < 2 or len(away_team) < 2:
+                return None
+            
+            # Normalisation pour l'ID unique (gestion A vs B / B vs A et clean noms)
+            def clean_name(name):
+                # Enlever les virgules inversées "Nom, Prénom" -> "Prénom Nom"
+                if ',' in name:
+                    parts = name.split(',')
+                    if len(parts) == 2:
+                        return f"{parts[1].strip()} {parts[0].strip()}".lower()
+                return name.lower().replace(',', '').strip()
+            
+            h_clean = clean_name(home_team)
+            a_clean = clean_name(away_team)
+            
+            # ID indépendant de l'ordre domicile/extérieur
+            teams_sorted = sorted([h_clean, a_clean])
+            match_id = f"winamax_{teams_sorted[0][:10]}_{teams_sorted[1][:10]}"
+            
+            # Détection et exclusion explicite des paris "Set" ou "Jeu" ou "Point" dans le texte
+            # (Heuristique simple: si le texte original contient ces mots, c'est probablement pas le vainqueur du match du tout début)
+            full_text = elem.get_text().lower()
+            if "set " in full_text or "jeu " in full_text or "point " in full_text or "exact" in full_text:
+                # On risque de filtrer trop, mais c'est plus sûr pour éviter les doublons de paris annexes
+                # Pour le moment, on se fie au dédoublonnage par ID (on garde le premier trouvé)
+                pass 
+
+            return Match(
+                id=match_id,
+                competition=competition,
+                home_team=home_team,
+                away_team=away_team,
+                date="",
+                odds_home=odds_home,
+                odds_draw=odds_draw,
+                odds_away=odds_away,
+                bookmaker=self.BOOKMAKER_NAME,
+                url=self.driver.current_url if self.driver else ""
+            )
+            
+        except Exception as e:
+            return None
+
+
+def synthetic_page(n_matches: int = 400) -> str:
+    """Page au format Winamax (index|équipe1|cote|Match nul|cote|équipe2|cote)"""
+    groups = []
+    for i in range(n_matches):
+        groups.append(
+            f'<div class="bet-group"><span>{i}</span>'
+            f'<div class="outcome"><span>Equipe {i} A</span><button class="bet-group-outcome-odd">{1.5 + i % 7 / 10:.2f}</button></div>'
+            f'<div class="outcome"><span>Match nul</span><button class="bet-group-outcome-odd">3,{10 + i % 80}</button></div>'
+            f'<div class="outcome"><span>Equipe {i} B</span><button class="bet-group-outcome-odd">{2.1 + i % 5 / 10:.2f}</button></div>'
+            '</div>'
+        )
+    # Les groupes sont dans un conteneur commun : c'est lui que l'ancien parseur re-sélectionne
+    return '<html><body><div class="matches">' + ''.join(
+        f'<div class="match">{g}</div>' for g in groups) + '</div></body></html>'
+
+
+def bench(scraper, soup, repeat: int):
+    best = float('inf')
+    matches = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        matches = scraper._parse_matches_with_bs4(soup, 'Football')
+        best = min(best, time.perf_counter() - start)
+    return best, matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pages', nargs='*', help='Pages Winamax enregistrées (HTML)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    pages = [(path, open(path, encoding='utf-8').read()) for path in args.pages]
+    if not pages:
+        pages = [('synthétique', synthetic_page())]
+
+    legacy, current = LegacyWinamaxScraper(), WinamaxScraper()
+    # Le print par page du parseur fausserait les mesures
+    sys.stdout, real_stdout = open(os.devnull, 'w'), sys.stdout
+    try:
+        results = []
+        for name, html in pages:
+            soup = BeautifulSoup(html, 'lxml')
+            t_old, old = bench(legacy, soup, args.repeat)
+            t_new, new = bench(current, soup, args.repeat)
+            same = [(m.id, m.odds_home, m.odds_draw, m.odds_away) for m in old] == \
+                   [(m.id, m.odds_home, m.odds_draw, m.odds_away) for m in new]
+            results.append((name, len(new), t_old, t_new, same))
+    finally:
+        sys.stdout = real_stdout
+
+    print(f"{'page':40} {'matchs':>6} {'ancien':>10} {'nouveau':>10} {'gain':>6}  identique")
+    for name, count, t_old, t_new, same in results:
+        print(f"{os.path.basename(name)[:40]:40} {count:6d} {t_old * 1000:8.1f}ms {t_new * 1000:8.1f}ms "
+              f"{t_old / t_new if t_new else 0:5.1f}x  {'✅' if same else '❌'}")
+
+
+if __name__ == '__main__':
+    main()
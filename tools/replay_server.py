@@ -0,0 +1,66 @@
+"""
+Serveur HTTP local qui rejoue des réponses enregistrées (remplace les bookmakers)
+
+Les pages sont enregistrées par HttpBackend quand RECORD_DIR est défini,
+sous <RECORD_DIR>/http/<hôte>/<chemin>.html. Le serveur sert un de ces
+répertoires d'hôte, en keep-alive et gzip comme un vrai site.
+
+Usage:
+    python tools/replay_server.py pages/http/www.winamax.fr --port 8765
+    HTTP_BASE_URL=http://127.0.0.1:8765 python -c "from winamax.scraper import WinamaxScraper; WinamaxScraper(backend='http').scrape()"
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import gzip
+import os
+
+
+def make_handler(root: str):
+    root = os.path.abspath(root)
+
+    class ReplayHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive (Content-Length toujours fourni)
+
+        def do_GET(self):
+            path = self.path.split('?', 1)[0].strip('/') or 'index'
+            file_path = os.path.abspath(os.path.join(root, path + '.html'))
+            if not file_path.startswith(root + os.sep) or not os.path.isfile(file_path):
+                self._send(404, b'not found', 'text/plain')
+                return
+            with open(file_path, 'rb') as f:
+                self._send(200, f.read(), 'text/html; charset=utf-8')
+
+        def _send(self, code: int, body: bytes, content_type: str):
+            self.send_response(code)
+            self.send_header('Content-Type', content_type)
+            if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                body = gzip.compress(body)
+                self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ReplayHandler
+
+
+def serve(root: str, host: str = '127.0.0.1', port: int = 8765) -> ThreadingHTTPServer:
+    """Crée le serveur (port=0 pour un port libre) ; à lancer avec serve_forever()"""
+    return ThreadingHTTPServer((host, port), make_handler(root))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rejoue des pages enregistrées')
+    parser.add_argument('root', help="Répertoire d'un hôte enregistré (ex: pages/http/www.winamax.fr)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server = serve(args.root, args.host, args.port)
+    print(f"🔁 Rejeu de {args.root} sur http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -2,5 +2,6 @@
 Package Winamax - Scraper pour winamax.fr
 """
 from .scraper import WinamaxScraper, get_best_matches, get_matches_as_json
+from .state import extract_preloaded_state
 
-__all__ = ['WinamaxScraper', 'get_best_matches', 'get_matches_as_json']
+__all__ = ['WinamaxScraper', 'extract_preloaded_state', 'get_best_matches', 'get_matches_as_json']
@@ -2,26 +2,25 @@
 Scraper Winamax - Récupère les cotes depuis winamax.fr avec Selenium + BeautifulSoup
 Ce module est spécifique à Winamax.
 """
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 import re
 from typing import List, Optional
+from datetime import datetime
 import time
 import sys
 import os
 
 # Ajouter le parent au path pour importer models
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from models import Match, ScraperResult, display_matches
+from models import Match, display_matches
+from base_scraper import BaseScraper
+from browser import save_cookies, record_page
+from readiness import ReadinessConfig, css_count_js, wait_for_count, wait_until_ready
+from winamax.state import STATE_PRESENT, STATE_READY_JS, extract_preloaded_state, iter_main_bets, read_preloaded_state, sport_id_from_path, team_names
 
 
-class WinamaxScraper:
+class WinamaxScraper(BaseScraper):
     """
     Scraper pour winamax.fr avec Selenium + BeautifulSoup
     
@@ -50,199 +49,180 @@ class WinamaxScraper:
         "Football": "/paris-sportifs/sports/1",
     }
     
-    def __init__(self, headless: bool = True, fast_mode: bool = True):
+    # Winamax utilise différents sélecteurs pour les cookies (union XPath)
+    COOKIE_BUTTONS_XPATH = " | ".join([
+        "//button[contains(text(), 'Tout accepter')]",
+        "//button[contains(text(), 'Accepter')]",
+        "//button[contains(@class, 'accept')]",
+        "//button[@id='tarteaucitronPersonalize2']",
+    ])
+    
+    # Nom de l'état navigateur persistant (cookies de consentement)
+    STATE_NAME = "winamax"
+    
+    # Nombre de boutons de cotes affichés (signal de disponibilité de la page)
+    ODDS_COUNT_JS = css_count_js('.bet-group-outcome-odd')
+    
+    def __init__(self, headless: bool = True, fast_mode: bool = True, multi_tab: bool = False,
+                 readiness: Optional[ReadinessConfig] = None, profile_dir: Optional[str] = None,
+                 use_state: bool = True, **options):
         """Initialise le scraper Winamax
         
         Args:
-            headless: True pour exécuter sans interface graphique
-            fast_mode: True pour scraper seulement les pages principales
+            use_state: True pour lire les cotes dans l'état préchargé de la SPA
+                (sans scroll ni parsing HTML), avec repli sur le DOM si absent
+            options: Voir BaseScraper (backend, blocked_resources, scroll_budget, max_tabs...)
         """
-        self.headless = headless
-        self.fast_mode = fast_mode
-        self.driver = None
-        self.cookies_accepted = False
-    
-    def _create_driver(self):
-        """Crée un driver Chrome avec options anti-détection"""
-        options = Options()
-        if self.headless:
-            options.add_argument("--headless=new")
-        
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        options.add_argument("--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
-        # Adaptation Raspberry Pi / ARM
-        if os.path.exists("/usr/bin/chromedriver"):
-            service = Service("/usr/bin/chromedriver")
-        else:
-            service = Service(ChromeDriverManager().install())
-
-        # Initialisation du driver
-        driver = webdriver.Chrome(service=service, options=options)
-        
-        # Configuration Stealth (Furtivité avancée)
-        try:
-            from selenium_stealth import stealth
-            stealth(driver,
-                languages=["fr-FR", "fr"],
-                vendor="Google Inc.",
-                platform="Win32",
-                webgl_vendor="Intel Inc.",
-                renderer="Intel Iris OpenGL Engine",
-                fix_hairline=True,
-            )
-        except ImportError:
-            print("⚠️ Selenium-stealth non installé, mode standard")
-
-        # Bypass classique supplémentaire
-        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-            "source": """
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-            """
-        })
-        
-        return driver
-    
-    def _start_driver(self):
-        """Démarre le driver si nécessaire"""
-        if self.driver is None:
-            self.driver = self._create_driver()
-    
-    def _stop_driver(self):
-        """Arrête le driver"""
-        if self.driver:
-            try:
-                self.driver.quit()
-            except:
-                pass
-            self.driver = None
+        super().__init__(headless=headless, fast_mode=fast_mode, multi_tab=multi_tab,
+                         readiness=readiness, profile_dir=profile_dir, **options)
+        self.use_state = use_state
     
     def _accept_cookies(self):
-        """Accepte les cookies si la popup apparaît"""
+        """Accepte les cookies si la popup apparaît (sonde unique, non bloquante)"""
         if self.cookies_accepted:
             return
         
         try:
-            # Winamax utilise différents sélecteurs pour les cookies
-            cookie_selectors = [
-                "//button[contains(text(), 'Tout accepter')]",
-                "//button[contains(text(), 'Accepter')]",
-                "//button[contains(@class, 'accept')]",
-                "//button[@id='tarteaucitronPersonalize2']",
-            ]
-            
-            for selector in cookie_selectors:
+            # Un seul find_elements sur l'union des sélecteurs : pas d'attente si aucun bandeau
+            for cookie_btn in self.driver.find_elements(By.XPATH, self.COOKIE_BUTTONS_XPATH):
                 try:
-                    cookie_btn = WebDriverWait(self.driver, 3).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                    cookie_btn.click()
-                    self.cookies_accepted = True
-                    time.sleep(1)
-                    break
+                    if cookie_btn.is_displayed():
+                        cookie_btn.click()
+                        self.cookies_accepted = True
+                        save_cookies(self.driver, self.STATE_NAME)
+                        break
                 except:
                     continue
         except:
             pass
     
-    def scrape(self) -> ScraperResult:
-        """Lance le scraping et retourne un ScraperResult"""
-        start_time = time.time()
-        all_matches = []
-        status = "success"
-        message = ""
+    def _parse_http_page(self, name: str, path: str, url: str, html: str) -> Optional[List[Match]]:
+        """Lit l'état préchargé de la page HTTP (None s'il est absent)"""
+        state = extract_preloaded_state(html)
+        if not state:
+            return None
+        return self._parse_matches_from_state(state, name, sport_id_from_path(path), url)
+    
+    def _extract_page(self, name: str, path: str, loaded_at: float) -> List[Match]:
+        """Extrait les matchs de la page (ou de l'onglet) courante"""
+        matches = []
         
-        print(f"🔄 Scraping {self.BOOKMAKER_NAME} (mode {'rapide' if self.fast_mode else 'complet'})...")
+        if self.use_state:
+            matches = self._extract_from_state(name, path, loaded_at)
+            if matches:
+                print(f"    → {name}: {len(matches)} matchs trouvés (état préchargé)")
+                return matches
         
         try:
-            self._start_driver()
+            # Attendre que les cotes soient rendues (en mode onglets, le temps déjà écoulé est décompté)
+            with self._phase(name, 'wait_ready'):
+                wait_until_ready(self.driver, self.ODDS_COUNT_JS, self.readiness, started_at=loaded_at)
+            with self._phase(name, 'cookies'):
+                self._accept_cookies()
             
-            # Scraper tous les sports 1X2 (foot, rugby, hockey) et 1-2 (basket, tennis)
-            sports_to_scrape = {**self.SPORTS_1X2, **self.SPORTS_1_2}
-            for sport_name, sport_path in sports_to_scrape.items():
-                matches = self._scrape_page(sport_name, sport_path)
-                
-                new_count = 0
-                for match in matches:
-                    # Ajouter le sport au match
-                    match.sport = sport_name
-                    # Éviter les doublons par ID unique (déjà normalisé)
-                    if not any(m.id == match.id for m in all_matches):
-                        all_matches.append(match)
-                        new_count += 1
-                
-                if new_count > 0:
-                    print(f"  ✅ {sport_name}: +{new_count} nouveaux matchs")
+            # Scroll pour charger plus de matchs
+            with self._phase(name, 'scroll'):
+                self._scroll_page(name)
             
-            message = f"{len(all_matches)} matchs récupérés"
+            # Récupérer le HTML et parser avec BeautifulSoup
+            with self._phase(name, 'transfer'):
+                html = self.driver.page_source
+            record_page(f"winamax_{name.lower()}.html", html)
+            self._record_page_weight(name)
+            with self._phase(name, 'parse'):
+                soup = BeautifulSoup(html, 'lxml')
+                matches = self._parse_matches_with_bs4(soup, name)
+            print(f"    → {name}: {len(matches)} matchs trouvés")
             
         except Exception as e:
-            status = "error"
-            message = str(e)
-            print(f"❌ Erreur: {e}")
-        finally:
-            self._stop_driver()
-        
-        duration = time.time() - start_time
-        print(f"\n📊 Total: {len(all_matches)} matchs uniques ({duration:.1f}s)")
+            print(f"    ⚠️ Erreur: {str(e)[:50]}")
         
-        return ScraperResult(
-            matches=all_matches,
-            bookmaker=self.BOOKMAKER_NAME,
-            status=status,
-            message=message,
-            duration_seconds=duration
-        )
+        return matches
     
-    def get_all_matches(self) -> List[Match]:
-        """Alias pour compatibilité"""
-        return self.scrape().matches
+    def _extract_from_state(self, name: str, path: str, loaded_at: float) -> List[Match]:
+        """Lit les matchs dans PRELOADED_STATE (tous les matchs, sans attendre le rendu)"""
+        try:
+            # L'état est un script inline : présent dès la fin de l'analyse du document ;
+            # absent à ce moment-là, on passe tout de suite au DOM
+            elapsed = time.time() - loaded_at
+            with self._phase(name, 'wait_ready'):
+                ready = wait_for_count(self.driver, STATE_READY_JS,
+                                       max(0, self.readiness.appear_timeout - elapsed),
+                                       self.readiness.poll_interval)
+            if ready != STATE_PRESENT:
+                return []
+            with self._phase(name, 'transfer'):
+                state = read_preloaded_state(self.driver)
+            if not state:
+                return []
+            self._record_page_weight(name)
+            url = self.driver.current_url
+            with self._phase(name, 'parse'):
+                return self._parse_matches_from_state(state, name, sport_id_from_path(path), url)
+        except Exception as e:
+            print(f"    ⚠️ État préchargé illisible: {str(e)[:50]}")
+            return []
     
-    def _scrape_page(self, name: str, path: str) -> List[Match]:
-        """Scrape une page Winamax avec Selenium puis parse avec BeautifulSoup"""
+    def _parse_matches_from_state(self, state: dict, competition: str,
+                                  sport_id: Optional[str] = None, url: str = "") -> List[Match]:
+        """Convertit l'état préchargé Winamax en objets Match (pari principal de chaque match)"""
         matches = []
+        seen_ids = set()
         
-        try:
-            url = f"{self.BASE_URL}{path}"
-            self.driver.get(url)
-            time.sleep(2)  # Réduit de 3 à 2
-            self._accept_cookies()
-            time.sleep(1)  # Réduit de 2 à 1
+        for raw, prices in iter_main_bets(state, sport_id):
+            home_team, away_team = team_names(raw)
+            home_team = home_team[:40].strip()
+            away_team = away_team[:40].strip()
+            if not home_team or not away_team or home_team == away_team:
+                continue
             
-            # Scroll pour charger plus de matchs
-            self._scroll_page()
+            odds_values = [price for _, price in prices]
+            if not all(1.01 <= o <= 100 for o in odds_values):
+                continue
+            if len(odds_values) == 3:
+                odds_home, odds_draw, odds_away = odds_values
+            else:
+                odds_home, odds_away = odds_values
+                odds_draw = 1.0  # Pas de nul
             
-            # Récupérer le HTML et parser avec BeautifulSoup
-            html = self.driver.page_source
-            soup = BeautifulSoup(html, 'lxml')
+            # Même ID que le parseur HTML (indépendant de l'ordre domicile/extérieur)
+            teams_sorted = sorted([_clean_name(home_team), _clean_name(away_team)])
+            match_id = f"winamax_{teams_sorted[0][:10]}_{teams_sorted[1][:10]}"
+            if match_id in seen_ids:
+                continue
+            seen_ids.add(match_id)
             
-            matches = self._parse_matches_with_bs4(soup, name)
-            print(f"    → {len(matches)} matchs trouvés")
+            start = raw.get('matchStart')
+            date = datetime.fromtimestamp(start).strftime('%d/%m %H:%M') if start else ""
             
-        except Exception as e:
-            print(f"    ⚠️ Erreur: {str(e)[:50]}")
+            matches.append(Match(
+                id=match_id,
+                competition=competition,
+                home_team=home_team,
+                away_team=away_team,
+                date=date,
+                odds_home=odds_home,
+                odds_draw=odds_draw,
+                odds_away=odds_away,
+                bookmaker=self.BOOKMAKER_NAME,
+                url=f"{self.BASE_URL}/paris-sportifs/match/{raw['matchId']}" if raw.get('matchId') else url
+            ))
         
         return matches
     
-    def _scroll_page(self):
-        """Scroll la page pour charger plus de contenu"""
+    def _scroll_page(self, name: str = ""):
+        """Scroll adaptatif : continue tant que de nouvelles cotes apparaissent"""
         try:
-            for _ in range(3):
-                self.driver.execute_script("window.scrollBy(0, 1000);")
-                time.sleep(0.3)  # Réduit de 0.5 à 0.3
+            self._adaptive_scroll(name, self.ODDS_COUNT_JS)
         except:
             pass
     
     def _parse_matches_with_bs4(self, soup: BeautifulSoup, competition: str) -> List[Match]:
-        """Parse les matchs avec BeautifulSoup - adapté à la structure Winamax"""
+        """Parse les matchs avec BeautifulSoup - adapté à la structure Winamax
+        
+        Un seul passage sur les boutons de cotes : ils sont regroupés par
+        grand-parent (le conteneur des 2 ou 3 cotes d'un match) sans re-sélection.
+        """
         matches = []
         
         # Winamax utilise la classe bet-group-outcome-odd pour les boutons de cotes
@@ -254,50 +234,45 @@ class WinamaxScraper:
         
         print(f"    (trouvé {len(bet_buttons)} boutons de cotes)")
         
-        # Les cotes sont groupées par 3 (1, N, 2)
-        # Remonter de 2 niveaux pour trouver le conteneur des 3 cotes
-        processed_grandparents = set()
-        
+        # Les cotes sont groupées par 3 (1, N, 2) ou 2 (1, 2)
+        # Le grand-parent de chaque bouton est le conteneur du groupe
+        groups = {}  # id(grand-parent) -> [grand-parent, nombre de boutons]
         for bet_btn in bet_buttons:
-            # Remonter de 2 niveaux (parent puis grand-parent)
             parent = bet_btn.parent
-            if parent:
-                grandparent = parent.parent
-                if grandparent and id(grandparent) not in processed_grandparents:
-                    # Vérifier si le grand-parent contient exactement 2 ou 3 éléments de cotes
-                    odds_in_grandparent = grandparent.select('.bet-group-outcome-odd')
-                    
-                    if len(odds_in_grandparent) in [2, 3]:
-                        processed_grandparents.add(id(grandparent))
-                        
-                        # Extraire le texte complet du grand-parent
-                        match = self._parse_match_from_bet_group(grandparent, competition)
-                        if match:
-                            matches.append(match)
+            grandparent = parent.parent if parent else None
+            if grandparent is None:
+                continue
+            group = groups.get(id(grandparent))
+            if group is None:
+                groups[id(grandparent)] = [grandparent, 1]
+            else:
+                group[1] += 1
+        
+        # URL lue une seule fois par page (chaque accès est un aller-retour WebDriver)
+        url = self.driver.current_url if self.driver else ""
+        
+        # Les dicts conservent l'ordre d'insertion : ordre du document préservé
+        for grandparent, count in groups.values():
+            if count in (2, 3):
+                match = self._parse_match_from_bet_group(grandparent, competition, url)
+                if match:
+                    matches.append(match)
         
         return matches
     
-    def _parse_match_from_bet_group(self, elem, competition: str) -> Optional[Match]:
+    def _parse_match_from_bet_group(self, elem, competition: str, url: str = "") -> Optional[Match]:
         """Parse un groupe de paris pour extraire le match"""
         try:
-            # Récupérer le texte avec séparateurs
-            text = elem.get_text('|', strip=True)
-            
-            if not text or len(text) < 10:
-                return None
-            
+            # Textes du groupe en un seul parcours de l'arbre
             # Pattern Winamax: "XXX|Équipe1|cote1|Match nul|cote2|Équipe2|cote3"
             # ou parfois: "Équipe1|cote1|N|cote2|Équipe2|cote3"
+            parts = list(elem.stripped_strings)
             
-            parts = [p.strip() for p in text.split('|') if p.strip()]
+            if sum(len(p) for p in parts) + len(parts) - 1 < 10:
+                return None
             
             # Trouver les cotes (format X,XX ou X.XX)
-            odds_pattern = r'^(\d{1,2}[,\.]\d{1,2})$'
-            
-            odds_indices = []
-            for i, part in enumerate(parts):
-                if re.match(odds_pattern, part):
-                    odds_indices.append(i)
+            odds_indices = [i for i, part in enumerate(parts) if ODDS_RE.match(part)]
             
             if len(odds_indices) < 2:
                 return None
@@ -309,56 +284,30 @@ class WinamaxScraper:
                 if 1.01 <= val <= 100:
                     odds_values.append(val)
             
-            if len(odds_values) not in [2, 3]:
-                return None
-            
             if len(odds_values) == 3:
-                odds_home = odds_values[0]
-                odds_draw = odds_values[1]
-                odds_away = odds_values[2]
-            else:
-                odds_home = odds_values[0]
+                odds_home, odds_draw, odds_away = odds_values
+                # Pour 3 issues: équipe extérieur entre cote 2 et cote 3
+                start_search, end_search = odds_indices[1] + 1, odds_indices[2]
+            elif len(odds_values) == 2:
+                odds_home, odds_away = odds_values
                 odds_draw = 1.0  # Pas de nul
-                odds_away = odds_values[1]
-            
-            # Trouver les équipes
-            # Pattern Winamax 3 issues: "index|équipe1|cote1|Match nul|cote2|équipe2|cote3"
-            # Pattern Winamax 2 issues: "index|équipe1|cote1|équipe2|cote2"
-            
-            first_odds_idx = odds_indices[0]
-            # Pour 2 issues, la 2ème cote est à l'index 1
-            last_odds_idx = odds_indices[2] if len(odds_indices) >= 3 else odds_indices[1]
+                # Pour 2 issues: équipe extérieur entre cote 1 et cote 2
+                start_search, end_search = odds_indices[0] + 1, odds_indices[1]
+            else:
+                return None
             
             # Équipe domicile: juste avant la 1ère cote
             home_team = None
-            for i in range(first_odds_idx - 1, -1, -1):
-                candidate = parts[i]
-                # Ignorer "Match nul", "N", les nombres seuls, et les pourcentages
-                if candidate.lower() not in ['match nul', 'n', 'nul', '1', '2', 'x']:
-                    if not re.match(r'^[\d,\.%]+$', candidate):  # Exclure aussi les %
-                        if len(candidate) > 2:  # Un nom d'équipe a au moins 3 caractères
-                            home_team = candidate
-                            break
+            for i in range(odds_indices[0] - 1, -1, -1):
+                if _is_team_name(parts[i]):
+                    home_team = parts[i]
+                    break
             
-            # Équipe extérieur: ENTRE la 1ère et dernière cote utilisée
-            # Pour 3 issues: entre cote 2 et cote 3
-            # Pour 2 issues: entre cote 1 et cote 2
             away_team = None
-            
-            if len(odds_values) == 3:
-                start_search = odds_indices[1] + 1
-                end_search = odds_indices[2]
-            else:
-                start_search = odds_indices[0] + 1
-                end_search = odds_indices[1]
-
             for i in range(start_search, end_search):
-                candidate = parts[i]
-                if candidate.lower() not in ['match nul', 'n', 'nul', '1', '2', 'x']:
-                    if not re.match(r'^[\d,\.%]+$', candidate):  # Exclure aussi les %
-                        if len(candidate) > 2:  # Un nom d'équipe a au moins 3 caractères
-                            away_team = candidate
-                            break
+                if _is_team_name(parts[i]):
+                    away_team = parts[i]
+                    break
             
             if not home_team or not away_team:
                 return None
@@ -370,30 +319,10 @@ class WinamaxScraper:
             if home_team == away_team or len(home_team) < 2 or len(away_team) < 2:
                 return None
             
-            # Normalisation pour l'ID unique (gestion A vs B / B vs A et clean noms)
-            def clean_name(name):
-                # Enlever les virgules inversées "Nom, Prénom" -> "Prénom Nom"
-                if ',' in name:
-                    parts = name.split(',')
-                    if len(parts) == 2:
-                        return f"{parts[1].strip()} {parts[0].strip()}".lower()
-                return name.lower().replace(',', '').strip()
-            
-            h_clean = clean_name(home_team)
-            a_clean = clean_name(away_team)
-            
             # ID indépendant de l'ordre domicile/extérieur
-            teams_sorted = sorted([h_clean, a_clean])
+            teams_sorted = sorted([_clean_name(home_team), _clean_name(away_team)])
             match_id = f"winamax_{teams_sorted[0][:10]}_{teams_sorted[1][:10]}"
             
-            # Détection et exclusion explicite des paris "Set" ou "Jeu" ou "Point" dans le texte
-            # (Heuristique simple: si le texte original contient ces mots, c'est probablement pas le vainqueur du match du tout début)
-            full_text = elem.get_text().lower()
-            if "set " in full_text or "jeu " in full_text or "point " in full_text or "exact" in full_text:
-                # On risque de filtrer trop, mais c'est plus sûr pour éviter les doublons de paris annexes
-                # Pour le moment, on se fie au dédoublonnage par ID (on garde le premier trouvé)
-                pass 
-
             return Match(
                 id=match_id,
                 competition=competition,
@@ -404,13 +333,35 @@ class WinamaxScraper:
                 odds_draw=odds_draw,
                 odds_away=odds_away,
                 bookmaker=self.BOOKMAKER_NAME,
-                url=self.driver.current_url if self.driver else ""
+                url=url
             )
             
         except Exception as e:
             return None
 
 
+# Patterns précompilés du parseur
+ODDS_RE = re.compile(r'^(\d{1,2}[,\.]\d{1,2})$')
+NUMERIC_RE = re.compile(r'^[\d,\.%]+$')
+NOT_TEAM_LABELS = frozenset(['match nul', 'n', 'nul', '1', '2', 'x'])
+
+
+def _is_team_name(candidate: str) -> bool:
+    """Ignore "Match nul", "N", les nombres seuls et les pourcentages"""
+    return (len(candidate) > 2  # Un nom d'équipe a au moins 3 caractères
+            and candidate.lower() not in NOT_TEAM_LABELS
+            and not NUMERIC_RE.match(candidate))
+
+
+def _clean_name(name: str) -> str:
+    """Normalisation pour l'ID unique : "Nom, Prénom" -> "prénom nom" """
+    if ',' in name:
+        parts = name.split(',')
+        if len(parts) == 2:
+            return f"{parts[1].strip()} {parts[0].strip()}".lower()
+    return name.lower().replace(',', '').strip()
+
+
 # ============================================================================
 # Fonctions utilitaires exportées
 # ============================================================================
@@ -0,0 +1,95 @@
+"""
+Lecture de l'état applicatif préchargé par la SPA Winamax (PRELOADED_STATE)
+
+La page embarque tous les matchs et cotes dans un objet JavaScript :
+on le décode directement au lieu d'attendre le rendu, de scroller et de parser le HTML.
+"""
+import json
+import re
+from typing import Iterator, List, Optional, Tuple
+
+
+STATE_MARKER_RE = re.compile(r'PRELOADED_STATE\s*=\s*')
+# Sonde de l'état préchargé : 2 présent, 1 absent alors que le document est analysé (script
+# inline déjà exécuté : inutile d'attendre, repli DOM immédiat), 0 document encore en chargement
+STATE_PRESENT, STATE_ABSENT = 2, 1
+STATE_READY_JS = ("return window.PRELOADED_STATE ? 2 : "
+                  "(document.readyState !== 'loading' ? 1 : 0);")
+STATE_JSON_JS = "return window.PRELOADED_STATE ? JSON.stringify(window.PRELOADED_STATE) : null;"
+
+_decoder = json.JSONDecoder()
+
+
+def extract_preloaded_state(html: str) -> Optional[dict]:
+    """Extrait l'objet PRELOADED_STATE du HTML de la page (un seul décodage JSON)"""
+    marker = STATE_MARKER_RE.search(html)
+    if not marker:
+        return None
+    try:
+        state, _ = _decoder.raw_decode(html, marker.end())
+    except ValueError:
+        return None
+    return state if isinstance(state, dict) else None
+
+
+def read_preloaded_state(driver) -> Optional[dict]:
+    """Lit l'état depuis la page ouverte (JS d'abord, puis page_source)"""
+    try:
+        raw = driver.execute_script(STATE_JSON_JS)
+        if raw:
+            return json.loads(raw)
+    except Exception:
+        pass
+    try:
+        return extract_preloaded_state(driver.page_source)
+    except Exception:
+        return None
+
+
+def sport_id_from_path(path: str) -> Optional[str]:
+    """'/paris-sportifs/sports/12' -> '12'"""
+    last = path.rstrip('/').rsplit('/', 1)[-1]
+    return last if last.isdigit() else None
+
+
+def iter_main_bets(state: dict, sport_id: Optional[str] = None) -> Iterator[Tuple[dict, List[Tuple[str, float]]]]:
+    """
+    Parcourt les matchs de l'état avec les cotes de leur pari principal.
+
+    Yields:
+        (match brut de l'état, [(libellé de l'issue, cote), ...]) pour les paris à 2 ou 3 issues
+    """
+    matches = state.get('matches') or {}
+    bets = state.get('bets') or {}
+    outcomes = state.get('outcomes') or {}
+    odds = state.get('odds') or {}
+
+    for match in matches.values():
+        if not isinstance(match, dict):
+            continue
+        if sport_id is not None and str(match.get('sportId')) != sport_id:
+            continue
+
+        bet = bets.get(str(match.get('mainBetId')))
+        if not bet:
+            continue
+
+        prices = []
+        for outcome_id in bet.get('outcomes') or []:
+            price = odds.get(str(outcome_id))
+            if not price:
+                break  # Issue suspendue : pari principal inutilisable
+            label = (outcomes.get(str(outcome_id)) or {}).get('label', '')
+            prices.append((label, float(price)))
+        else:
+            if len(prices) in (2, 3):
+                yield match, prices
+
+
+def team_names(match: dict) -> Tuple[str, str]:
+    """Noms des deux équipes (ou joueurs) d'un match brut de l'état"""
+    home = match.get('competitor1Name') or ''
+    away = match.get('competitor2Name') or ''
+    if not (home and away) and ' - ' in (match.get('title') or ''):
+        home, away = [part.strip() for part in match['title'].split(' - ', 1)]
+    return home, away
@@ -0,0 +1,221 @@
+"""
+Scrapers isolés dans des process dédiés (un par bookmaker)
+
+Le process Flask ne lance plus Selenium : chaque bookmaker a un process
+worker (avec son propre navigateur chaud) qui reçoit les demandes de
+scraping par un Pipe et renvoie les pages puis le ScraperResult.
+Le parent surveille la durée et la mémoire du worker et de ses Chrome ;
+en cas de dépassement tout l'arbre de process est tué et le worker
+sera recréé à la demande suivante.
+"""
+from typing import Callable, List, Optional
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+import types
+
+from browser import get_pool, init_pool, process_tree_pids, process_tree_rss_mb
+from models import Match, ScraperResult
+
+
+# 'spawn' : pas de fork d'un process Flask multi-threadé
+_mp = multiprocessing.get_context('spawn')
+_spawn_lock = threading.Lock()
+
+
+def _worker_main(conn, scraper_cls, scraper_kwargs: dict, pool_size: int):
+    """Boucle du process worker : ('scrape', sports, options, keep_browser) -> ('page', ...)* puis ('result' | 'error', ...)"""
+    # Nouveau groupe de process : le parent peut tuer le worker et tous ses Chrome d'un coup
+    os.setsid()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C géré par le parent
+
+    if pool_size > 0:
+        init_pool(size=pool_size, headless=scraper_kwargs.get('headless', True), warm=False)
+
+    def on_page(sport: str, matches: List[Match]):
+        conn.send(('page', sport, matches))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break  # Parent disparu
+        if message[0] == 'stop':
+            break
+        try:
+            # Options propres à ce scraping (ex: max_tabs fixé par le régulateur)
+            scraper = scraper_cls(**dict(scraper_kwargs, **message[2]))
+            conn.send(('result', scraper.scrape(sports=message[1], on_page=on_page)))
+        except Exception as e:
+            conn.send(('error', str(e)))
+        finally:
+            pool = get_pool()
+            if pool is not None and not message[3]:
+                pool.close_idle()  # Mémoire rendue entre deux scrapings
+
+    # Sortie d'un process multiprocessing : les handlers atexit ne sont pas appelés
+    pool = get_pool()
+    if pool is not None:
+        pool.shutdown()
+
+
+class ScraperWorker:
+    """Process worker supervisé pour un bookmaker (une demande à la fois)"""
+
+    def __init__(self, name: str, scraper_cls, scraper_kwargs: Optional[dict] = None,
+                 deadline: float = 240.0, max_rss_mb: float = 900.0, pool_size: int = 1,
+                 poll_interval: float = 0.5):
+        """
+        Args:
+            deadline: Durée max (s) d'un scraping avant de tuer le worker
+            max_rss_mb: RSS max (Mo) du worker et de ses descendants (chromedriver, Chrome)
+            pool_size: Navigateurs chauds gardés par le worker entre deux scrapings
+        """
+        self.name = name
+        self.scraper_cls = scraper_cls
+        self.scraper_kwargs = scraper_kwargs or {}
+        self.deadline = deadline
+        self.max_rss_mb = max_rss_mb
+        self.pool_size = pool_size
+        self.poll_interval = poll_interval
+        self.process = None
+        self._conn = None
+        self._lock = threading.Lock()
+        self.jobs = 0
+        self.kills = 0
+        self.last_kill_reason: Optional[str] = None
+        self.peak_rss_mb = 0.0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def _start(self):
+        parent_conn, child_conn = _mp.Pipe()
+        self.process = _mp.Process(target=_worker_main, name=f'scraper-{self.name}', daemon=True,
+                                   args=(child_conn, self.scraper_cls, self.scraper_kwargs, self.pool_size))
+        # spawn ré-exécute le module __main__ (app.py) dans l'enfant : on lui présente un module
+        # vide, le worker n'importe que workers.py et le module du scraper
+        with _spawn_lock:
+            main_module = sys.modules['__main__']
+            sys.modules['__main__'] = types.ModuleType('__main__')
+            try:
+                self.process.start()
+            finally:
+                sys.modules['__main__'] = main_module
+        child_conn.close()
+        self._conn = parent_conn
+        print(f"👷 Worker {self.name} démarré (pid {self.process.pid})")
+
+    def kill(self, reason: str):
+        """Tue le worker et tout son arbre de process (chromedriver, Chrome)"""
+        if self.process is None:
+            return
+        pid = self.process.pid
+        print(f"💀 Worker {self.name} (pid {pid}) tué : {reason}")
+        pids = process_tree_pids(pid)
+        try:
+            os.killpg(pid, signal.SIGKILL)  # Groupe créé par os.setsid() dans le worker
+        except (ProcessLookupError, PermissionError):
+            pass
+        # Descendants sortis du groupe (Chrome crée parfois ses propres sessions)
+        for child in pids:
+            try:
+                os.kill(child, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+        self.process.join(5)  # Récupère le statut du worker (pas de zombie)
+        self._conn.close()
+        self.process, self._conn = None, None
+        self.kills += 1
+        self.last_kill_reason = reason
+
+    def _error(self, message: str, started: float) -> ScraperResult:
+        bookmaker = getattr(self.scraper_cls, 'BOOKMAKER_NAME', self.name)
+        return ScraperResult(bookmaker=bookmaker, status='error', message=message,
+                             duration_seconds=time.time() - started)
+
+    def scrape(self, sports: Optional[List[str]] = None,
+               on_page: Optional[Callable[[str, List[Match]], None]] = None,
+               options: Optional[dict] = None, keep_browser: bool = True) -> ScraperResult:
+        """Scraping dans le worker, avec la même interface que scraper.scrape()
+
+        Args:
+            options: Arguments du scraper propres à ce scraping (complètent scraper_kwargs)
+            keep_browser: False pour fermer le navigateur chaud du worker après le scraping
+        """
+        with self._lock:
+            started = time.time()
+            if not self.alive:
+                if self.process is not None:
+                    self.kill('process mort')
+                self._start()
+            self.jobs += 1
+            self._conn.send(('scrape', sports, options or {}, keep_browser))
+            last_check = started
+
+            while True:
+                try:
+                    ready = self._conn.poll(self.poll_interval)
+                    message = self._conn.recv() if ready else None
+                except (EOFError, OSError):
+                    self.kill('process terminé pendant le scraping')
+                    return self._error('Worker terminé pendant le scraping', started)
+
+                if message is not None:
+                    kind = message[0]
+                    if kind == 'page' and on_page is not None:
+                        try:
+                            on_page(message[1], message[2])
+                        except Exception as e:
+                            print(f"  ⚠️ on_page {message[1]}: {e}")
+                    elif kind == 'result':
+                        return message[1]
+                    elif kind == 'error':
+                        return self._error(message[1], started)
+                    if time.time() - last_check < self.poll_interval:
+                        continue  # Pages en rafale : contrôles au plus une fois par intervalle
+
+                last_check = time.time()
+                if time.time() - started > self.deadline:
+                    self.kill(f'délai de {self.deadline:.0f}s dépassé')
+                    return self._error('Délai dépassé', started)
+                rss = process_tree_rss_mb(self.process.pid)
+                self.peak_rss_mb = max(self.peak_rss_mb, rss)
+                if rss > self.max_rss_mb:
+                    self.kill(f'mémoire {rss:.0f} Mo > {self.max_rss_mb:.0f} Mo')
+                    return self._error('Limite mémoire dépassée', started)
+                if not self.process.is_alive():
+                    self.kill('process mort')
+                    return self._error('Worker mort pendant le scraping', started)
+
+    def stop(self, timeout: float = 10.0):
+        """Arrêt propre (ferme les navigateurs du worker), sinon kill"""
+        with self._lock:
+            if not self.alive:
+                return
+            try:
+                self._conn.send(('stop',))
+                self.process.join(timeout)
+            except OSError:
+                pass
+            if self.process.is_alive():
+                self.kill('arrêt')
+            else:
+                self._conn.close()
+                self.process, self._conn = None, None
+
+    def stats(self) -> dict:
+        process = self.process
+        alive = process is not None and process.is_alive()
+        return {
+            'pid': process.pid if alive else None,
+            'rss_mb': round(process_tree_rss_mb(process.pid), 1) if alive else 0,
+            'peak_rss_mb': round(self.peak_rss_mb, 1),
+            'jobs': self.jobs,
+            'kills': self.kills,
+            'last_kill_reason': self.last_kill_reason,
+        }